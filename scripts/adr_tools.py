@@ -1,14 +1,30 @@
 #!/usr/bin/env python3
 import argparse
+import concurrent.futures
+import dataclasses
 import datetime as dt
 import glob
+import hashlib
+import json
 import os
 import re
+import subprocess
 import sys
+import tempfile
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 ADR_DIR = os.path.join(ROOT, "docs", "adr")
 INDEX = os.path.join(ADR_DIR, "INDEX.md")
+# Parsed metadata per ADR file, keyed by path and validated by mtime/size/content hash.
+META_CACHE = os.environ.get("ADR_META_CACHE", os.path.join(ROOT, ".cache", "adr_meta.json"))
+META_CACHE_VERSION = 2  # bump whenever AdrRecord or parse_adr output changes
+DEPS_DIR = os.path.join(ROOT, "deps")
+AGGREGATE_OUT = os.path.join(ADR_DIR, "ADOPTION.md")
+# Local ADR metadata per bootstrapped dep repo, keyed by the repo's HEAD SHA.
+AGGREGATE_CACHE = os.environ.get(
+    "ADR_AGGREGATE_CACHE", os.path.join(ROOT, ".cache", "adr_aggregate.json")
+)
+AGGREGATE_JOBS = int(os.environ.get("ADR_AGGREGATE_JOBS", "8"))
 
 # Matches:
 #   0001-some-title.md
@@ -21,16 +37,20 @@ def slugify(s: str) -> str:
     return re.sub(r"-+", "-", re.sub(r"[^a-z0-9]+", "-", s.lower())).strip("-")
 
 
-def iter_adr_files(series: str):
+def iter_adr_files(series: str, adr_dir=None):
     """
     series:
       - "numeric"  -> only 0001-*.md
       - "all"      -> both numeric and prefixed
       - "ECO"/...  -> only <SERIES>-0001-*.md (exact prefix match)
+
+    adr_dir defaults to this repo's docs/adr (created if missing).
     """
-    os.makedirs(ADR_DIR, exist_ok=True)
+    if adr_dir is None:
+        adr_dir = ADR_DIR
+        os.makedirs(adr_dir, exist_ok=True)
 
-    for p in glob.glob(os.path.join(ADR_DIR, "*.md")):
+    for p in glob.glob(os.path.join(adr_dir, "*.md")):
         base = os.path.basename(p)
 
         # skip templates + index
@@ -63,36 +83,181 @@ def next_id(series: str) -> str:
     return f"{(max(ids) + 1 if ids else 1):04d}"
 
 
-def read_front_matter(path):
-    meta = {}
-    with open(path, encoding="utf-8") as f:
-        s = f.read()
-    if s.startswith("---"):
-        parts = s.split("\n---", 1)
-        if len(parts) > 1:
-            fm = parts[0].lstrip("-\n")
-            for line in fm.splitlines():
-                if ":" in line:
-                    k, v = line.split(":", 1)
-                    meta[k.strip().lower()] = v.strip().strip('"').strip("'")
-    allowed_keys = {"title", "status", "date", "area", "tags", "impacted_repos"}
-    md_kv = re.compile(r"^\s*(?:[-*]\s*)?\*\*(.+?):\*\*\s*(.+?)\s*$")
-    for line in s.splitlines():
-        m = md_kv.match(line)
-        if not m:
+@dataclasses.dataclass(frozen=True)
+class AdrRecord:
+    title: str = ""
+    status: str = ""
+    date: str = ""
+    area: str = ""
+    tags: tuple = ()
+    impacted_repos: tuple = ()
+    related: tuple = ()  # ADR ids such as "ECO-0004", in order of first mention
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**{k: tuple(v) if isinstance(v, list) else v for k, v in d.items()})
+
+
+# Header keys as written in ADRs ("**Impacted repos:**", "impacted_repos:" ...) -> AdrRecord field
+HEADER_KEYS = {
+    "title": "title",
+    "status": "status",
+    "date": "date",
+    "area": "area",
+    "tags": "tags",
+    "impacted_repos": "impacted_repos",
+    "impacted repos": "impacted_repos",
+    "related": "related",
+    "related ecosystem adrs": "related",
+}
+LIST_FIELDS = {"tags", "impacted_repos"}
+SCALAR_FIELDS = set(HEADER_KEYS.values()) - {"related"}
+# Local ADRs in deps/* list adopted ECO ADRs in this section instead of a header key.
+REFERENCE_SECTIONS = {"upstream references"}
+RE_MD_KV = re.compile(r"^\s*(?:[-*]\s*)?\*\*(.+?):\*\*\s*(.+?)\s*$")
+RE_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+RE_ADR_ID = re.compile(r"\b[A-Z]{2,8}-[0-9]{4}\b")
+
+
+def _clean(value):
+    return value.strip().strip("`").strip('"').strip("'").strip()
+
+
+def parse_adr(lines):
+    """
+    Parse ADR metadata from an iterable of lines in one pass.
+
+    Reads optional `---` front matter and `**Key:** value` header lines, takes the
+    first H1 as a title fallback and collects ADR ids from related keys and an
+    "Upstream references" section. Parsing stops once every field is known and the
+    contiguous header lines end, or at the first section heading after the header,
+    so the body of long ADRs is never read.
+    """
+    found = {}
+    related = []
+    h1 = None
+    in_front_matter = False
+    in_references = False
+
+    for lineno, raw in enumerate(lines):
+        line = raw.rstrip("\n")
+
+        if lineno == 0 and line.strip() == "---":
+            in_front_matter = True
             continue
-        key = m.group(1).strip().lower()
-        if key not in allowed_keys:
+        if in_front_matter:
+            if line.strip() == "---":
+                in_front_matter = False
+                continue
+            key, sep, value = line.partition(":")
+            field = HEADER_KEYS.get(key.strip().lower())
+            if sep and field and value.strip():
+                if field == "related":
+                    related.extend(RE_ADR_ID.findall(value))
+                found.setdefault(field, _clean(value))
             continue
-        value = m.group(2).strip().strip("`")
-        meta.setdefault(key, value)
 
-    # fallback: first markdown H1 as title
-    if "title" not in meta:
-        m = re.search(r"^#\s+(.+)$", s, flags=re.M)
+        heading = RE_HEADING.match(line)
+        if heading:
+            if len(heading.group(1)) == 1 and h1 is None:
+                h1 = heading.group(2).strip()
+                continue
+            if heading.group(2).strip().lower() in REFERENCE_SECTIONS:
+                in_references = True
+                continue
+            if found or h1 is not None:
+                break  # header block over; the rest of the file is body text
+            continue
+
+        if in_references:
+            related.extend(RE_ADR_ID.findall(line))
+            continue
+
+        m = RE_MD_KV.match(line)
         if m:
-            meta["title"] = m.group(1).strip()
-    return meta
+            field = HEADER_KEYS.get(m.group(1).strip().lower())
+            if field:
+                if field == "related":
+                    related.extend(RE_ADR_ID.findall(m.group(2)))
+                found.setdefault(field, _clean(m.group(2)))
+        elif SCALAR_FIELDS <= found.keys():
+            break  # related ids may span several header lines, so finish the block first
+
+    if "title" not in found and h1 is not None:
+        found["title"] = h1
+    fields = {k: v for k, v in found.items() if k != "related"}
+    for k in LIST_FIELDS & fields.keys():
+        fields[k] = tuple(item for item in (_clean(part) for part in fields[k].split(",")) if item)
+    return AdrRecord(related=tuple(dict.fromkeys(related)), **fields)
+
+
+def read_adr(path):
+    with open(path, encoding="utf-8") as f:
+        return parse_adr(f)
+
+
+def _write_atomic(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path))
+    with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def load_metadata(paths, cache_path=META_CACHE, update_cache=True):
+    """
+    Return {path: AdrRecord} for paths, re-parsing only files that changed.
+
+    A cached entry is reused without reading the file when mtime and size match, and
+    after a content-hash check when only the mtime moved (e.g. a fresh checkout).
+    Entries for files outside paths (other series) are kept unless the file is gone.
+    Pass cache_path=None to parse everything, update_cache=False to leave the cache
+    file untouched.
+    """
+    cache = {"version": META_CACHE_VERSION, "entries": {}}
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                loaded = json.load(f)
+            if loaded.get("version") == META_CACHE_VERSION:
+                cache = loaded
+        except (OSError, ValueError):
+            pass
+    entries = cache["entries"]
+
+    result = {}
+    fresh = {}
+    dirty = False
+    for p in paths:
+        key = os.path.relpath(p, ROOT)
+        st = os.stat(p)
+        entry = entries.get(key)
+        if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            fresh[key] = entry
+            result[p] = AdrRecord.from_dict(entry["meta"])
+            continue
+
+        with open(p, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if entry and entry["sha256"] == digest:
+            record = AdrRecord.from_dict(entry["meta"])
+        else:
+            record = parse_adr(raw.decode("utf-8").splitlines())
+        meta = dataclasses.asdict(record)
+        fresh[key] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": digest, "meta": meta}
+        result[p] = record
+        dirty = True
+
+    merged = {
+        key: entry
+        for key, entry in entries.items()
+        if key in fresh or os.path.exists(os.path.join(ROOT, key))
+    }
+    merged.update(fresh)
+    if cache_path and update_cache and (dirty or merged.keys() != entries.keys()):
+        _write_atomic(cache_path, json.dumps({"version": META_CACHE_VERSION, "entries": merged}, indent=1))
+    return result
 
 
 def cmd_new(args):
@@ -141,21 +306,22 @@ def cmd_new(args):
     print(f"Created {os.path.relpath(fname, ROOT)}")
 
 
-def cmd_reindex(args):
+def render_index(series, cache_path=META_CACHE, update_cache=True):
+    """Return (INDEX.md text, number of ADRs) for series."""
     rows = []
 
-    for p, prefix, n in sorted(iter_adr_files(args.series), key=lambda t: ((t[1] or "ADR"), t[2])):
+    adrs = sorted(iter_adr_files(series), key=lambda t: ((t[1] or "ADR"), t[2]))
+    metadata = load_metadata([p for p, _prefix, _n in adrs], cache_path, update_cache)
+    for p, prefix, n in adrs:
         base = os.path.basename(p)
-        meta = read_front_matter(p)
-
-        title = meta.get("title", base)
-        status = meta.get("status", "")
-        date = meta.get("date", "")
-        area = meta.get("area", "")
-        tags = meta.get("tags", "")
+        record = metadata[p]
 
-        # Optional: if you add "impacted_repos:" to front matter in ECO ADRs
-        impacted = meta.get("impacted_repos", "")
+        title = record.title or base
+        status = record.status
+        date = record.date
+        area = record.area
+        tags = ", ".join(record.tags)
+        impacted = ", ".join(record.impacted_repos)
 
         link = base
 
@@ -164,14 +330,14 @@ def cmd_reindex(args):
 
         # If series is a single prefix (e.g., ECO), include impacted column;
         # otherwise keep old shape.
-        if args.series not in ("numeric", "all"):
+        if series not in ("numeric", "all"):
             rows.append((label, ref, title, status, date, area, impacted, tags))
         else:
             rows.append((label, ref, title, status, date, area, tags))
 
-    if args.series not in ("numeric", "all"):
+    if series not in ("numeric", "all"):
         lines = [
-            f"# {args.series} ADR Index",
+            f"# {series} ADR Index",
             "",
             "| ADR | Title | Status | Date | Area | Impacted repos | Tags |",
             "|---:|---|---|---|---|---|---|",
@@ -188,11 +354,206 @@ def cmd_reindex(args):
         for _label, ref, t, s, d, ar, tg in rows:
             lines.append(f"| {ref} | {t} | {s} | {d} | {ar} | {tg} |")
 
+    return "\n".join(lines) + "\n", len(rows)
+
+
+def cmd_reindex(args):
+    # --check is read-only: it may use the cache but never rewrites it
+    text, count = render_index(
+        args.series, None if args.no_cache else META_CACHE, update_cache=not args.check
+    )
+
+    current = None
+    if os.path.exists(INDEX):
+        with open(INDEX, encoding="utf-8") as f:
+            current = f.read()
+
+    if args.check:
+        if current == text:
+            print(f"{os.path.relpath(INDEX, ROOT)} is up to date ({count} ADRs)")
+            return 0
+        print(
+            f"{os.path.relpath(INDEX, ROOT)} is stale. "
+            f"Run: python scripts/adr_tools.py reindex --series {args.series}"
+        )
+        return 1
+
+    if current == text:
+        print(f"{os.path.relpath(INDEX, ROOT)} already up to date with {count} ADRs")
+        return 0
+
     os.makedirs(ADR_DIR, exist_ok=True)
     with open(INDEX, "w", encoding="utf-8", newline="\n") as f:
-        f.write("\n".join(lines) + "\n")
+        f.write(text)
 
-    print(f"Updated {os.path.relpath(INDEX, ROOT)} with {len(rows)} ADRs")
+    print(f"Updated {os.path.relpath(INDEX, ROOT)} with {count} ADRs")
+    return 0
+
+
+def _repo_head(repo_path):
+    result = subprocess.run(
+        ["git", "rev-parse", "HEAD"], cwd=repo_path, capture_output=True, text=True, check=False
+    )
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def scan_dep_repo(repo_path, cached=None):
+    """
+    Return (entry, rescanned) for the local ADRs of one bootstrapped dep repo.
+
+    entry is {"head": sha, "adrs": [{"id", "file", "meta"}, ...]}. The cached entry is
+    reused as-is when the repo is still at the same HEAD, so unchanged repos cost one
+    `git rev-parse` and no file reads.
+    """
+    head = _repo_head(repo_path)
+    if cached and head and cached.get("head") == head:
+        return cached, False
+
+    adrs = []
+    adr_dir = os.path.join(repo_path, "docs", "adr")
+    for p, prefix, n in sorted(iter_adr_files("all", adr_dir), key=lambda t: ((t[1] or "ADR"), t[2])):
+        adrs.append(
+            {
+                "id": f"{prefix or 'ADR'}-{n:04d}",
+                "file": os.path.basename(p),
+                "meta": dataclasses.asdict(read_adr(p)),
+            }
+        )
+    return {"head": head, "adrs": adrs}, True
+
+
+def load_dep_adrs(deps_dir=None, cache_path=AGGREGATE_CACHE, jobs=AGGREGATE_JOBS):
+    """
+    Scan every bootstrapped deps/<repo>/docs/adr concurrently.
+
+    Returns ({repo: entry}, [rescanned repo names]). Only repos whose HEAD moved since
+    the cached scan are re-read. Pass cache_path=None to rescan everything.
+    """
+    deps_dir = deps_dir or DEPS_DIR
+    repos = sorted(
+        name
+        for name in (os.listdir(deps_dir) if os.path.isdir(deps_dir) else [])
+        if os.path.exists(os.path.join(deps_dir, name, ".git"))
+    )
+
+    cached = {}
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                loaded = json.load(f)
+            if loaded.get("version") == META_CACHE_VERSION:
+                cached = loaded["repos"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    results = {}
+    rescanned = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {
+            name: pool.submit(scan_dep_repo, os.path.join(deps_dir, name), cached.get(name))
+            for name in repos
+        }
+        for name in repos:
+            results[name], fresh = futures[name].result()
+            if fresh:
+                rescanned.append(name)
+
+    if cache_path and (rescanned or results.keys() != cached.keys()):
+        payload = {"version": META_CACHE_VERSION, "repos": results}
+        _write_atomic(cache_path, json.dumps(payload, indent=1, sort_keys=True))
+    return results, rescanned
+
+
+def render_adoption(eco_metadata, dep_adrs):
+    """
+    Return the consolidated adoption index as markdown.
+
+    eco_metadata is [(label, filename, AdrRecord)] for this repo's ECO ADRs and
+    dep_adrs the output of load_dep_adrs(). A cell lists the local ADRs that
+    reference the ECO ADR, "missing" when the ECO ADR names the repo as impacted
+    but no local ADR adopts it, and "-" otherwise.
+    """
+    repos = sorted(dep_adrs)
+    adopters = {}
+    for repo in repos:
+        for adr in dep_adrs[repo]["adrs"]:
+            status = _clean(adr["meta"].get("status", "")) or "no status"
+            for eco_id in adr["meta"].get("related", []):
+                adopters.setdefault((eco_id, repo), []).append(f"{adr['id']} ({status})")
+
+    lines = [
+        "# ECO ADR adoption",
+        "",
+        "Generated by `python scripts/adr_tools.py aggregate` from `deps/*/docs/adr/`.",
+        "",
+    ]
+    if not repos:
+        lines.append("No bootstrapped repos under `deps/`. Run `python tools/bootstrap.py` first.")
+        return "\n".join(lines) + "\n"
+
+    lines += [
+        "| ECO ADR | Title | Status | " + " | ".join(repos) + " |",
+        "|---|---|---|" + "---|" * len(repos),
+    ]
+    for label, base, record in eco_metadata:
+        cells = []
+        for repo in repos:
+            local = adopters.get((label, repo))
+            if local:
+                cells.append(", ".join(local))
+            elif repo in record.impacted_repos:
+                cells.append("missing")
+            else:
+                cells.append("-")
+        lines.append(
+            f"| [{label}]({base}) | {record.title or base} | {record.status} | " + " | ".join(cells) + " |"
+        )
+
+    lines += ["", "## Local ADRs", ""]
+    for repo in repos:
+        entry = dep_adrs[repo]
+        head = (entry["head"] or "unknown")[:12]
+        lines += [f"### {repo} (`{head}`)", ""]
+        if not entry["adrs"]:
+            lines += ["No local ADRs.", ""]
+            continue
+        lines += ["| ADR | Title | Status | Date | Adopts |", "|---|---|---|---|---|"]
+        for adr in entry["adrs"]:
+            meta = adr["meta"]
+            adopts = ", ".join(i for i in meta.get("related", []) if i.startswith("ECO-")) or "-"
+            lines.append(
+                f"| {adr['id']} | {meta.get('title') or adr['file']} | {meta.get('status', '')} "
+                f"| {meta.get('date', '')} | {adopts} |"
+            )
+        lines.append("")
+
+    return "\n".join(lines).rstrip("\n") + "\n"
+
+
+def cmd_aggregate(args):
+    eco = sorted(iter_adr_files("ECO"), key=lambda t: t[2])
+    metadata = load_metadata([p for p, _prefix, _n in eco], None if args.no_cache else META_CACHE)
+    eco_metadata = [(f"ECO-{n:04d}", os.path.basename(p), metadata[p]) for p, _prefix, n in eco]
+
+    dep_adrs, rescanned = load_dep_adrs(
+        cache_path=None if args.no_cache else AGGREGATE_CACHE, jobs=args.jobs
+    )
+    text = render_adoption(eco_metadata, dep_adrs)
+    print(f"Scanned {len(dep_adrs)} dep repos ({len(rescanned)} rescanned)", file=sys.stderr)
+
+    if args.output == "-":
+        sys.stdout.write(text)
+        return 0
+
+    out = os.path.abspath(args.output)
+    if os.path.exists(out):
+        with open(out, encoding="utf-8") as f:
+            if f.read() == text:
+                print(f"{os.path.relpath(out, ROOT)} already up to date")
+                return 0
+    _write_atomic(out, text)
+    print(f"Updated {os.path.relpath(out, ROOT)}")
+    return 0
 
 
 if __name__ == "__main__":
@@ -218,7 +579,37 @@ if __name__ == "__main__":
         default="numeric",
         help='Which ADR series to index: "numeric", "ECO", "INT", or "all".',
     )
+    pre.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit 1 if INDEX.md differs from the rendered index instead of rewriting it.",
+    )
+    pre.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Re-parse every ADR instead of using {os.path.relpath(META_CACHE, ROOT)}.",
+    )
     pre.set_defaults(func=cmd_reindex)
 
+    pagg = sub.add_parser("aggregate")
+    pagg.add_argument(
+        "--output",
+        default=AGGREGATE_OUT,
+        help=f'Where to write the adoption index (default: {os.path.relpath(AGGREGATE_OUT, ROOT)}; "-" for stdout).',
+    )
+    pagg.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=AGGREGATE_JOBS,
+        help="Number of dep repos to scan concurrently (default: $ADR_AGGREGATE_JOBS or 8).",
+    )
+    pagg.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Rescan every dep repo instead of using {os.path.relpath(AGGREGATE_CACHE, ROOT)}.",
+    )
+    pagg.set_defaults(func=cmd_aggregate)
+
     args = ap.parse_args()
-    args.func(args)
+    sys.exit(args.func(args))
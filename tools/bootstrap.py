@@ -1,13 +1,22 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import argparse
+import json
 import os
+import re
+import shutil
 import subprocess
 import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from urllib.parse import quote, urlparse, urlunparse
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator, Mapping
 
 # Python 3.11+: tomllib
 # Python <=3.10: use tomli (already commonly installed via pytest deps)
@@ -18,6 +27,10 @@ except ModuleNotFoundError:
     import tomli  # type: ignore[import-not-found]
     _toml_loads = tomli.loads
 
+try:
+    from tools.git_objects import NO_LAZY_FETCH_ENV
+except ModuleNotFoundError:  # run as a script: tools/ is on sys.path
+    from git_objects import NO_LAZY_FETCH_ENV
 
 ROOT = Path(__file__).resolve().parents[1]
 MANIFEST = ROOT / "manifest" / "repos.toml"
@@ -44,6 +57,24 @@ PUSH_TOKEN_ENV_VARS = (
     "GH_TOKEN_2",
 )
 CONFIGURE_PUSH_URL = os.environ.get("BOOTSTRAP_CONFIGURE_PUSH_URL", "1") == "1"
+DEFAULT_JOBS = int(os.environ.get("BOOTSTRAP_JOBS", "1"))  # >1 runs repos concurrently
+USE_FAST_PATH = os.environ.get("BOOTSTRAP_FAST_PATH", "1") == "1"  # ls-remote first, skip up-to-date repos
+LS_REMOTE_TIMEOUT_S = int(os.environ.get("BOOTSTRAP_LS_REMOTE_TIMEOUT_S", "60"))
+USE_MIRROR_CACHE = os.environ.get("BOOTSTRAP_MIRROR_CACHE", "0") == "1"  # borrow objects from local mirrors
+MIRROR_DIR = Path(
+    os.environ.get("BOOTSTRAP_MIRROR_DIR", str(Path.home() / ".cache" / "cpa-architecture" / "mirrors"))
+).expanduser()
+# Copy borrowed objects into each clone so evicting a mirror never breaks deps/<name>
+MIRROR_DISSOCIATE = os.environ.get("BOOTSTRAP_MIRROR_DISSOCIATE", "1") == "1"
+
+# Per-thread log buffer; set while a repo runs in the worker pool so its output stays grouped.
+# Also carries the current repo/phase labels for timing spans.
+_LOG_STATE = threading.local()
+
+# e.g. "Receiving objects: 100% (120/120), 1.52 MiB | 3.10 MiB/s, done."
+_RECEIVED_RE = re.compile(r"Receiving objects:.*?,\s*([0-9.]+)\s*(bytes|KiB|MiB|GiB)")
+_PROGRESS_RE = re.compile(r"^(?P<label>(?:remote: )?[A-Za-z ]+:)\s+\d+% ")
+_SIZE_UNITS = {"bytes": 1, "KiB": 1024, "MiB": 1024**2, "GiB": 1024**3}
 
 
 @dataclass(frozen=True)
@@ -51,9 +82,154 @@ class RepoSpec:
     name: str
     url: str
     ref: str = "main"
+    sparse: tuple[str, ...] = ()  # cone-mode sparse-checkout directories; empty = full tree
+
+
+@dataclass(frozen=True)
+class BootstrapOptions:
+    jobs: int = 1
+    mirror_dir: Path | None = None  # None disables the shared mirror cache
+    locked_shas: Mapping[str, str] | None = None  # refs.lock pins; None tracks branch tips
+    remote_heads: Mapping[str, str | None] | None = None  # ls-remote results for the no-op fast path
+    lock_heads: Mapping[str, str] | None = None  # refs.lock as last written; the fast path requires a match
+
+
+@dataclass(frozen=True)
+class RefsLockEntry:
+    name: str
+    head_sha: str
+    ref: str | None = None  # checked-out branch, "HEAD" when detached; None in two-column locks
+    tree_sha: str | None = None
+    dirty: bool | None = None  # uncommitted or untracked changes in the worktree
+
+
+@dataclass(frozen=True)
+class Span:
+    repo: str
+    phase: str
+    cmd: list[str]
+    start_s: float  # seconds since the tracer was reset
+    duration_s: float
+    exit_code: int | None  # None = timed out
+    bytes_received: int | None  # from git progress output, when reported
+    thread: str
+
+
+class Tracer:
+    """Thread-safe collector of git subprocess timing spans for one bootstrap run."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.spans: list[Span] = []
+        self.capture_progress = False
+        self.origin = time.perf_counter()
+
+    def reset(self, *, capture_progress: bool = False) -> None:
+        with self._lock:
+            self.spans = []
+            self.capture_progress = capture_progress
+            self.origin = time.perf_counter()
+
+    def record(
+        self,
+        cmd: list[str],
+        start: float,
+        exit_code: int | None,
+        output: str = "",
+    ) -> None:
+        span = Span(
+            repo=getattr(_LOG_STATE, "repo", None) or "-",
+            phase=getattr(_LOG_STATE, "phase", None) or "setup",
+            cmd=list(cmd),
+            start_s=start - self.origin,
+            duration_s=time.perf_counter() - start,
+            exit_code=exit_code,
+            bytes_received=parse_bytes_received(output),
+            thread=threading.current_thread().name,
+        )
+        with self._lock:
+            self.spans.append(span)
+
+    def phase_totals(self) -> list[tuple[str, int, float, float, int]]:
+        """Rows of (phase, calls, total seconds, max seconds, bytes received)."""
+        totals: dict[str, list[float]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            row = totals.setdefault(span.phase, [0, 0.0, 0.0, 0])
+            row[0] += 1
+            row[1] += span.duration_s
+            row[2] = max(row[2], span.duration_s)
+            row[3] += span.bytes_received or 0
+        return sorted(
+            ((phase, int(r[0]), r[1], r[2], int(r[3])) for phase, r in totals.items()),
+            key=lambda row: row[2],
+            reverse=True,
+        )
+
+    def write(self, path: Path) -> None:
+        """Write spans as JSON lines (*.jsonl) or Chrome trace-event JSON (anything else)."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start_s)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == ".jsonl":
+            text = "".join(json.dumps(asdict(span)) + "\n" for span in spans)
+        else:
+            events = [
+                {
+                    "name": " ".join(span.cmd[:2]),
+                    "cat": span.phase,
+                    "ph": "X",
+                    "ts": round(span.start_s * 1e6),
+                    "dur": round(span.duration_s * 1e6),
+                    "pid": span.repo,
+                    "tid": span.thread,
+                    "args": {
+                        "cmd": " ".join(span.cmd),
+                        "exit_code": span.exit_code,
+                        "bytes_received": span.bytes_received,
+                    },
+                }
+                for span in spans
+            ]
+            text = json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, indent=1) + "\n"
+        path.write_text(text, encoding="utf-8")
+
+
+TRACER = Tracer()
+
+
+def parse_bytes_received(output: str) -> int | None:
+    matches = _RECEIVED_RE.findall(output)
+    if not matches:
+        return None
+    value, unit = matches[-1]
+    return int(float(value) * _SIZE_UNITS[unit])
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    previous = getattr(_LOG_STATE, "phase", None)
+    _LOG_STATE.phase = name
+    try:
+        yield
+    finally:
+        _LOG_STATE.phase = previous
+
+
+@dataclass(frozen=True)
+class MirrorInfo:
+    name: str
+    path: Path
+    size_bytes: int
+    last_used: float
 
 
 def log(msg: str) -> None:
+    buffer = getattr(_LOG_STATE, "buffer", None)
+    if buffer is not None:
+        buffer.append(msg)
+        return
     print(msg, flush=True)
 
 
@@ -66,14 +242,91 @@ def run(
     log_cmd: list[str] | None = None,
 ) -> None:
     where = f" (cwd={cwd})" if cwd else ""
-    log(f"+ {' '.join(log_cmd or cmd)}{where}")
-    subprocess.run(
-        cmd,
-        cwd=str(cwd) if cwd else None,
-        check=True,
-        timeout=timeout_s,
-        env=env,
-    )
+    shown = log_cmd or cmd
+    log(f"+ {' '.join(shown)}{where}")
+    start = time.perf_counter()
+
+    if getattr(_LOG_STATE, "buffer", None) is None and not TRACER.capture_progress:
+        try:
+            subprocess.run(
+                cmd,
+                cwd=str(cwd) if cwd else None,
+                check=True,
+                timeout=timeout_s,
+                env=env,
+            )
+        except subprocess.TimeoutExpired:
+            TRACER.record(shown, start, None)
+            raise
+        except subprocess.CalledProcessError as e:
+            TRACER.record(shown, start, e.returncode)
+            raise
+        TRACER.record(shown, start, 0)
+        return
+
+    # Buffered (parallel) or tracing mode: capture git output so it lands in this repo's
+    # log group; with tracing, ask clone/fetch for progress so transfer sizes are reported
+    if TRACER.capture_progress and cmd[:1] == ["git"] and cmd[1:2] in (["clone"], ["fetch"]):
+        cmd = [*cmd[:2], "--progress", *cmd[2:]]
+    try:
+        result = subprocess.run(
+            cmd,
+            cwd=str(cwd) if cwd else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            timeout=timeout_s,
+            env=env,
+            check=False,
+        )
+    except subprocess.TimeoutExpired:
+        TRACER.record(shown, start, None)
+        raise
+    TRACER.record(shown, start, result.returncode, result.stdout)
+    for line in collapse_progress(result.stdout.splitlines()):
+        log(line)
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, result.args, output=result.stdout)
+
+
+def collapse_progress(lines: list[str]) -> list[str]:
+    """Keep only the final redraw of each git progress meter (text mode turns \\r into \\n)."""
+    kept: list[str] = []
+    for line in lines:
+        match = _PROGRESS_RE.match(line)
+        if match and kept and kept[-1].startswith(match.group("label")):
+            kept[-1] = line
+        else:
+            kept.append(line)
+    return kept
+
+
+def git_capture(
+    args: list[str],
+    *,
+    cwd: Path | None = None,
+    timeout_s: int | None = None,
+    env: Mapping[str, str] | None = None,
+) -> subprocess.CompletedProcess[str]:
+    """Run a read-only git query quietly (stdout captured, stderr dropped) under a timing span."""
+    cmd = ["git", *args]
+    start = time.perf_counter()
+    try:
+        result = subprocess.run(
+            cmd,
+            cwd=str(cwd) if cwd else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            timeout=timeout_s,
+            env=env if env is not None else _GIT_ENV,
+            check=False,
+        )
+    except subprocess.TimeoutExpired:
+        TRACER.record(cmd, start, None)
+        raise
+    TRACER.record(cmd, start, result.returncode)
+    return result
 
 
 def resolve_push_token() -> str | None:
@@ -131,7 +384,12 @@ def load_manifest() -> list[RepoSpec]:
         name = str(r["name"])
         url = str(r["url"])
         ref = str(r.get("ref", "main"))
-        specs.append(RepoSpec(name=name, url=url, ref=ref))
+        sparse = r.get("sparse", [])
+        if not isinstance(sparse, list) or not all(isinstance(p, str) and p.strip("/") for p in sparse):
+            raise ValueError(f"Invalid [[repo]] entry (sparse must be a list of paths): {r!r}")
+        specs.append(
+            RepoSpec(name=name, url=url, ref=ref, sparse=tuple(p.strip("/") for p in sparse))
+        )
     return specs
 
 
@@ -148,42 +406,210 @@ def has_submodules(path: Path) -> bool:
 
 
 def is_dirty_repo(path: Path) -> bool:
-    result = subprocess.run(
-        ["git", "status", "--porcelain"],
-        cwd=str(path),
-        stdout=subprocess.PIPE,
-        text=True,
-        env=_GIT_ENV,
-        check=False,
-    )
+    result = git_capture(["status", "--porcelain"], cwd=path)
     return bool(result.stdout.strip())
 
 
-def clone_repo(spec: RepoSpec) -> None:
+def mirror_path(mirror_dir: Path, spec: RepoSpec) -> Path:
+    return mirror_dir / f"{spec.name}.git"
+
+
+def refresh_mirror(spec: RepoSpec, mirror_dir: Path) -> Path | None:
+    """Create or incrementally update the bare mirror for spec; returns None if unusable."""
+    path = mirror_path(mirror_dir, spec)
+    try:
+        if not (path / "HEAD").exists():
+            mirror_dir.mkdir(parents=True, exist_ok=True)
+            run(["git", "clone", "--mirror", spec.url, str(path)], env=_GIT_ENV)
+        else:
+            run(["git", "remote", "set-url", "origin", spec.url], cwd=path, env=_GIT_ENV)
+            run(["git", "fetch", "--prune", "origin"], cwd=path, timeout_s=DEFAULT_TIMEOUT_S, env=_GIT_ENV)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        # A stale mirror still saves most of the transfer; a missing one is simply skipped
+        log(f"WARNING: mirror refresh failed for {spec.name}: {e}")
+        if not (path / "HEAD").exists():
+            return None
+
+    # mtime doubles as the LRU timestamp for eviction
+    os.utime(path)
+    return path
+
+
+def dir_size(path: Path) -> int:
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += (Path(root) / name).lstat().st_size
+            except OSError:
+                continue
+    return total
+
+
+def list_mirrors(mirror_dir: Path) -> list[MirrorInfo]:
+    if not mirror_dir.exists():
+        return []
+    mirrors = [
+        MirrorInfo(
+            name=path.name[: -len(".git")],
+            path=path,
+            size_bytes=dir_size(path),
+            last_used=path.stat().st_mtime,
+        )
+        for path in mirror_dir.glob("*.git")
+        if path.is_dir()
+    ]
+    return sorted(mirrors, key=lambda m: m.name)
+
+
+def gc_mirrors(mirror_dir: Path) -> None:
+    for mirror in list_mirrors(mirror_dir):
+        last_used = mirror.last_used
+        run(["git", "gc", "--prune=now", "--quiet"], cwd=mirror.path, env=_GIT_ENV)
+        # gc must not count as a use
+        os.utime(mirror.path, (last_used, last_used))
+
+
+def evict_mirrors(mirror_dir: Path, max_bytes: int) -> list[MirrorInfo]:
+    """Delete least-recently-used mirrors until the cache fits in max_bytes."""
+    mirrors = list_mirrors(mirror_dir)
+    total = sum(m.size_bytes for m in mirrors)
+    evicted: list[MirrorInfo] = []
+    for mirror in sorted(mirrors, key=lambda m: (m.last_used, m.name)):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(mirror.path)
+        total -= mirror.size_bytes
+        evicted.append(mirror)
+    return evicted
+
+
+def format_size(num_bytes: int) -> str:
+    if num_bytes < 1024:
+        return f"{num_bytes} B"
+    size = num_bytes / 1024
+    for unit in ("KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def report_mirrors(mirror_dir: Path) -> None:
+    mirrors = list_mirrors(mirror_dir)
+    log(f"Mirror cache: {mirror_dir}")
+    for mirror in mirrors:
+        log(f"  {mirror.name:<24} {format_size(mirror.size_bytes):>12}")
+    log(f"  {'total':<24} {format_size(sum(m.size_bytes for m in mirrors)):>12} ({len(mirrors)} mirrors)")
+
+
+def clone_repo(spec: RepoSpec, mirror: Path | None = None) -> None:
     dest = repo_dir(spec)
     DEPS_DIR.mkdir(parents=True, exist_ok=True)
 
     cmd: list[str] = ["git", "clone"]
 
-    # Partial clone speeds things up; can be disabled if it causes trouble
-    if USE_PARTIAL_CLONE:
+    if mirror is not None:
+        # Objects come from the local mirror; only negotiation goes over the network
+        cmd += ["--reference-if-able", str(mirror)]
+        if MIRROR_DISSOCIATE:
+            cmd += ["--dissociate"]
+    elif USE_PARTIAL_CLONE:
+        # Partial clone speeds things up; can be disabled if it causes trouble
         cmd += ["--filter=blob:none"]
 
     # Depth=1 for speed; set BOOTSTRAP_CLONE_DEPTH=0 for full history
     if CLONE_DEPTH != "0":
         cmd += ["--depth", CLONE_DEPTH]
 
+    # Sparse profile: initial checkout holds only root files; the cone is added afterwards
+    if spec.sparse:
+        cmd += ["--sparse"]
+
     # Single branch checkout for the requested ref
     cmd += ["--single-branch", "--branch", spec.ref, spec.url, str(dest)]
     run(cmd, timeout_s=DEFAULT_TIMEOUT_S, env=_GIT_ENV)
 
 
-def update_repo(spec: RepoSpec) -> None:
+def git_output(path: Path, args: list[str]) -> str:
+    result = git_capture(args, cwd=path)
+    return result.stdout.strip() if result.returncode == 0 else ""
+
+
+def sparse_cone_dirs(spec: RepoSpec, path: Path, commit: str) -> list[str]:
+    """Map manifest sparse entries to cone directories.
+
+    Cone mode always includes root-level files, so entries such as "pyproject.toml"
+    are satisfied without being passed to `git sparse-checkout set`. A nested file
+    such as "src/pkg/mod.py" can't be a cone on its own, so its parent directory is
+    used instead (which also checks out its siblings).
+    """
+    listing = git_output(path, ["ls-tree", commit, "--", *spec.sparse])
+    files = {
+        line.split("\t", 1)[1]
+        for line in listing.splitlines()
+        if "\t" in line and line.split()[1] == "blob"
+    }
+    dirs: list[str] = []
+    for entry in spec.sparse:
+        if entry in files:
+            if "/" not in entry:
+                continue
+            entry = entry.rsplit("/", 1)[0]
+        if entry not in dirs:
+            dirs.append(entry)
+    return dirs
+
+
+def sparse_checkout_matches(spec: RepoSpec, commit: str = "HEAD") -> bool:
+    """True if deps/<name> already uses the manifest sparse profile as resolved at commit."""
+    dest = repo_dir(spec)
+    enabled = git_output(dest, ["config", "--bool", "core.sparseCheckout"]) == "true"
+    if not spec.sparse:
+        return not enabled
+    if not enabled or git_output(dest, ["config", "--bool", "core.sparseCheckoutCone"]) != "true":
+        return False
+    current = git_output(dest, ["sparse-checkout", "list"]).splitlines()
+    return sorted(current) == sorted(sparse_cone_dirs(spec, dest, commit))
+
+
+def configure_sparse_checkout(spec: RepoSpec, commit: str = "HEAD") -> None:
+    """Bring deps/<name> in line with the manifest sparse profile (no-op when already matching).
+
+    Changing the profile rewrites the worktree, so callers run this only where they
+    would reset anyway (after the PRESERVE_LOCAL/dirty check), passing the commit
+    they are about to check out.
+    """
+    if sparse_checkout_matches(spec, commit):
+        return
+    dest = repo_dir(spec)
+    if not spec.sparse:
+        run(["git", "sparse-checkout", "disable"], cwd=dest, timeout_s=DEFAULT_TIMEOUT_S, env=_GIT_ENV)
+        return
+
+    # With --filter=blob:none only blobs inside the cone are ever fetched
+    run(
+        ["git", "sparse-checkout", "set", "--cone", *sparse_cone_dirs(spec, dest, commit)],
+        cwd=dest,
+        timeout_s=DEFAULT_TIMEOUT_S,
+        env=_GIT_ENV,
+    )
+
+
+def update_repo(spec: RepoSpec, mirror: Path | None = None) -> None:
     dest = repo_dir(spec)
 
     # Keep origin URL correct in case you changed it in repos.toml
     run(["git", "remote", "set-url", "origin", spec.url], cwd=dest, env=_GIT_ENV)
 
+    if mirror is not None:
+        # Pre-seed origin/<ref> from disk so the network fetch below has nothing left to transfer
+        seed_cmd = ["git", "fetch", "--no-tags"]
+        if CLONE_DEPTH != "0":
+            seed_cmd += ["--depth", CLONE_DEPTH]
+        seed_cmd += [str(mirror), f"+refs/heads/{spec.ref}:refs/remotes/origin/{spec.ref}"]
+        run(seed_cmd, cwd=dest, timeout_s=DEFAULT_TIMEOUT_S, env=_GIT_ENV)
+
     # Fetch latest for the branch (depth-limited if requested)
     fetch_cmd = ["git", "fetch", "--prune"]
     if CLONE_DEPTH != "0":
@@ -195,11 +621,167 @@ def update_repo(spec: RepoSpec) -> None:
         log(f"Skipping reset/clean for {spec.name} (preserve local work).")
         return
 
-    # Hard reset to origin/<ref> so repeated runs are deterministic
-    run(["git", "reset", "--hard", f"origin/{spec.ref}"], cwd=dest, env=_GIT_ENV)
+    # Narrow the checkout first so the reset below only materializes the sparse cone
+    with phase("sparse"):
+        configure_sparse_checkout(spec, commit=f"origin/{spec.ref}")
+
+    with phase("reset"):
+        # Hard reset to origin/<ref> so repeated runs are deterministic
+        run(["git", "reset", "--hard", f"origin/{spec.ref}"], cwd=dest, env=_GIT_ENV)
+
+        # Remove untracked files from previous runs (keeps workspace clean)
+        run(["git", "clean", "-ffd"], cwd=dest, env=_GIT_ENV)
+
+
+def read_refs_lock_entries(path: Path) -> dict[str, RefsLockEntry]:
+    if not path.exists():
+        raise FileNotFoundError(f"Missing refs lockfile: {path}")
+
+    entries: dict[str, RefsLockEntry] = {}
+    for lineno, raw in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1):
+        line = raw.split("#", 1)[0].strip()
+        if not line:
+            continue
+        parts = line.split()
+        if len(parts) == 2:
+            entries[parts[0]] = RefsLockEntry(parts[0], parts[1])
+        elif len(parts) == 5 and parts[4] in ("clean", "dirty"):
+            name, sha, ref, tree, state = parts
+            entries[name] = RefsLockEntry(name, sha, ref, tree, state == "dirty")
+        else:
+            raise ValueError(
+                f"{path}:{lineno}: expected '<repo> <head_sha> [<ref> <tree_sha> <clean|dirty>]', got {raw!r}"
+            )
+    return entries
+
+
+def read_refs_lock(path: Path) -> dict[str, str]:
+    return {name: entry.head_sha for name, entry in read_refs_lock_entries(path).items()}
+
+
+def try_fetch_sha(dest: Path, source: str, sha: str) -> bool:
+    cmd = ["git", "fetch", "--no-tags"]
+    if USE_PARTIAL_CLONE and source == "origin":
+        cmd += ["--filter=blob:none"]
+    if CLONE_DEPTH != "0":
+        cmd += ["--depth", CLONE_DEPTH]
+    cmd += [source, sha]
+    try:
+        run(cmd, cwd=dest, timeout_s=DEFAULT_TIMEOUT_S, env=_GIT_ENV)
+    except subprocess.CalledProcessError:
+        return False
+    return has_commit(dest, sha)
+
+
+def has_commit(path: Path, sha: str) -> bool:
+    """True if sha is already in path; never fetches, even from a partial clone's promisor."""
+    env = {**_GIT_ENV, **NO_LAZY_FETCH_ENV}
+    result = git_capture(["cat-file", "-e", f"{sha}^{{commit}}"], cwd=path, env=env)
+    return result.returncode == 0
+
+
+def current_head(path: Path) -> str | None:
+    try:
+        return head_sha(path)
+    except subprocess.CalledProcessError:
+        return None
+
+
+def ensure_locked_repo(spec: RepoSpec, sha: str, mirror_dir: Path | None = None) -> str:
+    """Materialize deps/<name> at exactly the refs.lock SHA, fetching only that commit.
+
+    Returns the run outcome: "cloned", "updated" or "unchanged".
+    """
+    dest = repo_dir(spec)
+    log(f"LOCK: {sha}")
+
+    if is_git_repo(dest):
+        outcome = "updated"
+        run(["git", "remote", "set-url", "origin", spec.url], cwd=dest, env=_GIT_ENV)
+    else:
+        outcome = "cloned"
+        dest.mkdir(parents=True, exist_ok=True)
+        run(["git", "init", "--quiet"], cwd=dest, env=_GIT_ENV)
+        run(["git", "remote", "add", "origin", spec.url], cwd=dest, env=_GIT_ENV)
+
+    if current_head(dest) == sha:
+        outcome = "unchanged"
+        log(f"{spec.name} already at locked SHA; skipping fetch.")
+    elif not has_commit(dest, sha):
+        mirror = refresh_mirror(spec, mirror_dir) if mirror_dir else None
+        fetched = mirror is not None and try_fetch_sha(dest, str(mirror), sha)
+        if not fetched:
+            fetched = try_fetch_sha(dest, "origin", sha)
+        if not fetched:
+            # Servers without uploadpack.allowReachableSHA1InWant refuse want-by-SHA for non-tips
+            log(
+                f"Server refused fetch by SHA for {spec.name}; "
+                f"falling back to full history of origin/{spec.ref}."
+            )
+            fallback = ["git", "fetch", "--no-tags"]
+            if (dest / ".git" / "shallow").exists():
+                fallback += ["--unshallow"]
+            fallback += ["origin", f"+refs/heads/{spec.ref}:refs/remotes/origin/{spec.ref}"]
+            run(fallback, cwd=dest, timeout_s=DEFAULT_TIMEOUT_S, env=_GIT_ENV)
+            if not has_commit(dest, sha):
+                raise RuntimeError(
+                    f"Locked SHA {sha} for {spec.name} is not reachable from origin/{spec.ref}. "
+                    "Regenerate manifest/refs.lock (python tools/update_refs.py) or bootstrap without --locked."
+                )
+
+    if PRESERVE_LOCAL or is_dirty_repo(dest):
+        if current_head(dest) != sha:
+            raise RuntimeError(
+                f"{spec.name} has local work and is not at locked SHA {sha}; "
+                "commit/stash it or disable BOOTSTRAP_PRESERVE_LOCAL."
+            )
+        log(f"Skipping reset/clean for {spec.name} (preserve local work).")
+        return outcome
+
+    with phase("sparse"):
+        configure_sparse_checkout(spec, commit=sha)
+
+    with phase("reset"):
+        # Keep the configured branch name, pinned to the locked commit
+        run(["git", "checkout", "--quiet", "--force", "-B", spec.ref, sha], cwd=dest, env=_GIT_ENV)
+        run(["git", "clean", "-ffd"], cwd=dest, env=_GIT_ENV)
+    return outcome
+
+
+def ls_remote_head(spec: RepoSpec) -> str | None:
+    """Resolve refs/heads/<ref> on the remote with a single round trip; None if unavailable."""
+    _LOG_STATE.repo = spec.name
+    try:
+        with phase("ls-remote"):
+            result = git_capture(["ls-remote", spec.url, f"refs/heads/{spec.ref}"], timeout_s=LS_REMOTE_TIMEOUT_S)
+    except subprocess.TimeoutExpired:
+        return None
+    finally:
+        _LOG_STATE.repo = None
+    if result.returncode != 0:
+        return None
+    for line in result.stdout.splitlines():
+        sha, _, name = line.partition("\t")
+        if name == f"refs/heads/{spec.ref}":
+            return sha
+    return None
 
-    # Remove untracked files from previous runs (keeps workspace clean)
-    run(["git", "clean", "-ffd"], cwd=dest, env=_GIT_ENV)
+
+def resolve_remote_heads(specs: list[RepoSpec]) -> dict[str, str | None]:
+    """Run ls-remote for every spec concurrently (network latency bound, not CPU)."""
+    if not specs:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(16, len(specs)), thread_name_prefix="ls-remote") as pool:
+        heads = list(pool.map(ls_remote_head, specs))
+    return {spec.name: sha for spec, sha in zip(specs, heads)}
+
+
+def submodules_in_sync(path: Path) -> bool:
+    if not has_submodules(path):
+        return True
+    result = git_capture(["submodule", "status", "--recursive"], cwd=path)
+    # Leading '-' = not initialized, '+' = checked out at the wrong commit, 'U' = conflicts
+    return result.returncode == 0 and all(line.startswith(" ") for line in result.stdout.splitlines())
 
 
 def update_submodules_if_any(spec: RepoSpec) -> None:
@@ -216,85 +798,353 @@ def update_submodules_if_any(spec: RepoSpec) -> None:
     run(cmd, cwd=dest, timeout_s=DEFAULT_TIMEOUT_S, env=_GIT_ENV)
 
 
-def ensure_repo(spec: RepoSpec) -> None:
+def ensure_repo(spec: RepoSpec, options: BootstrapOptions = BootstrapOptions()) -> str:
+    """Clone or update one repo; returns the outcome: "cloned", "updated" or "unchanged"."""
     dest = repo_dir(spec)
     log(f"\n=== {spec.name} @ {spec.ref} ===")
     log(f"URL : {spec.url}")
     log(f"DEST: {dest}")
 
-    if not is_git_repo(dest):
-        clone_repo(spec)
-    else:
-        update_repo(spec)
+    _LOG_STATE.repo = spec.name
+    try:
+        outcome = materialize_repo(spec, options)
 
-    configure_push_url(spec)
-    update_submodules_if_any(spec)
+        with phase("push-url"):
+            configure_push_url(spec)
+        with phase("submodules"):
+            if outcome != "unchanged" or not submodules_in_sync(dest):
+                update_submodules_if_any(spec)
+    finally:
+        _LOG_STATE.repo = None
+
+    log(f"Outcome: {outcome}")
     log(f"=== OK {spec.name} ===")
+    return outcome
+
+
+def materialize_repo(spec: RepoSpec, options: BootstrapOptions) -> str:
+    dest = repo_dir(spec)
+    remote_sha = (options.remote_heads or {}).get(spec.name)
+
+    if options.locked_shas is not None:
+        sha = options.locked_shas.get(spec.name)
+        if not sha:
+            raise RuntimeError(f"{spec.name} has no entry in {REFS_LOCK}; run python tools/update_refs.py")
+        with phase("fetch"):
+            return ensure_locked_repo(spec, sha, options.mirror_dir)
+
+    with phase("status"):
+        # refs.lock must agree too, so an "unchanged" repo never leaves the lock to be rewritten
+        at_tip = (
+            bool(remote_sha)
+            and (options.lock_heads or {}).get(spec.name) == remote_sha
+            and is_git_repo(dest)
+            and current_head(dest) == remote_sha
+            and sparse_checkout_matches(spec)
+        )
+    if at_tip:
+        # Already at the remote tip with the manifest's sparse profile: fetch/reset/clean
+        # would not change anything
+        with phase("fetch"):
+            run(["git", "remote", "set-url", "origin", spec.url], cwd=dest, env=_GIT_ENV)
+        log(f"{spec.name} already at origin/{spec.ref} ({remote_sha[:12]}); skipping fetch/reset/clean.")
+        return "unchanged"
+
+    with phase("mirror"):
+        mirror = refresh_mirror(spec, options.mirror_dir) if options.mirror_dir else None
+    if not is_git_repo(dest):
+        with phase("clone"):
+            clone_repo(spec, mirror)
+        with phase("sparse"):
+            configure_sparse_checkout(spec)
+        return "cloned"
+    with phase("fetch"):
+        update_repo(spec, mirror)
+    return "updated"
+
+
+def describe_failure(spec: RepoSpec, exc: Exception) -> str:
+    if isinstance(exc, subprocess.TimeoutExpired):
+        return f"{spec.name}: TIMEOUT running {' '.join(exc.cmd) if exc.cmd else 'git'}"
+    if isinstance(exc, subprocess.CalledProcessError):
+        return f"{spec.name}: FAILED (exit {exc.returncode}) running: {' '.join(exc.cmd)}"
+    return f"{spec.name}: ERROR {type(exc).__name__}: {exc}"
+
+
+def ensure_repo_buffered(
+    spec: RepoSpec, options: BootstrapOptions
+) -> tuple[list[str], str | None, str | None]:
+    """Run ensure_repo with log output captured; returns (log lines, outcome, failure)."""
+    _LOG_STATE.buffer = []
+    outcome: str | None = None
+    failure: str | None = None
+    try:
+        outcome = ensure_repo(spec, options)
+    except Exception as e:
+        failure = describe_failure(spec, e)
+    finally:
+        lines = _LOG_STATE.buffer
+        _LOG_STATE.buffer = None
+    return lines, outcome, failure
+
+
+def ensure_repos(specs: list[RepoSpec], options: BootstrapOptions) -> tuple[dict[str, str], list[str]]:
+    """Materialize every spec in deterministic name order.
+
+    Returns ({repo name: outcome} for successful repos, failure messages).
+    """
+    ordered = sorted(specs, key=lambda s: s.name)
+    outcomes: dict[str, str] = {}
+    failures: list[str] = []
+
+    if options.jobs <= 1:
+        for spec in ordered:
+            try:
+                outcomes[spec.name] = ensure_repo(spec, options)
+            except Exception as e:
+                failures.append(describe_failure(spec, e))
+        return outcomes, failures
+
+    with ThreadPoolExecutor(max_workers=options.jobs, thread_name_prefix="bootstrap") as pool:
+        futures = [pool.submit(ensure_repo_buffered, spec, options) for spec in ordered]
+        # Emit each repo's log group in name order as soon as it (and its predecessors) finish
+        for spec, future in zip(ordered, futures):
+            lines, outcome, failure = future.result()
+            for line in lines:
+                log(line)
+            if outcome:
+                outcomes[spec.name] = outcome
+            if failure:
+                failures.append(failure)
+    return outcomes, failures
+
+
+def summarize_outcomes(outcomes: Mapping[str, str]) -> str:
+    counts = {key: 0 for key in ("cloned", "updated", "unchanged")}
+    for outcome in outcomes.values():
+        counts[outcome] = counts.get(outcome, 0) + 1
+    return ", ".join(f"{count} {key}" for key, count in counts.items())
 
 
 def head_sha(path: Path) -> str:
-    result = subprocess.run(
-        ["git", "rev-parse", "HEAD"],
-        cwd=str(path),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        env=_GIT_ENV,
-        check=True,
-    )
+    result = git_capture(["rev-parse", "HEAD"], cwd=path)
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, result.args, output=result.stdout)
     return result.stdout.strip()
 
 
-def write_refs_lock(specs: list[RepoSpec]) -> None:
-    lines = ["# Generated by tools/bootstrap.py", "# Format: <repo> <head_sha>"]
-    for spec in sorted(specs, key=lambda s: s.name):
-        sha = head_sha(repo_dir(spec))
-        lines.append(f"{spec.name} {sha}")
+def repo_lock_entry(name: str, path: Path) -> RefsLockEntry:
+    """HEAD, branch, tree and worktree state of one repo in two git calls."""
+    result = git_capture(["rev-parse", "HEAD", "HEAD^{tree}", "--symbolic-full-name", "HEAD"], cwd=path)
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, result.args, output=result.stdout)
+    sha, tree, ref = result.stdout.split()
+    status = git_capture(["status", "--porcelain", "--untracked-files=normal"], cwd=path)
+    if status.returncode != 0:
+        raise subprocess.CalledProcessError(status.returncode, status.args, output=status.stdout)
+    return RefsLockEntry(name, sha, ref.removeprefix("refs/heads/"), tree, bool(status.stdout.strip()))
+
+
+def collect_lock_entries(specs: list[RepoSpec]) -> list[RefsLockEntry]:
+    """Query every repo concurrently (process spawn bound, not CPU); sorted by name."""
+    specs = sorted(specs, key=lambda s: s.name)
+    if not specs:
+        return []
+
+    def query(spec: RepoSpec) -> RefsLockEntry:
+        _LOG_STATE.repo = spec.name
+        try:
+            with phase("lock"):
+                return repo_lock_entry(spec.name, repo_dir(spec))
+        finally:
+            _LOG_STATE.repo = None
+
+    with ThreadPoolExecutor(max_workers=min(16, len(specs)), thread_name_prefix="lock") as pool:
+        return list(pool.map(query, specs))
+
+
+def render_refs_lock(entries: list[RefsLockEntry]) -> str:
+    lines = [
+        "# Generated by tools/bootstrap.py or tools/update_refs.py",
+        "# Format: <repo> <head_sha> <ref> <tree_sha> <clean|dirty>",
+    ]
+    for e in entries:
+        lines.append(f"{e.name} {e.head_sha} {e.ref} {e.tree_sha} {'dirty' if e.dirty else 'clean'}")
+    return "\n".join(lines) + "\n"
+
+
+def write_refs_lock(specs: list[RepoSpec]) -> bool:
+    """Write REFS_LOCK atomically; returns False (and leaves the file untouched) if already current."""
+    text = render_refs_lock(collect_lock_entries(specs))
+    try:
+        if REFS_LOCK.read_text(encoding="utf-8") == text:
+            log(f"Refs lockfile already current: {REFS_LOCK}")
+            return False
+    except FileNotFoundError:
+        pass
 
     REFS_LOCK.parent.mkdir(parents=True, exist_ok=True)
-    REFS_LOCK.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    fd, tmp = tempfile.mkstemp(prefix=".refs.lock.", dir=REFS_LOCK.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+            f.write(text)
+        os.replace(tmp, REFS_LOCK)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
     log(f"Wrote refs lockfile: {REFS_LOCK}")
+    return True
 
 
-def main() -> int:
+def log_phase_summary() -> None:
+    rows = TRACER.phase_totals()
+    if not rows:
+        return
+    log("\n=== BOOTSTRAP TIMING BY PHASE ===")
+    log(f"{'phase':<12} {'calls':>5} {'total_s':>9} {'max_s':>8} {'received':>10}")
+    for name, calls, total_s, max_s, received in rows:
+        shown = format_size(received) if received else "-"
+        log(f"{name:<12} {calls:>5} {total_s:>9.2f} {max_s:>8.2f} {shown:>10}")
+
+
+def finish_trace(trace_path: Path | None) -> None:
+    log_phase_summary()
+    if trace_path is not None:
+        TRACER.write(trace_path)
+        log(f"Wrote trace: {trace_path}")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Clone/update manifest repos into deps/.")
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=DEFAULT_JOBS,
+        help="Number of repos to materialize concurrently (default: $BOOTSTRAP_JOBS or 1).",
+    )
+    parser.add_argument(
+        "--mirror-cache",
+        action="store_true",
+        default=USE_MIRROR_CACHE,
+        help="Borrow objects from bare mirrors in the shared cache (default: $BOOTSTRAP_MIRROR_CACHE).",
+    )
+    parser.add_argument(
+        "--mirror-dir",
+        type=Path,
+        default=MIRROR_DIR,
+        help="Mirror cache location (default: $BOOTSTRAP_MIRROR_DIR or ~/.cache/cpa-architecture/mirrors).",
+    )
+    parser.add_argument(
+        "--locked",
+        action="store_true",
+        default=os.environ.get("BOOTSTRAP_LOCKED", "0") == "1",
+        help="Check out exactly the SHAs pinned in manifest/refs.lock (default: $BOOTSTRAP_LOCKED).",
+    )
+    parser.add_argument(
+        "--no-fast-path",
+        dest="fast_path",
+        action="store_false",
+        default=USE_FAST_PATH,
+        help="Always fetch/reset/clean instead of skipping repos already at the remote tip.",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        help="Write per-git-command timing spans to this file (Chrome trace JSON, or JSON lines for *.jsonl).",
+    )
+    parser.add_argument("--mirror-status", action="store_true", help="Report mirror cache size and exit.")
+    parser.add_argument("--mirror-gc", action="store_true", help="Run git gc on every mirror and exit.")
+    parser.add_argument(
+        "--mirror-max-mb",
+        type=int,
+        help="Evict least-recently-used mirrors until the cache fits in this many MiB, then exit.",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be 1 or greater")
+    if args.mirror_max_mb is not None and args.mirror_max_mb < 0:
+        parser.error("--mirror-max-mb must be zero or greater")
+    return args
+
+
+def run_mirror_maintenance(args: argparse.Namespace) -> int:
+    mirror_dir: Path = args.mirror_dir
+    if args.mirror_gc:
+        gc_mirrors(mirror_dir)
+    if args.mirror_max_mb is not None:
+        evicted = evict_mirrors(mirror_dir, args.mirror_max_mb * 1024 * 1024)
+        for mirror in evicted:
+            log(f"Evicted mirror {mirror.name} ({format_size(mirror.size_bytes)})")
+        if not evicted:
+            log("Evicted mirrors: none")
+    report_mirrors(mirror_dir)
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    TRACER.reset(capture_progress=args.trace is not None)
+    if args.mirror_status or args.mirror_gc or args.mirror_max_mb is not None:
+        return run_mirror_maintenance(args)
+
     log(f"Python: {sys.executable}")
     log(f"Version: {sys.version.split()[0]}")
     log(f"Root: {ROOT}")
     log(f"Manifest: {MANIFEST}")
     log(f"Deps dir: {DEPS_DIR}")
     log(f"Timeout: {DEFAULT_TIMEOUT_S}s | Depth: {CLONE_DEPTH} | Partial: {USE_PARTIAL_CLONE}")
-    log(f"Preserve local: {PRESERVE_LOCAL}")
+    log(f"Preserve local: {PRESERVE_LOCAL} | Jobs: {args.jobs}")
+    log(f"Mirror cache: {args.mirror_dir if args.mirror_cache else 'disabled'}")
+    log(f"Locked: {REFS_LOCK if args.locked else 'no (tracking branch tips)'}")
 
     try:
         specs = load_manifest()
+        locked_shas = read_refs_lock(REFS_LOCK) if args.locked else None
     except Exception as e:
         log(f"ERROR: {e}")
         return 2
 
-    # Continue-on-failure and summarize at end
-    failures: list[str] = []
-
-    # Deterministic order for stable logs
-    for spec in sorted(specs, key=lambda s: s.name):
+    remote_heads: dict[str, str | None] = {}
+    lock_heads: dict[str, str] = {}
+    if args.fast_path and locked_shas is None:
+        remote_heads = resolve_remote_heads(specs)
+        resolved = sum(1 for sha in remote_heads.values() if sha)
+        log(f"Fast path: resolved {resolved}/{len(specs)} remote heads via ls-remote")
         try:
-            ensure_repo(spec)
-        except subprocess.TimeoutExpired as e:
-            failures.append(f"{spec.name}: TIMEOUT running {' '.join(e.cmd) if e.cmd else 'git'}")
-        except subprocess.CalledProcessError as e:
-            failures.append(f"{spec.name}: FAILED (exit {e.returncode}) running: {' '.join(e.cmd)}")
-        except Exception as e:
-            failures.append(f"{spec.name}: ERROR {type(e).__name__}: {e}")
+            lock_heads = read_refs_lock(REFS_LOCK) if REFS_LOCK.exists() else {}
+        except ValueError as e:
+            log(f"Fast path: ignoring unreadable {REFS_LOCK} ({e})")
+
+    options = BootstrapOptions(
+        jobs=args.jobs,
+        mirror_dir=args.mirror_dir if args.mirror_cache else None,
+        locked_shas=locked_shas,
+        remote_heads=remote_heads,
+        lock_heads=lock_heads,
+    )
+
+    # Continue-on-failure and summarize at end (deterministic order for stable logs)
+    outcomes, failures = ensure_repos(specs, options)
 
     if failures:
+        finish_trace(args.trace)
         log("\n=== BOOTSTRAP SUMMARY: PARTIAL FAILURE ===")
+        log(f"Repos: {summarize_outcomes(outcomes)}, {len(failures)} failed")
         for f in failures:
             log(f" - {f}")
         log(f"\nWorkspace is partial. See deps/: {DEPS_DIR}")
         return 4
 
-    write_refs_lock(specs)
+    if locked_shas is not None:
+        log(f"Locked mode: left {REFS_LOCK} unchanged")
+    else:
+        with phase("lock"):
+            write_refs_lock(specs)
 
+    finish_trace(args.trace)
     log("\n=== BOOTSTRAP SUMMARY: SUCCESS ===")
+    log(f"Repos: {summarize_outcomes(outcomes)}")
     log(f"Workspace ready: {DEPS_DIR}")
     return 0
 
@@ -0,0 +1,45 @@
+"""Local object-store queries shared by bootstrap, mkpatch and repo_ops.
+
+deps/ are usually `--filter=blob:none` partial clones. In those, looking up a missing
+object makes git lazily fetch it from the promisor remote, which turns a cheap local
+check into a network round trip (or a credential prompt). Everything here runs with
+NO_LAZY_FETCH_ENV so a missing object is simply reported as missing.
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+from pathlib import Path
+
+# GIT_NO_LAZY_FETCH needs git >= 2.44; disallowing every transport makes older git fail
+# the lazy fetch before it opens a connection.
+NO_LAZY_FETCH_ENV = {"GIT_NO_LAZY_FETCH": "1", "GIT_ALLOW_PROTOCOL": "none", "GIT_TERMINAL_PROMPT": "0"}
+
+
+def has_object(repo_dir: Path, rev: str) -> bool:
+    """True if rev (e.g. `<sha>^{commit}`) resolves in repo_dir's local object store."""
+    return (
+        subprocess.run(
+            ["git", "cat-file", "-e", rev],
+            cwd=str(repo_dir),
+            capture_output=True,
+            env={**os.environ, **NO_LAZY_FETCH_ENV},
+            check=False,
+        ).returncode
+        == 0
+    )
+
+
+def is_partial_clone(repo_dir: Path) -> bool:
+    """True if repo_dir has a promisor remote, i.e. objects may be missing locally."""
+    result = subprocess.run(
+        ["git", "config", "--get-regexp", r"^(extensions\.partialclone|remote\..*\.promisor)$"],
+        cwd=str(repo_dir),
+        text=True,
+        capture_output=True,
+        check=False,
+    )
+    return any(
+        key.lower() == "extensions.partialclone" or value.strip().lower() == "true"
+        for key, _, value in (line.partition(" ") for line in result.stdout.splitlines())
+    )
@@ -3,13 +3,27 @@ from __future__ import annotations
 
 import argparse
 import datetime as dt
+import hashlib
 import json
+import lzma
+import os
 import shutil
 import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 
+try:
+    from tools.git_objects import has_object
+except ModuleNotFoundError:  # run as a script: tools/ is on sys.path
+    from git_objects import has_object
+
 DEFAULT_ROOT = Path(__file__).resolve().parents[1]
+STREAM_CHUNK_BYTES = 1 << 16
+PATCH_FORMATS = ("patch", "xz")
+# Compressed patches live in one content-addressed store shared by all bundles.
+OBJECTS_DIRNAME = "objects"
 
 
 @dataclass(frozen=True)
@@ -18,7 +32,23 @@ class DirtyRepo:
     path: Path
     base_sha: str
     summary: str
-    patch_text: str
+    tree_sha: str  # worktree snapshot (untracked files included) the patch leads to
+
+
+@dataclass(frozen=True)
+class StackParent:
+    """The previous bundle's change for a repo that an incremental patch applies on top of."""
+
+    bundle: str
+    branch: str
+    tree_sha: str
+
+
+@dataclass(frozen=True)
+class PatchStats:
+    size_bytes: int
+    hunks: int
+    sha256: str
 
 
 def suggested_branch(bundle_name: str, repo_name: str) -> str:
@@ -30,47 +60,217 @@ def suggested_commit_message(bundle_name: str, repo_name: str) -> str:
     return f"Apply {bundle_name} updates for {repo_name}"
 
 
-def run_git(repo: Path, args: list[str]) -> subprocess.CompletedProcess[str]:
+def run_git(
+    repo: Path, args: list[str], env: dict[str, str] | None = None
+) -> subprocess.CompletedProcess[str]:
     return subprocess.run(
         ["git", *args],
         cwd=repo,
         check=True,
         text=True,
         capture_output=True,
+        env=env,
     )
 
 
-def list_dirty_repos(deps_dir: Path) -> list[DirtyRepo]:
-    dirty_repos: list[DirtyRepo] = []
-    if not deps_dir.exists():
-        return dirty_repos
+def snapshot_tree(repo_path: Path) -> str:
+    """Write the whole worktree (untracked files included) as a tree object via a throwaway index.
+
+    The real index is copied first so git can reuse its stat cache, and it is never modified.
+    """
+    index_path = repo_path / run_git(repo_path, ["rev-parse", "--git-path", "index"]).stdout.strip()
+    with tempfile.TemporaryDirectory(prefix="mkpatch-index-") as scratch:
+        temp_index = Path(scratch) / "index"
+        if index_path.exists():
+            shutil.copyfile(index_path, temp_index)
+
+        env = {**os.environ, "GIT_INDEX_FILE": str(temp_index)}
+        run_git(repo_path, ["add", "--all"], env=env)
+        return run_git(repo_path, ["write-tree"], env=env).stdout.strip()
+
 
-    for repo_path in sorted(p for p in deps_dir.iterdir() if p.is_dir() and (p / ".git").exists()):
-        status = run_git(repo_path, ["status", "--porcelain"]).stdout.strip()
-        if not status:
+def parse_porcelain_v2(output: str) -> tuple[str, list[str]]:
+    """Parse `git status --porcelain=v2 --branch` into (HEAD sha, `status --short` lines)."""
+    head = ""
+    summary: list[str] = []
+    for line in output.splitlines():
+        if line.startswith("# branch.oid "):
+            head = line[len("# branch.oid ") :]
+        elif line.startswith("# "):
             continue
+        elif line.startswith(("1 ", "u ")):
+            # 1 XY sub mH mI mW hH hI path  /  u XY sub m1 m2 m3 mW h1 h2 h3 path
+            fields = line.split(" ", 8 if line[0] == "1" else 10)
+            summary.append(f"{fields[1].replace('.', ' ')} {fields[-1]}")
+        elif line.startswith("2 "):
+            # 2 XY sub mH mI mW hH hI Xscore path<TAB>origPath
+            fields = line.split(" ", 9)
+            path, _, orig = fields[-1].partition("\t")
+            summary.append(f"{fields[1].replace('.', ' ')} {orig} -> {path}")
+        elif line.startswith("? "):
+            summary.append(f"?? {line[2:]}")
+    return head, summary
+
+
+def scan_repo(repo_path: Path) -> DirtyRepo | None:
+    """One status call yields HEAD, dirtiness and the summary; the snapshot only runs when dirty."""
+    status = run_git(repo_path, ["status", "--porcelain=v2", "--branch"]).stdout
+    base_sha, summary = parse_porcelain_v2(status)
+    if not summary:
+        return None
+
+    return DirtyRepo(
+        name=repo_path.name,
+        path=repo_path,
+        base_sha=base_sha,
+        summary="\n".join(summary),
+        tree_sha=snapshot_tree(repo_path),
+    )
 
-        base_sha = run_git(repo_path, ["rev-parse", "HEAD"]).stdout.strip()
-        summary = run_git(repo_path, ["status", "--short"]).stdout.strip()
-        patch_text = run_git(repo_path, ["diff", "HEAD"]).stdout
-        dirty_repos.append(
-            DirtyRepo(
-                name=repo_path.name,
-                path=repo_path,
-                base_sha=base_sha,
-                summary=summary,
-                patch_text=patch_text,
-            )
+
+def stream_patch(
+    repo: DirtyRepo, patch_path: Path, *, compress: bool = False, since: str = "HEAD"
+) -> PatchStats:
+    """Pipe a binary, full-index diff from `since` to the worktree snapshot straight into patch_path.
+
+    The snapshot includes new files, so the patch matches what `status` reports as
+    dirty. Size, hunk count and hash are computed on the fly; memory use is bounded
+    by STREAM_CHUNK_BYTES regardless of patch size. With compress=True the file is
+    xz-compressed; stats always describe the plain patch.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    hunks = 0
+    at_line_start = True
+
+    # stderr goes to a file, not a pipe: an unread pipe would stall git once it fills up
+    with tempfile.TemporaryFile() as stderr_file:
+        proc = subprocess.Popen(
+            ["git", "diff", "--binary", "--full-index", since, repo.tree_sha],
+            cwd=repo.path,
+            stdout=subprocess.PIPE,
+            stderr=stderr_file,
         )
+        assert proc.stdout is not None
+        try:
+            with (lzma.open(patch_path, "wb") if compress else patch_path.open("wb")) as out:
+                # readline(limit) never returns more than one chunk, even for huge single-line diffs
+                for piece in iter(lambda: proc.stdout.readline(STREAM_CHUNK_BYTES), b""):
+                    if at_line_start and piece.startswith(b"@@ "):
+                        hunks += 1
+                    at_line_start = piece.endswith(b"\n")
+                    digest.update(piece)
+                    size += len(piece)
+                    out.write(piece)
+        except BaseException:
+            proc.kill()
+            raise
+        finally:
+            proc.stdout.close()
+            returncode = proc.wait()
+        if returncode != 0:
+            stderr_file.seek(0)
+            raise subprocess.CalledProcessError(
+                returncode, proc.args, stderr=stderr_file.read().decode("utf-8", "replace")
+            )
+
+    return PatchStats(size_bytes=size, hunks=hunks, sha256=digest.hexdigest())
+
+
+def store_patch_object(
+    repo: DirtyRepo, objects_dir: Path, since: str = "HEAD"
+) -> tuple[PatchStats, Path]:
+    """Write repo's patch as objects/<sha256>.patch.xz, reusing an identical existing object."""
+    objects_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{repo.name}-", suffix=".tmp", dir=objects_dir)
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+    try:
+        stats = stream_patch(repo, tmp_path, compress=True, since=since)
+        object_path = objects_dir / f"{stats.sha256}.patch.xz"
+        if object_path.exists():
+            tmp_path.unlink()
+        else:
+            os.replace(tmp_path, object_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return stats, object_path
 
-    return dirty_repos
 
+def list_dirty_repos(deps_dir: Path, jobs: int | None = None) -> list[DirtyRepo]:
+    if not deps_dir.exists():
+        return []
+
+    repo_paths = sorted(p for p in deps_dir.iterdir() if p.is_dir() and (p / ".git").exists())
+    if not repo_paths:
+        return []
 
-def write_change_report(bundle_dir: Path, repos: list[DirtyRepo]) -> None:
+    # git status is mostly I/O wait on large trees, so scan repos concurrently
+    workers = jobs or min(8, len(repo_paths))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mkpatch-scan") as pool:
+        scanned = list(pool.map(scan_repo, repo_paths))
+    return [repo for repo in scanned if repo is not None]
+
+
+def stack_on_previous(
+    repos: list[DirtyRepo], previous: dict[str, tuple[str, dict]]
+) -> tuple[list[DirtyRepo], dict[str, StackParent], list[str]]:
+    """Split repos into (changed since their previous bundle, their stack parents, unchanged names).
+
+    previous maps repo name to (bundle, plan entry), see previous_changes. A repo stacks
+    on its previous bundle only when that bundle recorded a snapshot for the same
+    base_sha and the snapshot tree is still in the local object store; otherwise it
+    gets a full patch against HEAD as usual.
+    """
+    changed: list[DirtyRepo] = []
+    parents: dict[str, StackParent] = {}
+    unchanged: list[str] = []
+    for repo in repos:
+        bundle, entry = previous.get(repo.name, (None, {}))
+        tree_sha = entry.get("tree_sha")
+        if not bundle or not tree_sha or entry.get("base_sha") != repo.base_sha or not has_object(repo.path, tree_sha):
+            changed.append(repo)
+        elif tree_sha == repo.tree_sha:
+            unchanged.append(repo.name)
+        else:
+            changed.append(repo)
+            parents[repo.name] = StackParent(bundle, entry["branch"], tree_sha)
+    return changed, parents, unchanged
+
+
+def write_change_report(
+    bundle_dir: Path,
+    repos: list[DirtyRepo],
+    stats: dict[str, PatchStats] | None = None,
+    patch_paths: dict[str, str] | None = None,
+    parents: dict[str, StackParent] | None = None,
+) -> None:
     affected = "\n".join(f"- {repo.name}" for repo in repos)
     base_shas = "\n".join(f"- {repo.name}: `{repo.base_sha}`" for repo in repos)
+    stats = stats or {}
+    stat_rows = "\n".join(
+        f"| {repo.name} | {stats[repo.name].size_bytes} | {stats[repo.name].hunks} | `{stats[repo.name].sha256}` |"
+        for repo in repos
+        if repo.name in stats
+    )
+    stack_note = ""
+    if parents:
+        stacked = "\n".join(
+            f"- {name}: on top of `{parent.bundle}` (branch `{parent.branch}`); apply that bundle's patch first"
+            for name, parent in sorted(parents.items())
+        )
+        stack_note = f"\n## Stacked on\n{stacked}\n"
     summary_lines = "\n\n".join(f"### {repo.name}\n```\n{repo.summary}\n```" for repo in repos)
     repo_names = " ".join(repo.name for repo in repos)
+    if patch_paths and any(path.endswith(".xz") for path in patch_paths.values()):
+        apply_lines = "\n".join(
+            f"(cd deps/{repo.name} && xz -dc ../../{patch_paths[repo.name]} | git apply)" for repo in repos
+        )
+    else:
+        apply_lines = f"""for repo in {repo_names}; do
+  (cd deps/"$repo" && git apply ../../patches/{bundle_dir.name}/"$repo".patch)
+done"""
 
     content = f"""# Change Report
 
@@ -79,15 +279,18 @@ def write_change_report(bundle_dir: Path, repos: list[DirtyRepo]) -> None:
 
 ## Base SHAs
 {base_shas}
-
+{stack_note}
 ## Summary
 {summary_lines}
 
+## Patch stats
+| Repo | Bytes | Hunks | SHA-256 |
+|---|---:|---:|---|
+{stat_rows}
+
 ## Apply instructions
 ```bash
-for repo in {repo_names}; do
-  (cd deps/"$repo" && git apply ../../patches/{bundle_dir.name}/"$repo".patch)
-done
+{apply_lines}
 ```
 
 ## Tests
@@ -97,31 +300,54 @@ done
     (bundle_dir / "change_report.md").write_text(content, encoding="utf-8")
 
 
-def write_bundle(repos: list[DirtyRepo], patches_dir: Path, bundle_name: str) -> Path:
+def write_bundle(
+    repos: list[DirtyRepo],
+    patches_dir: Path,
+    bundle_name: str,
+    patch_format: str = "patch",
+    parents: dict[str, StackParent] | None = None,
+) -> Path:
+    if patch_format not in PATCH_FORMATS:
+        raise ValueError(f"unknown patch format {patch_format!r}; expected one of {PATCH_FORMATS}")
     bundle_dir = patches_dir / bundle_name
     bundle_dir.mkdir(parents=True, exist_ok=False)
 
+    parents = parents or {}
+    stats: dict[str, PatchStats] = {}
+    patch_paths: dict[str, str] = {}
     for repo in repos:
-        patch_path = bundle_dir / f"{repo.name}.patch"
-        patch_path.write_text(repo.patch_text, encoding="utf-8")
+        since = parents[repo.name].tree_sha if repo.name in parents else "HEAD"
+        if patch_format == "xz":
+            stats[repo.name], object_path = store_patch_object(repo, patches_dir / OBJECTS_DIRNAME, since)
+            patch_paths[repo.name] = f"patches/{OBJECTS_DIRNAME}/{object_path.name}"
+        else:
+            stats[repo.name] = stream_patch(repo, bundle_dir / f"{repo.name}.patch", since=since)
+            patch_paths[repo.name] = f"patches/{bundle_name}/{repo.name}.patch"
+
+    def plan_entry(repo: DirtyRepo) -> dict[str, str]:
+        entry = {
+            "repo": repo.name,
+            "branch": suggested_branch(bundle_name, repo.name),
+            "commit_message": suggested_commit_message(bundle_name, repo.name),
+            "patch_path": patch_paths[repo.name],
+            "patch_sha256": stats[repo.name].sha256,
+            "base_sha": repo.base_sha,
+            "tree_sha": repo.tree_sha,
+        }
+        if repo.name in parents:
+            # Stacked: publish onto the parent's branch after applying the parent chain.
+            entry["branch"] = parents[repo.name].branch
+            entry["parent_bundle"] = parents[repo.name].bundle
+        return entry
 
     plan = {
         "schema_version": 1,
         "bundle": bundle_name,
-        "changes": [
-            {
-                "repo": repo.name,
-                "branch": suggested_branch(bundle_name, repo.name),
-                "commit_message": suggested_commit_message(bundle_name, repo.name),
-                "patch_path": f"patches/{bundle_name}/{repo.name}.patch",
-                "base_sha": repo.base_sha,
-            }
-            for repo in repos
-        ],
+        "changes": [plan_entry(repo) for repo in repos],
     }
     (bundle_dir / "change_plan.json").write_text(json.dumps(plan, indent=2) + "\n", encoding="utf-8")
 
-    write_change_report(bundle_dir, repos)
+    write_change_report(bundle_dir, repos, stats, patch_paths, parents)
     return bundle_dir
 
 
@@ -150,6 +376,57 @@ def prune_old_bundles(patches_dir: Path, keep: int) -> list[Path]:
     return stale_bundles
 
 
+def read_plan(bundle_dir: Path) -> dict | None:
+    plan_path = bundle_dir / "change_plan.json"
+    if not plan_path.exists():
+        return None
+    return json.loads(plan_path.read_text(encoding="utf-8"))
+
+
+def previous_changes(patches_dir: Path) -> dict[str, tuple[str, dict]]:
+    """Map each repo to (bundle, plan entry) from the newest bundle that has a change for it.
+
+    Incremental bundles leave unchanged repos out of their plan, so the newest bundle
+    alone would forget them and the next run would re-emit them as new, unstacked PRs.
+    """
+    previous: dict[str, tuple[str, dict]] = {}
+    for bundle_dir in sorted_bundle_dirs(patches_dir):
+        plan = read_plan(bundle_dir)
+        for change in (plan or {}).get("changes", []):
+            previous.setdefault(change["repo"], (plan["bundle"], change))
+    return previous
+
+
+def stack_ancestors(patches_dir: Path, parents: dict[str, StackParent]) -> set[str]:
+    """Bundles whose patches a stacked repo's chain applies, following parent_bundle links."""
+    ancestors: set[str] = set()
+    for repo, parent in parents.items():
+        bundle: str | None = parent.bundle
+        while bundle and bundle not in ancestors:
+            ancestors.add(bundle)
+            plan = read_plan(patches_dir / bundle) or {}
+            entry = next((change for change in plan.get("changes", []) if change["repo"] == repo), {})
+            bundle = entry.get("parent_bundle")
+    return ancestors
+
+
+def prune_unreferenced_objects(patches_dir: Path) -> list[Path]:
+    """Delete objects/*.patch.xz that no remaining bundle's change_plan.json points at."""
+    objects_dir = patches_dir / OBJECTS_DIRNAME
+    if not objects_dir.exists():
+        return []
+
+    referenced: set[str] = set()
+    for bundle_dir in sorted_bundle_dirs(patches_dir):
+        plan = read_plan(bundle_dir) or {}
+        referenced.update(Path(change["patch_path"]).name for change in plan.get("changes", []))
+
+    orphans = [path for path in sorted(objects_dir.glob("*.patch.xz")) if path.name not in referenced]
+    for orphan in orphans:
+        orphan.unlink()
+    return orphans
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Create patch bundles from dirty deps repos.")
     parser.add_argument("--bundle", help="Override bundle directory name.")
@@ -159,6 +436,23 @@ def main() -> int:
         action="store_true",
         help="Delete stale patches/bundle-* directories before writing a new bundle.",
     )
+    parser.add_argument(
+        "--format",
+        choices=PATCH_FORMATS,
+        default="patch",
+        help="Bundle storage: plain per-bundle .patch files, or xz-compressed content-addressed "
+        "objects under patches/objects/ shared across bundles.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only emit what changed since the newest bundle that has each repo, stacked on top of it.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of deps repos to scan concurrently (default: up to 8).",
+    )
     parser.add_argument(
         "--keep",
         type=int,
@@ -170,11 +464,35 @@ def main() -> int:
     deps_dir = args.root / "deps"
     patches_dir = args.root / "patches"
 
-    dirty_repos = list_dirty_repos(deps_dir)
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be 1 or greater")
+
+    dirty_repos = list_dirty_repos(deps_dir, args.jobs)
     if not dirty_repos:
         print("No dirty repos detected under deps/.")
         return 0
 
+    parents: dict[str, StackParent] = {}
+    if args.incremental:
+        previous = previous_changes(patches_dir)
+        if not previous:
+            print("No previous bundle found; writing a full bundle.")
+        else:
+            dirty_repos, parents, unchanged = stack_on_previous(dirty_repos, previous)
+            for name in unchanged:
+                print(f"Unchanged since {previous[name][0]}: {name}")
+            if not dirty_repos:
+                print("No changes since the previous bundles.")
+                return 0
+            if args.prune_old:
+                retained = {path.name for path in sorted_bundle_dirs(patches_dir)[: args.keep]}
+                pruned_ancestors = sorted(stack_ancestors(patches_dir, parents) - retained)
+                if pruned_ancestors:
+                    parser.error(
+                        f"--prune-old --keep {args.keep} would delete {', '.join(pruned_ancestors)}, "
+                        "which this incremental bundle stacks on; raise --keep or drop --prune-old"
+                    )
+
     if args.prune_old:
         deleted = prune_old_bundles(patches_dir, args.keep)
         if deleted:
@@ -183,9 +501,11 @@ def main() -> int:
                 print(f"- {bundle_path}")
         else:
             print("Deleted stale bundles: none")
+        for orphan in prune_unreferenced_objects(patches_dir):
+            print(f"Deleted unreferenced patch object: {orphan}")
 
     bundle_name = args.bundle or make_bundle_name()
-    bundle_dir = write_bundle(dirty_repos, patches_dir, bundle_name)
+    bundle_dir = write_bundle(dirty_repos, patches_dir, bundle_name, args.format, parents)
     print(f"Created patch bundle: {bundle_dir}")
     return 0
 
@@ -2,14 +2,28 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import lzma
 import os
 import shutil
 import subprocess
-from dataclasses import dataclass
+import tempfile
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
 from pathlib import Path
 from urllib.parse import quote
 
+try:
+    from tools.git_objects import has_object, is_partial_clone
+except ModuleNotFoundError:  # run as a script: tools/ is on sys.path
+    from git_objects import has_object, is_partial_clone
+
+DEFAULT_REMOTE_TEMPLATE = "https://github.com/{org}/{repo}.git"
+PATCH_CHUNK_BYTES = 1 << 16
+
 
 @dataclass(frozen=True)
 class Change:
@@ -18,6 +32,8 @@ class Change:
     commit_message: str
     patch_path: Path
     base_sha: str | None
+    patch_sha256: str | None = None
+    parent_bundle: str | None = None  # incremental bundle: apply that bundle's patch for repo first
 
 
 @dataclass(frozen=True)
@@ -27,6 +43,17 @@ class Plan:
     changes: list[Change]
 
 
+@dataclass(frozen=True)
+class ChangeResult:
+    change: Change
+    status: str  # "prepared", "no-changes", "published", "failed", "not-published"
+    work_dir: Path
+    repo_dir: Path | None = None
+    pr_url: str | None = None
+    error: str | None = None
+    log: tuple[str, ...] = ()
+
+
 def run(cmd: list[str], *, cwd: Path | None = None, env: dict[str, str] | None = None) -> str:
     result = subprocess.run(
         cmd,
@@ -39,6 +66,16 @@ def run(cmd: list[str], *, cwd: Path | None = None, env: dict[str, str] | None =
     return result.stdout.strip()
 
 
+@dataclass(frozen=True)
+class PatchCheck:
+    repo: str
+    applies: bool
+    source: str  # local repo path or remote URL the base tree came from
+    diffstat: str
+    conflicts: tuple[str, ...] = ()
+    error: str | None = None
+
+
 def load_plan(plan_path: Path) -> Plan:
     raw = json.loads(plan_path.read_text(encoding="utf-8"))
     schema_version = int(raw["schema_version"])
@@ -57,12 +94,51 @@ def load_plan(plan_path: Path) -> Plan:
                 commit_message=str(item["commit_message"]),
                 patch_path=patch_path,
                 base_sha=str(item["base_sha"]) if item.get("base_sha") else None,
+                patch_sha256=str(item["patch_sha256"]) if item.get("patch_sha256") else None,
+                parent_bundle=str(item["parent_bundle"]) if item.get("parent_bundle") else None,
             )
         )
 
     return Plan(schema_version=schema_version, bundle=bundle, changes=changes)
 
 
+def resolve_patch_stack(
+    change: Change, plan_path: Path, patch_root: Path
+) -> list[tuple[Path, str | None]]:
+    """Return the (patch path, sha256) chain a stacked change depends on, oldest first.
+
+    Parent bundles are looked up next to plan_path's bundle directory. The change's own
+    patch is not included.
+    """
+    stack: list[tuple[Path, str | None]] = []
+    seen = {plan_path.parent.name}
+    current = change
+    while current.parent_bundle:
+        if current.parent_bundle in seen:
+            raise ValueError(f"Bundle stack for {change.repo} loops back to {current.parent_bundle}")
+        seen.add(current.parent_bundle)
+        parent_plan_path = plan_path.parent.parent / current.parent_bundle / "change_plan.json"
+        if not parent_plan_path.exists():
+            raise FileNotFoundError(
+                f"{change.repo} is stacked on bundle {current.parent_bundle}, but {parent_plan_path} "
+                "is missing (pruned?). Regenerate the bundle without --incremental."
+            )
+        parent = next(
+            (item for item in load_plan(parent_plan_path).changes if item.repo == change.repo), None
+        )
+        if parent is None:
+            raise ValueError(f"Parent bundle {current.parent_bundle} has no change for {change.repo}")
+        if parent.base_sha != change.base_sha:
+            raise ValueError(
+                f"Parent bundle {current.parent_bundle} targets base_sha {parent.base_sha} for "
+                f"{change.repo}, but the stacked change expects {change.base_sha}"
+            )
+        stack.append((patch_root / parent.patch_path, parent.patch_sha256))
+        current = parent
+    stack.reverse()
+    return stack
+
+
 def resolve_plan_path(plan_path: Path, workspace_root: Path) -> Path:
     """Resolve and sanitize a plan path passed via CLI/workflow inputs.
 
@@ -98,13 +174,160 @@ def clone_repo(work_dir: Path, repo_url: str, branch: str, token: str) -> Path:
     if dest.exists():
         shutil.rmtree(dest)
 
-    auth_repo_url = with_github_token(repo_url, token)
+    # Non-https remotes (e.g. file:// mirrors in tests) carry no credentials
+    auth_repo_url = with_github_token(repo_url, token) if repo_url.startswith("https://") else repo_url
     run(["git", "clone", auth_repo_url, str(dest)])
     run(["git", "checkout", "-B", branch], cwd=dest)
     run(["git", "remote", "set-url", "origin", auth_repo_url], cwd=dest)
     return dest
 
 
+def commit_exists(repo_dir: Path, sha: str) -> bool:
+    """True if sha is a commit already in repo_dir; never fetches."""
+    return has_object(repo_dir, f"{sha}^{{commit}}")
+
+
+def fetch_minimal(
+    work_dir: Path,
+    repo_url: str,
+    branch: str,
+    token: str,
+    base_sha: str | None,
+    base_branch: str,
+) -> tuple[Path, bool]:
+    """Materialize only what publishing needs instead of a full clone.
+
+    Fetches base_sha plus the tips of base_branch and the publication branch (if it
+    already exists, so --force-with-lease has a remote-tracking ref) at depth 1.
+    If the server refuses the by-SHA fetch, falls back to the full branch history so
+    checkout_base/assert_base_sha can still run their merge-base diagnostics.
+
+    Returns (repo dir, whether the full-history fallback was used).
+    """
+    repo_name = repo_url.rstrip("/").split("/")[-1].replace(".git", "")
+    dest = work_dir / repo_name
+    if dest.exists():
+        shutil.rmtree(dest)
+    dest.mkdir(parents=True)
+
+    auth_repo_url = with_github_token(repo_url, token) if repo_url.startswith("https://") else repo_url
+    run(["git", "init", "--quiet"], cwd=dest)
+    run(["git", "remote", "add", "origin", auth_repo_url], cwd=dest)
+
+    listed = run(["git", "ls-remote", "origin", f"refs/heads/{base_branch}", f"refs/heads/{branch}"], cwd=dest)
+    existing = [line.split("\t", 1)[1] for line in listed.splitlines() if "\t" in line]
+    refspecs = [f"+{ref}:refs/remotes/origin/{ref[len('refs/heads/'):]}" for ref in existing]
+
+    wants = ([base_sha] if base_sha else []) + refspecs
+    fetched = False
+    if wants:
+        fetched = (
+            subprocess.run(
+                ["git", "fetch", "--no-tags", "--depth", "1", "origin", *wants],
+                cwd=str(dest),
+                text=True,
+                capture_output=True,
+                check=False,
+            ).returncode
+            == 0
+        )
+
+    fell_back = not fetched or (base_sha is not None and not commit_exists(dest, base_sha))
+    if fell_back:
+        fetch_branch_history(dest, "origin")
+
+    start = base_sha if base_sha and commit_exists(dest, base_sha) else f"origin/{base_branch}"
+    run(["git", "checkout", "-B", branch, start], cwd=dest)
+    return dest, fell_back
+
+
+def fetch_branch_history(repo_dir: Path, remote: str) -> None:
+    """Fallback for servers that refuse a fetch by SHA: full history of every branch."""
+    git_dir = git_dir_of(repo_dir)
+    full_fetch = ["git", "fetch", "--quiet", "--no-tags"]
+    if git_dir is not None and (git_dir / "shallow").exists():
+        full_fetch.append("--unshallow")
+    run([*full_fetch, remote, "+refs/heads/*:refs/remotes/origin/*"], cwd=repo_dir)
+
+
+def git_dir_of(path: Path) -> Path | None:
+    """Return the git dir of a working copy or bare repo, or None if path is neither."""
+    if (path / ".git").is_dir():
+        return path / ".git"
+    if (path / "objects").is_dir() and (path / "HEAD").exists():
+        return path
+    return None
+
+
+def find_local_source(repo: str, base_sha: str | None, search_dirs: list[Path]) -> Path | None:
+    """Find a local working copy or mirror of repo that already contains base_sha.
+
+    Looks for <dir>/<repo> and <dir>/<repo>.git in each search dir, e.g. the workspace
+    deps/ directory or the bootstrap mirror cache. Partial clones qualify too; see
+    borrow_objects for how their missing blobs are filled in.
+    """
+    if not base_sha:
+        return None
+    for search_dir in search_dirs:
+        for candidate in (search_dir / repo, search_dir / f"{repo}.git"):
+            if git_dir_of(candidate) is not None and commit_exists(candidate, base_sha):
+                return candidate
+    return None
+
+
+def borrow_objects(git_dir: Path, source: Path, remote: str = "origin") -> None:
+    """Let the repo at git_dir read source's objects via alternates.
+
+    When source is a partial clone (e.g. a bootstrap `--filter=blob:none` deps clone),
+    git_dir is also made a promisor of remote, which must already be configured: blobs
+    source never downloaded are then fetched from remote on demand into git_dir, and
+    source itself is left untouched.
+    """
+    source_git_dir = git_dir_of(source)
+    if source_git_dir is None:
+        raise ValueError(f"Not a git repository: {source}")
+    alternates = git_dir / "objects" / "info" / "alternates"
+    alternates.write_text(f"{(source_git_dir / 'objects').resolve()}\n", encoding="utf-8")
+    if (source_git_dir / "shallow").exists():
+        shutil.copyfile(source_git_dir / "shallow", git_dir / "shallow")
+    if is_partial_clone(source):
+        for key, value in (
+            ("core.repositoryformatversion", "1"),
+            ("extensions.partialClone", remote),
+            (f"remote.{remote}.promisor", "true"),
+            (f"remote.{remote}.partialclonefilter", "blob:none"),
+        ):
+            run(["git", "--git-dir", str(git_dir), "config", key, value])
+
+
+def clone_from_local(
+    work_dir: Path,
+    source: Path,
+    repo_url: str,
+    branch: str,
+    token: str,
+    base_sha: str,
+) -> Path:
+    """Create a work repo that borrows source's objects via alternates.
+
+    Only the later push talks to origin, plus any blobs a partial-clone source lacks.
+    A shallow source's shallow list is copied so history walks stop at the same
+    boundary instead of failing on missing parents.
+    """
+    repo_name = repo_url.rstrip("/").split("/")[-1].replace(".git", "")
+    dest = work_dir / repo_name
+    if dest.exists():
+        shutil.rmtree(dest)
+    dest.mkdir(parents=True)
+
+    run(["git", "init", "--quiet"], cwd=dest)
+    auth_repo_url = with_github_token(repo_url, token) if repo_url.startswith("https://") else repo_url
+    run(["git", "remote", "add", "origin", auth_repo_url], cwd=dest)
+    borrow_objects(dest / ".git", source)
+    run(["git", "checkout", "-B", branch, base_sha], cwd=dest)
+    return dest
+
+
 def checkout_base(repo_dir: Path, branch: str, base_sha: str) -> None:
     expected_exists = (
         subprocess.run(
@@ -134,8 +357,41 @@ def checkout_base(repo_dir: Path, branch: str, base_sha: str) -> None:
     run(["git", "checkout", "-B", branch, base_sha], cwd=repo_dir)
 
 
-def apply_patch(repo_dir: Path, patch_path: Path) -> None:
-    run(["git", "apply", str(patch_path)], cwd=repo_dir)
+@contextmanager
+def plain_patch(patch_path: Path, expected_sha256: str | None = None) -> Iterator[Path]:
+    """Yield a plain-text path for patch_path, decompressing `.xz` objects and verifying the hash.
+
+    expected_sha256 is the digest of the uncompressed patch, as recorded in change_plan.json.
+    """
+    if patch_path.suffix != ".xz" and not expected_sha256:
+        yield patch_path
+        return
+
+    with tempfile.TemporaryDirectory(prefix="repo-ops-patch-") as scratch:
+        plain_path = patch_path
+        digest = hashlib.sha256()
+        opener = lzma.open if patch_path.suffix == ".xz" else open
+        with opener(patch_path, "rb") as src:
+            if patch_path.suffix == ".xz":
+                plain_path = Path(scratch) / patch_path.with_suffix("").name
+                with plain_path.open("wb") as dst:
+                    for chunk in iter(lambda: src.read(PATCH_CHUNK_BYTES), b""):
+                        digest.update(chunk)
+                        dst.write(chunk)
+            else:
+                for chunk in iter(lambda: src.read(PATCH_CHUNK_BYTES), b""):
+                    digest.update(chunk)
+        if expected_sha256 and digest.hexdigest() != expected_sha256:
+            raise ValueError(
+                f"Patch {patch_path} is corrupt: sha256 {digest.hexdigest()} does not match "
+                f"patch_sha256 {expected_sha256} from the change plan. Regenerate the bundle."
+            )
+        yield plain_path
+
+
+def apply_patch(repo_dir: Path, patch_path: Path, expected_sha256: str | None = None) -> None:
+    with plain_patch(patch_path, expected_sha256) as plain_path:
+        run(["git", "apply", str(plain_path.resolve())], cwd=repo_dir)
 
 
 def assert_base_sha(repo_dir: Path, base_sha: str | None) -> None:
@@ -205,10 +461,7 @@ def has_changes(repo_dir: Path) -> bool:
     return bool(status)
 
 
-def commit_and_push(repo_dir: Path, commit_message: str, branch: str) -> None:
-    run(["git", "add", "-A"], cwd=repo_dir)
-    run(["git", "commit", "-m", commit_message], cwd=repo_dir)
-
+def push_branch(repo_dir: Path, branch: str) -> None:
     initial_push = subprocess.run(
         ["git", "push", "-u", "origin", branch],
         cwd=str(repo_dir),
@@ -221,6 +474,23 @@ def commit_and_push(repo_dir: Path, commit_message: str, branch: str) -> None:
 
     stderr = initial_push.stderr.lower()
     if "non-fast-forward" in stderr or "fetch first" in stderr:
+        tracking = f"refs/remotes/origin/{branch}"
+        has_tracking = (
+            subprocess.run(
+                ["git", "rev-parse", "--verify", "--quiet", tracking],
+                cwd=str(repo_dir),
+                text=True,
+                capture_output=True,
+                check=False,
+            ).returncode
+            == 0
+        )
+        if not has_tracking:
+            # Minimal/local work repos never fetched this branch; the lease needs its tip
+            run(
+                ["git", "fetch", "--no-tags", "--depth", "1", "origin", f"+refs/heads/{branch}:{tracking}"],
+                cwd=repo_dir,
+            )
         run(["git", "push", "-u", "origin", branch, "--force-with-lease"], cwd=repo_dir)
         return
 
@@ -251,6 +521,266 @@ def open_pr(repo_dir: Path, branch: str, base_branch: str, title: str, body: str
     )
 
 
+def find_open_pr(repo_dir: Path, branch: str) -> str | None:
+    """URL of the open PR whose head is branch, or None."""
+    result = subprocess.run(
+        ["gh", "pr", "list", "--head", branch, "--state", "open", "--json", "url", "--jq", ".[0].url"],
+        cwd=str(repo_dir),
+        text=True,
+        capture_output=True,
+        check=False,
+    )
+    url = result.stdout.strip()
+    return url if result.returncode == 0 and url and url != "null" else None
+
+
+def describe_error(exc: Exception) -> str:
+    if isinstance(exc, subprocess.CalledProcessError):
+        detail = (exc.stderr or exc.output or "").strip()
+        cmd = " ".join(str(part) for part in exc.cmd)
+        return f"exit {exc.returncode} running: {cmd}" + (f"\n{detail}" if detail else "")
+    return f"{type(exc).__name__}: {exc}"
+
+
+def change_work_dir(work_dir: Path, index: int, change: Change) -> Path:
+    """Isolated per-change directory so concurrent changes never share a clone."""
+    return work_dir / f"{index:02d}-{change.repo}"
+
+
+def prepare_change(
+    change: Change,
+    index: int,
+    *,
+    work_dir: Path,
+    repo_url: str,
+    patch_path: Path,
+    token: str,
+    clone_mode: str = "full",
+    base_branch: str = "main",
+    local_sources: list[Path] | None = None,
+    parent_patches: list[tuple[Path, str | None]] | None = None,
+) -> ChangeResult:
+    """Clone, check out base_sha, apply (parent chain first) and commit locally. Nothing is pushed here."""
+    lines: list[str] = []
+    slot = change_work_dir(work_dir, index, change)
+    slot.mkdir(parents=True, exist_ok=True)
+    try:
+        repo_dir = None
+        local_source = find_local_source(change.repo, change.base_sha, local_sources or [])
+        if local_source is not None and change.base_sha:
+            lines.append(f"Using local objects from {local_source}")
+            try:
+                repo_dir = clone_from_local(slot, local_source, repo_url, change.branch, token, change.base_sha)
+            except subprocess.CalledProcessError as exc:
+                # e.g. origin unreachable for blobs a partial deps clone never downloaded
+                lines.append(f"Local source unusable ({describe_error(exc).splitlines()[0]}); using network")
+
+        if repo_dir is None and clone_mode == "minimal":
+            lines.append(f"Fetching {change.base_sha or base_branch} from {repo_url} (depth 1)")
+            repo_dir, fell_back = fetch_minimal(
+                slot, repo_url, change.branch, token, change.base_sha, base_branch
+            )
+            if fell_back:
+                lines.append("Fetch by SHA unavailable; fetched full branch history instead")
+        elif repo_dir is None:
+            lines.append(f"Cloning {repo_url}")
+            repo_dir = clone_repo(slot, repo_url, change.branch, token)
+        if change.base_sha:
+            checkout_base(repo_dir, change.branch, change.base_sha)
+        assert_base_sha(repo_dir, change.base_sha)
+        for parent_path, parent_sha256 in parent_patches or []:
+            lines.append(f"Applying stacked parent patch {parent_path}")
+            apply_patch(repo_dir, parent_path, parent_sha256)
+        lines.append(f"Applying patch {patch_path}")
+        apply_patch(repo_dir, patch_path, change.patch_sha256)
+
+        if not has_changes(repo_dir):
+            lines.append("No changes after patch apply; skipping push and PR.")
+            return ChangeResult(change, "no-changes", slot, repo_dir, log=tuple(lines))
+
+        run(["git", "add", "-A"], cwd=repo_dir)
+        run(["git", "commit", "-m", change.commit_message], cwd=repo_dir)
+        lines.append(f"Committed '{change.commit_message}' on {change.branch}")
+        return ChangeResult(change, "prepared", slot, repo_dir, log=tuple(lines))
+    except Exception as exc:
+        lines.append(f"ERROR: {describe_error(exc)}")
+        return ChangeResult(change, "failed", slot, error=describe_error(exc), log=tuple(lines))
+
+
+def publish_change(result: ChangeResult, *, bundle: str, base_branch: str) -> ChangeResult:
+    """Push the prepared commit and open the PR."""
+    change = result.change
+    assert result.repo_dir is not None
+    lines = list(result.log)
+    try:
+        push_branch(result.repo_dir, change.branch)
+        lines.append(f"Pushed {change.branch}")
+        pr_body = (
+            f"Automated cross-repo publication for bundle `{bundle}`.\n\n"
+            f"Applied patch: `{change.patch_path}`\n"
+            f"Base SHA: `{change.base_sha or 'not specified'}`\n"
+        )
+        # Stacked entries force-push onto the parent bundle's branch, so its PR is updated in place.
+        pr_url = find_open_pr(result.repo_dir, change.branch) if change.parent_bundle else None
+        if pr_url:
+            lines.append(f"Updated existing PR: {pr_url}")
+        else:
+            pr_url = open_pr(result.repo_dir, change.branch, base_branch, change.commit_message, pr_body)
+            lines.append(f"Opened PR: {pr_url}")
+        return replace(result, status="published", pr_url=pr_url, log=tuple(lines))
+    except Exception as exc:
+        lines.append(f"ERROR: {describe_error(exc)}")
+        return replace(result, status="failed", error=describe_error(exc), log=tuple(lines))
+
+
+def validate_change(
+    change: Change,
+    *,
+    repo_url: str,
+    patch_path: Path,
+    base_branch: str,
+    token: str | None,
+    local_sources: list[Path],
+    parent_patches: list[tuple[Path, str | None]] | None = None,
+) -> PatchCheck:
+    """Check that change's patch applies to its base tree without a checkout.
+
+    The base tree is read into a throwaway index (`git read-tree` + `git apply --check
+    --cached`), borrowing objects from a local source when one has base_sha and otherwise
+    fetching just that commit at depth 1 (or the branch history, if the server refuses
+    a fetch by SHA). Stacked parent patches are applied to the index first.
+    """
+    try:
+        with plain_patch(patch_path.resolve(), change.patch_sha256) as plain_path:
+            return _validate_plain_patch(
+                change, repo_url, plain_path, base_branch, token, local_sources, parent_patches or []
+            )
+    except ValueError as exc:
+        return PatchCheck(change.repo, False, str(patch_path), "", error=str(exc))
+
+
+def _validate_plain_patch(
+    change: Change,
+    repo_url: str,
+    patch_path: Path,
+    base_branch: str,
+    token: str | None,
+    local_sources: list[Path],
+    parent_patches: list[tuple[Path, str | None]],
+) -> PatchCheck:
+    try:
+        diffstat = run(["git", "apply", "--stat", str(patch_path)])
+    except subprocess.CalledProcessError as exc:
+        return PatchCheck(change.repo, False, str(patch_path), "", error=f"malformed patch: {describe_error(exc)}")
+    with tempfile.TemporaryDirectory(prefix=f"repo-ops-validate-{change.repo}-") as scratch:
+        repo_dir = Path(scratch)
+        run(["git", "init", "--quiet", "--bare"], cwd=repo_dir)
+        env = {**os.environ, "GIT_INDEX_FILE": str(repo_dir / "validate-index")}
+
+        local_source = find_local_source(change.repo, change.base_sha, local_sources)
+        try:
+            fetch_url = repo_url
+            if token and repo_url.startswith("https://"):
+                fetch_url = with_github_token(repo_url, token)
+            if local_source is not None and change.base_sha:
+                run(["git", "remote", "add", "origin", fetch_url], cwd=repo_dir)
+                borrow_objects(repo_dir, local_source)
+                source, base = str(local_source), change.base_sha
+            else:
+                if change.base_sha:
+                    fetched = subprocess.run(
+                        ["git", "fetch", "--quiet", "--no-tags", "--depth", "1", fetch_url, change.base_sha],
+                        cwd=str(repo_dir),
+                        capture_output=True,
+                        check=False,
+                    )
+                    if fetched.returncode != 0 or not commit_exists(repo_dir, change.base_sha):
+                        fetch_branch_history(repo_dir, fetch_url)
+                    if not commit_exists(repo_dir, change.base_sha):
+                        raise AssertionError(f"base_sha {change.base_sha} is not on any branch of {repo_url}")
+                    base = change.base_sha
+                else:
+                    run(
+                        ["git", "fetch", "--quiet", "--no-tags", "--depth", "1", fetch_url, f"refs/heads/{base_branch}"],
+                        cwd=repo_dir,
+                    )
+                    base = "FETCH_HEAD"
+                source = repo_url
+            run(["git", "read-tree", base], cwd=repo_dir, env=env)
+        except (subprocess.CalledProcessError, AssertionError) as exc:
+            error = describe_error(exc) if isinstance(exc, subprocess.CalledProcessError) else str(exc)
+            return PatchCheck(change.repo, False, repo_url, diffstat, error=f"could not load base tree: {error}")
+
+        for parent_path, parent_sha256 in parent_patches:
+            try:
+                with plain_patch(parent_path.resolve(), parent_sha256) as plain_parent:
+                    run(["git", "apply", "--cached", str(plain_parent)], cwd=repo_dir, env=env)
+            except subprocess.CalledProcessError as exc:
+                error = f"stacked parent patch {parent_path} does not apply: {describe_error(exc)}"
+                return PatchCheck(change.repo, False, source, diffstat, error=error)
+
+        check = subprocess.run(
+            ["git", "apply", "--check", "--cached", "-v", str(patch_path)],
+            cwd=str(repo_dir),
+            text=True,
+            capture_output=True,
+            env=env,
+            check=False,
+        )
+    # "error: patch failed: <file>:<line>" marks each conflicting hunk
+    failed_prefix = "error: patch failed: "
+    stderr_lines = check.stderr.splitlines()
+    conflicts = tuple(line[len(failed_prefix):] for line in stderr_lines if line.startswith(failed_prefix))
+    other_errors = [
+        line for line in stderr_lines if line.startswith("error:") and not line.startswith(failed_prefix)
+    ]
+    error = None if check.returncode == 0 else "; ".join(other_errors) or check.stderr.strip()
+    return PatchCheck(change.repo, check.returncode == 0, source, diffstat, conflicts, error)
+
+
+def print_patch_checks(checks: list[PatchCheck]) -> None:
+    for check in checks:
+        print(f"--- {check.repo} ---")
+        print(f"VALIDATE: base tree from {check.source}")
+        print(f"VALIDATE: {'patch applies cleanly' if check.applies else 'PATCH DOES NOT APPLY'}")
+        if check.error:
+            print(f"  {check.error}")
+        for conflict in check.conflicts:
+            print(f"  conflicting hunk at {conflict}")
+        for line in check.diffstat.splitlines():
+            print(f"  {line}")
+    print("\n| Repo | Applies | Conflicts |")
+    print("|---|---|---|")
+    for check in checks:
+        print(f"| {check.repo} | {'yes' if check.applies else 'no'} | {len(check.conflicts)} |")
+
+
+def run_pool(func, items: list, jobs: int) -> list:
+    """Map func over items with at most `jobs` workers, preserving input order."""
+    if jobs <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="repo-ops") as pool:
+        return list(pool.map(func, items))
+
+
+def write_change_logs(results: list[ChangeResult]) -> None:
+    for result in results:
+        print(f"--- {result.change.repo} ---")
+        for line in result.log:
+            print(line)
+        (result.work_dir.parent / f"{result.work_dir.name}.log").write_text(
+            "\n".join(result.log) + "\n", encoding="utf-8"
+        )
+
+
+def print_result_table(results: list[ChangeResult]) -> None:
+    print("\n| Repo | Branch | Status | PR / error |")
+    print("|---|---|---|---|")
+    for result in results:
+        detail = result.pr_url or (result.error.splitlines()[0] if result.error else "")
+        print(f"| {result.change.repo} | {result.change.branch} | {result.status} | {detail} |")
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Apply cross-repo patch plan and publish PRs.")
     parser.add_argument("--plan", type=Path, required=True, help="Path to change_plan.json")
@@ -259,7 +789,46 @@ def main() -> int:
     parser.add_argument("--org", required=True, help="GitHub org, e.g. phys-sims")
     parser.add_argument("--base-branch", default="main")
     parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="With --dry-run: check every patch applies to its base_sha (no push, no credentials needed).",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of changes to clone/apply/publish concurrently.",
+    )
+    parser.add_argument(
+        "--remote-template",
+        default=DEFAULT_REMOTE_TEMPLATE,
+        help="Clone URL template with {org} and {repo} placeholders.",
+    )
+    parser.add_argument(
+        "--clone-mode",
+        choices=["full", "minimal"],
+        default="full",
+        help="full: git clone every repo; minimal: fetch only base_sha and branch tips at depth 1.",
+    )
+    parser.add_argument(
+        "--local-source",
+        type=Path,
+        action="append",
+        default=[],
+        help=(
+            "Extra directory holding <repo>/ or <repo>.git mirrors to borrow objects from "
+            "(repeatable; <workspace-root>/deps is always searched)."
+        ),
+    )
+    parser.add_argument(
+        "--no-local-sources",
+        action="store_true",
+        help="Always fetch from the network, even if deps/<repo> already contains base_sha.",
+    )
     args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be 1 or greater")
 
     token = os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN")
     if not token and not args.dry_run:
@@ -280,44 +849,98 @@ def main() -> int:
     work_dir.mkdir(parents=True, exist_ok=True)
 
     print(f"Processing bundle {plan.bundle} with {len(plan.changes)} repo changes")
-    for change in plan.changes:
-        repo_url = f"https://github.com/{args.org}/{change.repo}.git"
-        patch_path = patch_root / change.patch_path
+    repo_urls = [args.remote_template.format(org=args.org, repo=change.repo) for change in plan.changes]
+    patch_paths = [patch_root / change.patch_path for change in plan.changes]
+    parent_stacks = [resolve_patch_stack(change, plan_path, patch_root) for change in plan.changes]
+    for patch_path in [*patch_paths, *(path for stack in parent_stacks for path, _ in stack)]:
         if not patch_path.exists():
             raise FileNotFoundError(f"Patch not found: {patch_path}")
 
-        print(f"--- {change.repo} ---")
-        if args.dry_run:
-            print(f"DRY RUN: would clone {repo_url}")
+    local_sources = [] if args.no_local_sources else [args.workspace_root / "deps", *args.local_source]
+
+    if args.dry_run and args.validate:
+        checks = run_pool(
+            lambda index: validate_change(
+                plan.changes[index],
+                repo_url=repo_urls[index],
+                patch_path=patch_paths[index],
+                base_branch=args.base_branch,
+                token=token,
+                local_sources=local_sources,
+                parent_patches=parent_stacks[index],
+            ),
+            list(range(len(plan.changes))),
+            args.jobs,
+        )
+        print_patch_checks(checks)
+        return 0 if all(check.applies for check in checks) else 1
+
+    if args.dry_run:
+        for change, repo_url, patch_path, stack in zip(plan.changes, repo_urls, patch_paths, parent_stacks):
+            print(f"--- {change.repo} ---")
+            local_source = find_local_source(change.repo, change.base_sha, local_sources)
+            if local_source is not None:
+                if is_partial_clone(local_source):
+                    print(f"DRY RUN: would borrow objects from {local_source} (missing blobs from {repo_url})")
+                else:
+                    print(f"DRY RUN: would borrow objects from {local_source} (no network fetch)")
+            elif args.clone_mode == "minimal":
+                print(f"DRY RUN: would fetch {change.base_sha or args.base_branch} from {repo_url} (depth 1)")
+            else:
+                print(f"DRY RUN: would clone {repo_url}")
             if change.base_sha:
                 print(f"DRY RUN: would checkout {change.branch} at {change.base_sha}")
             else:
                 print("DRY RUN: no base_sha provided; would keep cloned branch tip")
+            for parent_path, _ in stack:
+                print(f"DRY RUN: would apply stacked parent patch {parent_path}")
             print(f"DRY RUN: would apply patch {patch_path}")
             print(f"DRY RUN: would commit '{change.commit_message}' on {change.branch}")
             print(f"DRY RUN: would open PR to {args.base_branch}")
-            continue
-
-        repo_dir = clone_repo(work_dir, repo_url, change.branch, token)
-        if change.base_sha:
-            checkout_base(repo_dir, change.branch, change.base_sha)
-        assert_base_sha(repo_dir, change.base_sha)
-        apply_patch(repo_dir, patch_path)
-
-        if not has_changes(repo_dir):
-            print("No changes after patch apply; skipping push and PR.")
-            continue
-
-        commit_and_push(repo_dir, change.commit_message, change.branch)
-        pr_body = (
-            f"Automated cross-repo publication for bundle `{plan.bundle}`.\n\n"
-            f"Applied patch: `{change.patch_path}`\n"
-            f"Base SHA: `{change.base_sha or 'not specified'}`\n"
-        )
-        pr_url = open_pr(repo_dir, change.branch, args.base_branch, change.commit_message, pr_body)
-        print(f"Opened PR: {pr_url}")
+        return 0
+
+    # Phase 1: clone/apply/commit every change locally. Nothing is pushed unless all succeed,
+    # so one broken patch cannot leave the bundle half-published across repos.
+    results = run_pool(
+        lambda index: prepare_change(
+            plan.changes[index],
+            index,
+            work_dir=work_dir,
+            repo_url=repo_urls[index],
+            patch_path=patch_paths[index],
+            token=token or "",
+            clone_mode=args.clone_mode,
+            base_branch=args.base_branch,
+            local_sources=local_sources,
+            parent_patches=parent_stacks[index],
+        ),
+        list(range(len(plan.changes))),
+        args.jobs,
+    )
 
-    return 0
+    if any(result.status == "failed" for result in results):
+        results = [
+            replace(result, status="not-published") if result.status == "prepared" else result
+            for result in results
+        ]
+        write_change_logs(results)
+        print_result_table(results)
+        print("\nPublication aborted: at least one change failed to prepare; nothing was pushed.")
+        return 1
+
+    # Phase 2: push + open PRs
+    results = run_pool(
+        lambda result: (
+            publish_change(result, bundle=plan.bundle, base_branch=args.base_branch)
+            if result.status == "prepared"
+            else result
+        ),
+        results,
+        args.jobs,
+    )
+    write_change_logs(results)
+    print_result_table(results)
+    return 1 if any(result.status == "failed" for result in results) else 0
 
 
 if __name__ == "__main__":
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""Full-text search over ADRs, dependency contracts and upstream context snapshots.
+
+The corpus is indexed into a local SQLite FTS5 database. Every run first brings
+the index up to date: files whose mtime and size are unchanged are skipped
+without being read, and files are only re-tokenized when their content hash
+changes.
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+DEFAULT_ROOT = Path(__file__).resolve().parents[1]
+SEARCH_DIRS = ("docs/adr", "docs/context/deps", "docs/context/snapshots")
+DEFAULT_DB = Path(
+    os.environ.get("DOC_SEARCH_DB", str(DEFAULT_ROOT / ".cache" / "doc_search.sqlite3"))
+).expanduser()
+SCHEMA_VERSION = 1  # bump whenever the tables or tokenizer change
+RE_TITLE = re.compile(r"^(?:#\s+|\*\*Title:\*\*\s*)(.+?)\s*$", re.MULTILINE)
+
+
+@dataclasses.dataclass(frozen=True)
+class IndexStats:
+    added: int
+    updated: int
+    removed: int
+    unchanged: int
+
+
+@dataclasses.dataclass(frozen=True)
+class SearchHit:
+    path: str
+    title: str
+    snippet: str
+    score: float
+
+
+def open_index(db_path: Path) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        conn.executescript(
+            f"""
+            DROP TABLE IF EXISTS files;
+            DROP TABLE IF EXISTS docs;
+            CREATE TABLE files (
+                id INTEGER PRIMARY KEY,
+                path TEXT NOT NULL UNIQUE,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE docs USING fts5(
+                path UNINDEXED, title, body, tokenize = 'porter unicode61'
+            );
+            PRAGMA user_version = {SCHEMA_VERSION};
+            """
+        )
+    return conn
+
+
+def iter_corpus(root: Path):
+    for rel_dir in SEARCH_DIRS:
+        base = root / rel_dir
+        if base.is_dir():
+            yield from sorted(p for p in base.rglob("*.md") if p.is_file())
+
+
+def extract_title(text: str, path: Path) -> str:
+    m = RE_TITLE.search(text)
+    return m.group(1).strip() if m else path.stem
+
+
+def update_index(conn: sqlite3.Connection, root: Path) -> IndexStats:
+    """Sync the index with the files under SEARCH_DIRS in one transaction."""
+    known = {
+        path: (file_id, mtime_ns, size, digest)
+        for file_id, path, mtime_ns, size, digest in conn.execute(
+            "SELECT id, path, mtime_ns, size, sha256 FROM files"
+        )
+    }
+    added = updated = unchanged = 0
+    seen: set[str] = set()
+
+    with conn:
+        for path in iter_corpus(root):
+            rel = path.relative_to(root).as_posix()
+            seen.add(rel)
+            st = path.stat()
+            entry = known.get(rel)
+            if entry and entry[1] == st.st_mtime_ns and entry[2] == st.st_size:
+                unchanged += 1
+                continue
+
+            raw = path.read_bytes()
+            digest = hashlib.sha256(raw).hexdigest()
+            if entry and entry[3] == digest:
+                conn.execute(
+                    "UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?",
+                    (st.st_mtime_ns, st.st_size, entry[0]),
+                )
+                unchanged += 1
+                continue
+
+            text = raw.decode("utf-8", errors="replace")
+            if entry:
+                conn.execute(
+                    "UPDATE files SET mtime_ns = ?, size = ?, sha256 = ? WHERE id = ?",
+                    (st.st_mtime_ns, st.st_size, digest, entry[0]),
+                )
+                conn.execute("DELETE FROM docs WHERE rowid = ?", (entry[0],))
+                file_id = entry[0]
+                updated += 1
+            else:
+                file_id = conn.execute(
+                    "INSERT INTO files (path, mtime_ns, size, sha256) VALUES (?, ?, ?, ?)",
+                    (rel, st.st_mtime_ns, st.st_size, digest),
+                ).lastrowid
+                added += 1
+            conn.execute(
+                "INSERT INTO docs (rowid, path, title, body) VALUES (?, ?, ?, ?)",
+                (file_id, rel, extract_title(text, path), text),
+            )
+
+        removed = [(entry[0],) for rel, entry in known.items() if rel not in seen]
+        conn.executemany("DELETE FROM docs WHERE rowid = ?", removed)
+        conn.executemany("DELETE FROM files WHERE id = ?", removed)
+
+    return IndexStats(added=added, updated=updated, removed=len(removed), unchanged=unchanged)
+
+
+def quote_terms(query: str) -> str:
+    """Turn free text into an FTS5 query that matches all words literally."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+def search(conn: sqlite3.Connection, query: str, limit: int = 10) -> list[SearchHit]:
+    """
+    Return the best matches for query, title matches ranked above body matches.
+
+    query uses FTS5 syntax (`units AND contract`, `"phase screen"`, `adapt*`). Text
+    that is not valid FTS5 syntax is searched as plain words instead.
+    """
+    sql = """
+        SELECT path, title, snippet(docs, 2, '[', ']', ' ... ', 12), bm25(docs, 0.0, 5.0, 1.0) AS score
+        FROM docs WHERE docs MATCH ? ORDER BY score LIMIT ?
+    """
+    try:
+        rows = conn.execute(sql, (query, limit)).fetchall()
+    except sqlite3.OperationalError:
+        rows = conn.execute(sql, (quote_terms(query), limit)).fetchall()
+    return [
+        SearchHit(path=path, title=title, snippet=" ".join(snippet.split()), score=score)
+        for path, title, snippet, score in rows
+    ]
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Search docs/adr, docs/context/deps and docs/context/snapshots."
+    )
+    parser.add_argument("query", nargs="*", help="FTS5 query; plain words match all of them.")
+    parser.add_argument("--root", type=Path, default=DEFAULT_ROOT, help="Workspace root.")
+    parser.add_argument(
+        "--db",
+        type=Path,
+        default=DEFAULT_DB,
+        help="Index database (default: $DOC_SEARCH_DB or .cache/doc_search.sqlite3).",
+    )
+    parser.add_argument("--limit", "-n", type=int, default=10, help="Maximum number of results.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines.")
+    parser.add_argument(
+        "--no-update",
+        action="store_true",
+        help="Query the index as it is, without checking files for changes first.",
+    )
+    args = parser.parse_args(argv)
+    args.query = " ".join(args.query) or None
+    if args.query is None and args.no_update:
+        parser.error("nothing to do: pass a query or drop --no-update")
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    conn = open_index(args.db)
+    try:
+        if not args.no_update:
+            started = time.perf_counter()
+            stats = update_index(conn, args.root)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if args.query is None or stats.added or stats.updated or stats.removed:
+                print(
+                    f"Indexed {stats.added} new, {stats.updated} changed, {stats.removed} removed, "
+                    f"{stats.unchanged} unchanged files in {elapsed_ms:.0f} ms",
+                    file=sys.stderr,
+                )
+        if args.query is None:
+            return 0
+
+        started = time.perf_counter()
+        hits = search(conn, args.query, args.limit)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    finally:
+        conn.close()
+
+    for hit in hits:
+        if args.json:
+            print(json.dumps(dataclasses.asdict(hit)))
+        else:
+            print(f"{hit.path}  {hit.title}\n    {hit.snippet}")
+    print(f"{len(hits)} result(s) in {elapsed_ms:.1f} ms", file=sys.stderr)
+    return 0 if hits else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
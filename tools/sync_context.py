@@ -3,16 +3,38 @@ from __future__ import annotations
 import argparse
 import dataclasses
 import datetime as dt
+import hashlib
 import json
+import os
+import re
+import tarfile
+import tempfile
+import threading
 import urllib.error
 import urllib.parse
 import urllib.request
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
 
 ROOT = Path(__file__).resolve().parents[1]
 SOURCES_FILE = ROOT / "docs" / "context" / "sources.yml"
 SNAPSHOTS_ROOT = ROOT / "docs" / "context" / "snapshots"
+INDEX_JSON_NAME = "index.json"  # machine-readable sync state next to INDEX.md
+
+# Base URLs are overridable so the sync can run against a mirror or a local stand-in server.
+API_BASE = os.environ.get("SYNC_CONTEXT_API_BASE", "https://api.github.com").rstrip("/")
+RAW_BASE = os.environ.get("SYNC_CONTEXT_RAW_BASE", "https://raw.githubusercontent.com").rstrip("/")
+DEFAULT_JOBS = int(os.environ.get("SYNC_CONTEXT_JOBS", "8"))  # concurrent HTTP requests
+HTTP_TIMEOUT_S = int(os.environ.get("SYNC_CONTEXT_HTTP_TIMEOUT_S", "30"))
+USE_HTTP_CACHE = os.environ.get("SYNC_CONTEXT_HTTP_CACHE", "1") == "1"  # conditional requests via ETag
+HTTP_CACHE_DIR = Path(
+    os.environ.get("SYNC_CONTEXT_CACHE_DIR", str(Path.home() / ".cache" / "cpa-architecture" / "http"))
+)
+HTTP_CACHE_MAX_MB = int(os.environ.get("SYNC_CONTEXT_CACHE_MAX_MB", "64"))
+SOURCE_MODES = ("raw", "archive")  # one request per file, or one tarball per source
+GLOB_CHARS = frozenset("*?[")
 
 
 @dataclasses.dataclass(frozen=True)
@@ -20,6 +42,7 @@ class SourceSpec:
     repo: str
     ref: str
     paths: list[str]
+    mode: str = "raw"
 
 
 def parse_sources_file(path: Path) -> list[SourceSpec]:
@@ -30,8 +53,11 @@ def parse_sources_file(path: Path) -> list[SourceSpec]:
     sources:
       - repo: owner/name
         ref: branch-or-tag
+        mode: archive        # optional; default "raw"
         paths:
           - file.md
+          - docs/adr/          # directory: every file below it
+          - docs/**/*.md       # glob: `**` spans directories
     """
 
     lines = path.read_text(encoding="utf-8").splitlines()
@@ -56,7 +82,10 @@ def parse_sources_file(path: Path) -> list[SourceSpec]:
             raise ValueError("Each source requires a non-empty 'ref'")
         if not isinstance(paths, list) or not paths or not all(isinstance(p, str) and p for p in paths):
             raise ValueError("Each source requires a non-empty string list for 'paths'")
-        specs.append(SourceSpec(repo=repo, ref=ref, paths=paths))
+        mode = current.get("mode", "raw")
+        if mode not in SOURCE_MODES:
+            raise ValueError(f"Source {repo} has unknown mode {mode!r}; expected one of {SOURCE_MODES}")
+        specs.append(SourceSpec(repo=repo, ref=ref, paths=paths, mode=mode))
         current = None
 
     for raw_line in lines:
@@ -121,16 +150,131 @@ def parse_sources_file(path: Path) -> list[SourceSpec]:
     return specs
 
 
-def _http_get(url: str, headers: dict[str, str] | None = None) -> bytes:
-    req = urllib.request.Request(url, headers=headers or {})
-    with urllib.request.urlopen(req) as response:  # noqa: S310 - URL built from trusted config
-        return response.read()
+class HttpCache:
+    """On-disk cache of GET responses keyed by URL, revalidated with ETag / Last-Modified.
 
+    Each entry is `<sha256(url)>.json` (validators) plus `<sha256(url)>.body`. Entries are
+    written atomically so concurrent fetches are safe; evict() trims the least recently
+    used entries (by mtime) down to max_bytes.
+    """
 
-def fetch_ref_sha(repo: str, ref: str) -> str | None:
-    api_url = f"https://api.github.com/repos/{repo}/commits/{urllib.parse.quote(ref, safe='')}"
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.root / f"{key}.json", self.root / f"{key}.body"
+
+    def validators(self, url: str) -> dict[str, str]:
+        meta_path, body_path = self._paths(url)
+        if not meta_path.exists() or not body_path.exists():
+            return {}
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def lookup(self, url: str) -> bytes | None:
+        """Return the stored body without revalidating; only valid for immutable URLs."""
+        meta_path, body_path = self._paths(url)
+        if not meta_path.exists() or not body_path.exists():
+            return None
+        return self.hit(url)
+
+    def hit(self, url: str) -> bytes:
+        meta_path, body_path = self._paths(url)
+        body = body_path.read_bytes()
+        for path in (meta_path, body_path):
+            path.touch()
+        with self._lock:
+            self.hits += 1
+        return body
+
+    def store(
+        self, url: str, body: bytes, etag: str | None, last_modified: str | None, immutable: bool = False
+    ) -> None:
+        with self._lock:
+            self.misses += 1
+        if not etag and not last_modified and not immutable:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        meta_path, body_path = self._paths(url)
+        meta = {"url": url, "etag": etag, "last_modified": last_modified}
+        # body first, so a reader never sees validators without the matching body
+        _atomic_write(body_path, body)
+        _atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def evict(self) -> list[Path]:
+        if not self.root.exists():
+            return []
+        entries = []
+        for meta_path in self.root.glob("*.json"):
+            body_path = meta_path.with_suffix(".body")
+            size = sum(path.stat().st_size for path in (meta_path, body_path) if path.exists())
+            entries.append((meta_path.stat().st_mtime, meta_path, body_path, size))
+        entries.sort(key=lambda entry: entry[0], reverse=True)
+
+        total = 0
+        evicted: list[Path] = []
+        for _, meta_path, body_path, size in entries:
+            total += size
+            if total > self.max_bytes:
+                meta_path.unlink(missing_ok=True)
+                body_path.unlink(missing_ok=True)
+                evicted.append(meta_path)
+        return evicted
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}-", dir=path.parent)
+    with os.fdopen(fd, "wb") as handle:
+        handle.write(data)
+    os.replace(tmp_name, path)
+
+
+def _http_get(
+    url: str,
+    headers: dict[str, str] | None = None,
+    cache: HttpCache | None = None,
+    immutable: bool = False,
+) -> bytes:
+    """GET url, revalidating cached copies; immutable URLs (pinned to a commit SHA) skip the request."""
+    if cache is not None and immutable:
+        cached = cache.lookup(url)
+        if cached is not None:
+            return cached
+    request_headers = dict(headers or {})
+    if cache is not None:
+        request_headers.update(cache.validators(url))
+    req = urllib.request.Request(url, headers=request_headers)
     try:
-        body = _http_get(api_url, headers={"Accept": "application/vnd.github+json"})
+        with urllib.request.urlopen(req, timeout=HTTP_TIMEOUT_S) as response:  # noqa: S310 - URL built from trusted config
+            body = response.read()
+            if cache is not None:
+                cache.store(
+                    url, body, response.headers.get("ETag"), response.headers.get("Last-Modified"), immutable
+                )
+            return body
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304 and cache is not None:
+            return cache.hit(url)
+        raise
+
+
+def fetch_ref_sha(repo: str, ref: str, cache: HttpCache | None = None) -> str | None:
+    api_url = f"{API_BASE}/repos/{repo}/commits/{urllib.parse.quote(ref, safe='')}"
+    try:
+        body = _http_get(api_url, headers={"Accept": "application/vnd.github+json"}, cache=cache)
     except urllib.error.HTTPError:
         return None
     except urllib.error.URLError:
@@ -145,51 +289,342 @@ def fetch_ref_sha(repo: str, ref: str) -> str | None:
     return sha if isinstance(sha, str) else None
 
 
-def fetch_raw_markdown(repo: str, ref: str, path: str) -> str:
-    url = f"https://raw.githubusercontent.com/{repo}/{urllib.parse.quote(ref, safe='')}/{path}"
-    data = _http_get(url)
-    return data.decode("utf-8")
+def fetch_raw_file(
+    repo: str, ref: str, path: str, cache: HttpCache | None = None, immutable: bool = False
+) -> bytes:
+    """Raw bytes of one file; directory and glob entries may select images or other binaries."""
+    url = f"{RAW_BASE}/{repo}/{urllib.parse.quote(ref, safe='')}/{path}"
+    return _http_get(url, cache=cache, immutable=immutable)
 
 
-def sync_sources(sources: list[SourceSpec]) -> Path:
-    SNAPSHOTS_ROOT.mkdir(parents=True, exist_ok=True)
-    sync_time = dt.datetime.now(dt.timezone.utc).replace(microsecond=0).isoformat()
-    index_lines = [
-        "# Context snapshots index",
-        "",
-        f"- Sync date (UTC): {sync_time}",
-        "",
-        "## Sources",
-    ]
+def list_tree_files(repo: str, ref: str, cache: HttpCache | None = None, immutable: bool = True) -> list[str]:
+    """All blob paths of repo at ref, from one recursive tree listing.
 
-    for source in sources:
-        sha = fetch_ref_sha(source.repo, source.ref)
-        index_lines.append("")
-        index_lines.append(f"### {source.repo}@{source.ref}")
-        index_lines.append(f"- Commit SHA: {sha or 'unavailable'}")
-        index_lines.append("- Files:")
+    The listing of a commit SHA never changes, so with immutable=True it is served from
+    the cache without any request once fetched. Pass immutable=False for a branch or tag
+    name (e.g. when the SHA could not be resolved) so the listing is revalidated.
+    """
+    url = f"{API_BASE}/repos/{repo}/git/trees/{urllib.parse.quote(ref, safe='')}?recursive=1"
+    body = _http_get(url, headers={"Accept": "application/vnd.github+json"}, cache=cache, immutable=immutable)
+    payload = json.loads(body.decode("utf-8"))
+    if payload.get("truncated"):
+        raise ValueError(f"Tree listing of {repo}@{ref} is truncated; use 'mode: archive' for this source")
+    return sorted(entry["path"] for entry in payload.get("tree", []) if entry.get("type") == "blob")
+
+
+def is_glob(path: str) -> bool:
+    return any(char in GLOB_CHARS for char in path)
+
+
+def needs_listing(patterns: list[str]) -> bool:
+    """Literal file entries can be fetched directly; globs and `dir/` entries need the tree."""
+    return any(is_glob(pattern) or pattern.endswith("/") for pattern in patterns)
+
+
+def compile_selectors(patterns: list[str]) -> list[tuple[str, Callable[[str], bool]]]:
+    """One predicate per sources.yml entry: a glob, a `dir/` prefix, or a literal file (or directory)."""
+    selectors: list[tuple[str, Callable[[str], bool]]] = []
+    for pattern in patterns:
+        if is_glob(pattern):
+            selectors.append((pattern, glob_to_regex(pattern).match))
+        elif pattern.endswith("/"):
+            selectors.append((pattern, lambda path, prefix=pattern: path.startswith(prefix)))
+        else:
+            selectors.append(
+                (pattern, lambda path, literal=pattern: path == literal or path.startswith(literal + "/"))
+            )
+    return selectors
+
+
+def select_paths(repo: str, patterns: list[str], candidates: list[str]) -> list[str]:
+    """Resolve sources.yml entries against a file listing; non-glob entries must match something."""
+    selectors = compile_selectors(patterns)
+    selected = sorted(path for path in candidates if any(match(path) for _, match in selectors))
+    missing = [
+        pattern
+        for pattern, match in selectors
+        if not is_glob(pattern) and not any(match(path) for path in selected)
+    ]
+    if missing:
+        raise FileNotFoundError(f"{repo} has no {', '.join(missing)}")
+    return selected
+
+
+def glob_to_regex(pattern: str) -> re.Pattern[str]:
+    """Translate a path glob: `**` spans directories, `*` and `?` stay within one segment."""
+    parts: list[str] = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith("**/", index):
+            parts.append("(?:.*/)?")
+            index += 3
+            continue
+        if pattern.startswith("**", index):
+            parts.append(".*")
+            index += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            close = pattern.find("]", index + 1)
+            if close == -1:
+                parts.append(re.escape(char))
+            else:
+                parts.append(pattern[index : close + 1].replace("[!", "[^", 1))
+                index = close
+        else:
+            parts.append(re.escape(char))
+        index += 1
+    return re.compile("".join(parts) + r"\Z")
+
+
+def safe_relative_path(path: str) -> bool:
+    parts = path.split("/")
+    return bool(path) and not path.startswith("/") and ".." not in parts and "" not in parts
+
+
+def fetch_archive_files(repo: str, ref: str, patterns: list[str]) -> list[tuple[str, bytes]]:
+    """Stream the repo tarball at ref and return the members matching patterns, in path order.
+
+    The archive is read sequentially and never held in memory or on disk as a whole;
+    only matching regular files are read.
+    """
+    url = f"{API_BASE}/repos/{repo}/tarball/{urllib.parse.quote(ref, safe='')}"
+    selectors = compile_selectors(patterns)
+    found: dict[str, bytes] = {}
+
+    req = urllib.request.Request(url)
+    with urllib.request.urlopen(req, timeout=HTTP_TIMEOUT_S) as response:  # noqa: S310 - URL built from trusted config
+        with tarfile.open(fileobj=response, mode="r|*") as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                # GitHub tarballs nest everything under "<owner>-<repo>-<sha>/"
+                _, _, relative_path = member.name.partition("/")
+                if not safe_relative_path(relative_path):
+                    continue
+                if any(match(relative_path) for _, match in selectors):
+                    extracted = archive.extractfile(member)
+                    assert extracted is not None
+                    found[relative_path] = extracted.read()
+
+    select_paths(f"{repo}@{ref} archive", patterns, list(found))
+    return sorted(found.items())
 
-        repo_dir = SNAPSHOTS_ROOT / source.repo
-        for relative_path in source.paths:
-            destination = repo_dir / relative_path
-            destination.parent.mkdir(parents=True, exist_ok=True)
-            markdown = fetch_raw_markdown(source.repo, source.ref, relative_path)
-            destination.write_text(markdown, encoding="utf-8")
-            index_lines.append(f"  - `{source.repo}/{relative_path}`")
 
-    index_path = SNAPSHOTS_ROOT / "INDEX.md"
-    index_path.write_text("\n".join(index_lines) + "\n", encoding="utf-8")
-    return index_path
+@dataclasses.dataclass(frozen=True)
+class SyncReport:
+    index_path: Path
+    unchanged_sources: list[str]  # "repo@ref" skipped because the ref still resolves to the recorded SHA
+    written_files: list[str]  # "repo/path" whose bytes actually changed on disk
+    pruned_files: list[str] = dataclasses.field(default_factory=list)  # "repo/path" gone upstream
+
+
+def load_sync_index(snapshots_root: Path) -> dict[tuple[str, str], dict]:
+    """Read the machine-readable index.json from the previous sync, keyed by (repo, ref)."""
+    index_json = snapshots_root / INDEX_JSON_NAME
+    if not index_json.exists():
+        return {}
+    try:
+        payload = json.loads(index_json.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return {}
+    return {(entry["repo"], entry["ref"]): entry for entry in payload.get("sources", [])}
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """Write data to path only when the bytes differ, so unchanged files keep their mtime."""
+    if path.exists() and path.read_bytes() == data:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return True
+
+
+def prune_snapshots(snapshots_root: Path, previous: Iterable[dict], current: list[dict]) -> list[str]:
+    """Delete snapshot files recorded by the previous sync that no current source resolves to."""
+    keep = {f"{entry['repo']}/{relative_path}" for entry in current for relative_path in entry["files"]}
+    pruned: list[str] = []
+    for entry in previous:
+        for relative_path in entry.get("files", []):
+            key = f"{entry['repo']}/{relative_path}"
+            target = snapshots_root / entry["repo"] / relative_path
+            if key in keep or key in pruned or not target.is_file():
+                continue
+            target.unlink()
+            pruned.append(key)
+            # drop directories left empty, but never the repo's snapshot root itself
+            parent = target.parent
+            repo_dir = snapshots_root / entry["repo"]
+            while parent != repo_dir and parent.is_relative_to(repo_dir) and not any(parent.iterdir()):
+                parent.rmdir()
+                parent = parent.parent
+    return sorted(pruned)
+
+
+def render_index_markdown(entries: list[dict]) -> str:
+    lines = ["# Context snapshots index", "", "## Sources"]
+    for entry in entries:
+        lines.append("")
+        lines.append(f"### {entry['repo']}@{entry['ref']}")
+        lines.append(f"- Commit SHA: {entry['sha'] or 'unavailable'}")
+        lines.append(f"- Snapshot updated (UTC): {entry['updated_at']}")
+        lines.append("- Files:")
+        lines.extend(f"  - `{entry['repo']}/{relative_path}`" for relative_path in entry["files"])
+    return "\n".join(lines) + "\n"
+
+
+def sync_sources(
+    sources: list[SourceSpec],
+    snapshots_root: Path = SNAPSHOTS_ROOT,
+    jobs: int = DEFAULT_JOBS,
+    cache: HttpCache | None = None,
+) -> SyncReport:
+    """Resolve every source's ref to a SHA, then download files for sources whose SHA moved.
+
+    Sources still at the SHA recorded in index.json are skipped without any file
+    requests. Files are fetched from the immutable SHA URL and written only when
+    their bytes differ, and INDEX.md/index.json are only rewritten when they change,
+    so a no-op sync leaves the tree untouched. All requests share one pool of `jobs`
+    workers; results are consumed in sources.yml order, so the indexes do not depend
+    on completion order.
+    """
+    snapshots_root.mkdir(parents=True, exist_ok=True)
+    previous = load_sync_index(snapshots_root)
+    now = dt.datetime.now(dt.timezone.utc).replace(microsecond=0).isoformat()
+    entries: list[dict] = []
+    unchanged: list[str] = []
+    written: list[str] = []
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs), thread_name_prefix="sync-context") as pool:
+        shas = list(pool.map(lambda source: fetch_ref_sha(source.repo, source.ref, cache), sources))
+
+        changed: list[bool] = []
+        listings: dict[int, Future[list[str]]] = {}
+        for position, (source, sha) in enumerate(zip(sources, shas)):
+            recorded = previous.get((source.repo, source.ref))
+            repo_dir = snapshots_root / source.repo
+            changed.append(
+                not (
+                    sha
+                    and recorded
+                    and recorded.get("sha") == sha
+                    and recorded.get("mode", "raw") == source.mode
+                    and recorded.get("paths", recorded.get("files")) == source.paths
+                    and all((repo_dir / relative_path).exists() for relative_path in recorded.get("files", []))
+                )
+            )
+            if changed[-1] and source.mode == "raw" and needs_listing(source.paths):
+                listings[position] = pool.submit(
+                    list_tree_files, source.repo, sha or source.ref, cache, immutable=bool(sha)
+                )
+
+        # Per source: None when unchanged, else a callable yielding [(path, bytes)] once fetched.
+        pending: list[Callable[[], list[tuple[str, bytes]]] | None] = []
+        for position, (source, sha) in enumerate(zip(sources, shas)):
+            if not changed[position]:
+                pending.append(None)
+                continue
+            # Commit SHAs are immutable, so their raw URLs cache better than branch URLs.
+            pinned = sha or source.ref
+            if source.mode == "archive":
+                pending.append(pool.submit(fetch_archive_files, source.repo, pinned, source.paths).result)
+                continue
+            paths = source.paths
+            if position in listings:
+                paths = select_paths(f"{source.repo}@{pinned}", source.paths, listings[position].result())
+            futures = [
+                pool.submit(fetch_raw_file, source.repo, pinned, path, cache, bool(sha)) for path in paths
+            ]
+            pending.append(
+                lambda paths=paths, futures=futures: [
+                    (path, future.result()) for path, future in zip(paths, futures)
+                ]
+            )
+
+        for source, sha, collect in zip(sources, shas, pending):
+            recorded = previous.get((source.repo, source.ref)) or {}
+            updated_at = recorded.get("updated_at") or now
+            files = list(recorded.get("files", source.paths))
+            if collect is None:
+                unchanged.append(f"{source.repo}@{source.ref}")
+            else:
+                repo_dir = snapshots_root / source.repo
+                fetched = collect()
+                for relative_path, data in fetched:
+                    if write_if_changed(repo_dir / relative_path, data):
+                        written.append(f"{source.repo}/{relative_path}")
+                        updated_at = now
+                files = [relative_path for relative_path, _ in fetched]
+            entries.append(
+                {
+                    "repo": source.repo,
+                    "ref": source.ref,
+                    "mode": source.mode,
+                    "sha": sha or recorded.get("sha"),
+                    "updated_at": updated_at,
+                    "paths": list(source.paths),
+                    "files": files,
+                }
+            )
+
+    pruned = prune_snapshots(snapshots_root, previous.values(), entries)
+
+    index_path = snapshots_root / "INDEX.md"
+    write_if_changed(index_path, render_index_markdown(entries).encode("utf-8"))
+    index_json = {"schema_version": 1, "sources": entries}
+    write_if_changed(snapshots_root / INDEX_JSON_NAME, (json.dumps(index_json, indent=2) + "\n").encode("utf-8"))
+    if cache is not None:
+        cache.evict()
+    return SyncReport(
+        index_path=index_path, unchanged_sources=unchanged, written_files=written, pruned_files=pruned
+    )
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Sync dependency context snapshots")
     parser.add_argument("--sources", type=Path, default=SOURCES_FILE, help="Path to sources.yml")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help="Maximum concurrent HTTP requests (default: SYNC_CONTEXT_JOBS or 8).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=HTTP_CACHE_DIR,
+        help="HTTP cache directory (default: SYNC_CONTEXT_CACHE_DIR or ~/.cache/cpa-architecture/http).",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=HTTP_CACHE_MAX_MB,
+        help="Evict least-recently-used cache entries beyond this size (default: 64).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        default=not USE_HTTP_CACHE,
+        help="Always download in full instead of sending conditional requests.",
+    )
     args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be 1 or greater")
 
+    cache = None if args.no_cache else HttpCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
     sources = parse_sources_file(args.sources)
-    index_path = sync_sources(sources)
-    print(f"Synced {len(sources)} sources. Index written to {index_path}")
+    report = sync_sources(sources, jobs=args.jobs, cache=cache)
+    print(
+        f"Synced {len(sources)} sources ({len(report.unchanged_sources)} unchanged, "
+        f"{len(report.written_files)} files updated, {len(report.pruned_files)} pruned). "
+        f"Index written to {report.index_path}"
+    )
+    if cache is not None:
+        print(f"HTTP cache: {cache.hits} not modified (304), {cache.misses} downloaded")
 
 
 if __name__ == "__main__":
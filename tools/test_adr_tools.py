@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def load_adr_tools():
+    spec = importlib.util.spec_from_file_location("adr_tools", ROOT / "scripts" / "adr_tools.py")
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    spec.loader.exec_module(module)
+    return module
+
+
+def write_adr(adr_dir: Path, name: str, title: str, status: str = "Proposed") -> Path:
+    path = adr_dir / name
+    path.write_text(
+        f"**Title:** {title}\n\n- **Status:** {status}\n- **Date:** 2026-01-01\n- **Area:** ecosystem\n",
+        encoding="utf-8",
+    )
+    return path
+
+
+@pytest.fixture
+def adr_tools(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    module = load_adr_tools()
+    adr_dir = tmp_path / "docs" / "adr"
+    adr_dir.mkdir(parents=True)
+    monkeypatch.setattr(module, "ROOT", str(tmp_path))
+    monkeypatch.setattr(module, "ADR_DIR", str(adr_dir))
+    monkeypatch.setattr(module, "INDEX", str(adr_dir / "INDEX.md"))
+    monkeypatch.setattr(module, "META_CACHE", str(tmp_path / ".cache" / "adr_meta.json"))
+    write_adr(adr_dir, "ECO-0001-first.md", "First decision")
+    write_adr(adr_dir, "ECO-0002-second.md", "Second decision")
+    return module
+
+
+def reindex_args(**overrides) -> argparse.Namespace:
+    return argparse.Namespace(**{"series": "ECO", "check": False, "no_cache": False, **overrides})
+
+
+def test_reindex_reparses_only_changed_adrs(adr_tools, monkeypatch: pytest.MonkeyPatch) -> None:
+    parsed: list[str] = []
+    real_parse = adr_tools.parse_adr
+    monkeypatch.setattr(adr_tools, "parse_adr", lambda lines: parsed.append(lines) or real_parse(lines))
+
+    assert adr_tools.cmd_reindex(reindex_args()) == 0
+    assert len(parsed) == 2
+
+    parsed.clear()
+    assert adr_tools.cmd_reindex(reindex_args()) == 0
+    assert parsed == []
+
+    adr_dir = Path(adr_tools.ADR_DIR)
+    second = adr_dir / "ECO-0002-second.md"
+    os.utime(second, ns=(1, 1))  # touched but identical: hash check, no re-parse
+    write_adr(adr_dir, "ECO-0001-first.md", "First decision, revised", status="Accepted")
+    assert adr_tools.cmd_reindex(reindex_args()) == 0
+    assert len(parsed) == 1
+    index = Path(adr_tools.INDEX).read_text(encoding="utf-8")
+    assert "| [ECO-0001](ECO-0001-first.md) | First decision, revised | Accepted |" in index
+
+
+def test_reindex_check_reports_stale_index_without_writing(adr_tools, capsys) -> None:
+    assert adr_tools.cmd_reindex(reindex_args()) == 0
+    assert adr_tools.cmd_reindex(reindex_args(check=True)) == 0
+
+    write_adr(Path(adr_tools.ADR_DIR), "ECO-0003-third.md", "Third decision")
+    before = Path(adr_tools.INDEX).read_text(encoding="utf-8")
+    capsys.readouterr()
+
+    assert adr_tools.cmd_reindex(reindex_args(check=True)) == 1
+    assert "is stale" in capsys.readouterr().out
+    assert Path(adr_tools.INDEX).read_text(encoding="utf-8") == before
+
+
+def test_reindex_series_share_metadata_cache(adr_tools, monkeypatch: pytest.MonkeyPatch) -> None:
+    adr_dir = Path(adr_tools.ADR_DIR)
+    write_adr(adr_dir, "0001-local.md", "Local decision")
+    parsed: list[str] = []
+    real_parse = adr_tools.parse_adr
+    monkeypatch.setattr(adr_tools, "parse_adr", lambda lines: parsed.append(lines) or real_parse(lines))
+
+    assert adr_tools.cmd_reindex(reindex_args()) == 0
+    assert adr_tools.cmd_reindex(reindex_args(series="numeric")) == 0
+    assert len(parsed) == 3
+
+    parsed.clear()
+    assert adr_tools.cmd_reindex(reindex_args()) == 0
+    assert adr_tools.cmd_reindex(reindex_args(series="numeric")) == 0
+    assert parsed == []
+
+    (adr_dir / "ECO-0002-second.md").unlink()
+    assert adr_tools.cmd_reindex(reindex_args(series="numeric")) == 0
+    cache = json.loads(Path(adr_tools.META_CACHE).read_text(encoding="utf-8"))
+    assert sorted(cache["entries"]) == ["docs/adr/0001-local.md", "docs/adr/ECO-0001-first.md"]
+
+
+def test_reindex_check_does_not_write_metadata_cache(adr_tools) -> None:
+    assert adr_tools.cmd_reindex(reindex_args()) == 0
+    cache = Path(adr_tools.META_CACHE)
+    cache.unlink()
+
+    assert adr_tools.cmd_reindex(reindex_args(check=True)) == 0
+    assert not cache.exists()
+
+
+def test_parse_adr_returns_typed_record_without_reading_body() -> None:
+    adr_tools = load_adr_tools()
+    header = [
+        "**Title:** Shared units contract.",
+        "",
+        "- **ADR ID:** ECO-0009",
+        "- **Status:** Accepted",
+        "- **Date:** 2026-03-01",
+        "- **Area:** ecosystem",
+        "- **Related:** `docs/adr/x.md` (ADR-0001)",
+        "- **Tags:** api, physics",
+        "- **Impacted repos:** cpa-sim, phys-pipeline",
+        "- **Related ecosystem ADRs:** ECO-0004, ECO-0001",
+        "",
+    ]
+
+    def lines():
+        yield from header
+        raise AssertionError("parser read past the header block")
+
+    record = adr_tools.parse_adr(lines())
+
+    assert record == adr_tools.AdrRecord(
+        title="Shared units contract.",
+        status="Accepted",
+        date="2026-03-01",
+        area="ecosystem",
+        tags=("api", "physics"),
+        impacted_repos=("cpa-sim", "phys-pipeline"),
+        related=("ADR-0001", "ECO-0004", "ECO-0001"),
+    )
+
+
+def test_parse_adr_reads_local_adr_title_and_upstream_references() -> None:
+    adr_tools = load_adr_tools()
+    text = """# ADR-0007-units-and-symbol-contract
+
+**Status:** `Accepted`
+**Date:** `2026-02-20`
+
+## Upstream references
+- `ECO-0001` — cpa-architecture/docs/adr/ECO-0001-conventions-units.md
+
+## Decision summary (local)
+- Mentions ECO-0003 in passing, which is not an adoption.
+"""
+
+    record = adr_tools.parse_adr(text.splitlines())
+
+    assert record.title == "ADR-0007-units-and-symbol-contract"
+    assert (record.status, record.date) == ("Accepted", "2026-02-20")
+    assert record.related == ("ECO-0001",)
+
+
+def make_dep_repo(deps_dir: Path, name: str, adrs: dict[str, str]) -> Path:
+    repo = deps_dir / name
+    adr_dir = repo / "docs" / "adr"
+    adr_dir.mkdir(parents=True)
+    for filename, text in adrs.items():
+        (adr_dir / filename).write_text(text, encoding="utf-8")
+    for cmd in (
+        ["git", "init", "-q"],
+        ["git", "add", "-A"],
+        ["git", "-c", "user.name=t", "-c", "user.email=t@e", "commit", "-q", "-m", "init"],
+    ):
+        subprocess.run(cmd, cwd=repo, check=True)
+    return repo
+
+
+def test_aggregate_reports_adoption_and_rescans_only_moved_repos(
+    adr_tools, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    adr_dir = Path(adr_tools.ADR_DIR)
+    (adr_dir / "ECO-0002-second.md").write_text(
+        "**Title:** Second decision\n\n- **Status:** Accepted\n- **Impacted repos:** cpa-sim, phys-pipeline\n",
+        encoding="utf-8",
+    )
+    deps_dir = tmp_path / "deps"
+    local_adr = "# ADR-0003-units\n\n**Status:** Accepted\n\n## Upstream references\n- `ECO-0002`\n"
+    make_dep_repo(deps_dir, "cpa-sim", {"ADR-0003-units.md": local_adr})
+    pipeline = make_dep_repo(deps_dir, "phys-pipeline", {"ADR-0001-layout.md": "# ADR-0001-layout\n"})
+    monkeypatch.setattr(adr_tools, "DEPS_DIR", str(deps_dir))
+    monkeypatch.setattr(adr_tools, "AGGREGATE_CACHE", str(tmp_path / ".cache" / "adr_aggregate.json"))
+    out = tmp_path / "ADOPTION.md"
+    args = argparse.Namespace(output=str(out), jobs=2, no_cache=False)
+
+    assert adr_tools.cmd_aggregate(args) == 0
+    text = out.read_text(encoding="utf-8")
+    assert "| ECO ADR | Title | Status | cpa-sim | phys-pipeline |" in text
+    assert "| [ECO-0002](ECO-0002-second.md) | Second decision | Accepted | ADR-0003 (Accepted) | missing |" in text
+    assert "| [ECO-0001](ECO-0001-first.md) | First decision | Proposed | - | - |" in text
+
+    scanned: list[str] = []
+    real_read = adr_tools.read_adr
+    monkeypatch.setattr(adr_tools, "read_adr", lambda p: scanned.append(p) or real_read(p))
+    assert adr_tools.cmd_aggregate(args) == 0
+    assert scanned == []
+
+    (pipeline / "docs" / "adr" / "ADR-0002-adopt.md").write_text(
+        "# ADR-0002-adopt\n\n**Status:** Proposed\n**Related:** ECO-0002\n", encoding="utf-8"
+    )
+    subprocess.run(["git", "add", "-A"], cwd=pipeline, check=True)
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@e", "commit", "-q", "-m", "adopt"],
+        cwd=pipeline,
+        check=True,
+    )
+    assert adr_tools.cmd_aggregate(args) == 0
+    assert {Path(p).parents[2].name for p in scanned} == {"phys-pipeline"}
+    assert "| ADR-0003 (Accepted) | ADR-0002 (Proposed) |" in out.read_text(encoding="utf-8")
@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from tools import bootstrap
+
+
+def run(cmd: list[str], cwd: Path) -> str:
+    result = subprocess.run(cmd, cwd=cwd, check=True, text=True, capture_output=True)
+    return result.stdout.strip()
+
+
+def make_upstream(root: Path, name: str) -> Path:
+    """Create a bare upstream repo with one commit on main, reachable via file://."""
+    src = root / "src" / name
+    src.mkdir(parents=True)
+    run(["git", "init", "-b", "main"], cwd=src)
+    run(["git", "config", "user.name", "Test User"], cwd=src)
+    run(["git", "config", "user.email", "test@example.com"], cwd=src)
+    (src / "README.md").write_text(f"{name}\n", encoding="utf-8")
+    run(["git", "add", "README.md"], cwd=src)
+    run(["git", "commit", "-m", "initial"], cwd=src)
+
+    bare = root / "upstream" / f"{name}.git"
+    bare.parent.mkdir(parents=True, exist_ok=True)
+    run(["git", "clone", "--bare", str(src), str(bare)], cwd=root)
+    return bare
+
+
+@pytest.fixture
+def workspace(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    names = ["repo-c", "repo-a", "repo-b"]
+    entries = []
+    for name in names:
+        bare = make_upstream(tmp_path, name)
+        entries.append(f'[[repo]]\nname = "{name}"\nurl  = "{bare.as_uri()}"\nref  = "main"\n')
+
+    manifest = tmp_path / "manifest" / "repos.toml"
+    manifest.parent.mkdir(parents=True)
+    manifest.write_text("\n".join(entries), encoding="utf-8")
+
+    monkeypatch.setattr(bootstrap, "MANIFEST", manifest)
+    monkeypatch.setattr(bootstrap, "REFS_LOCK", tmp_path / "manifest" / "refs.lock")
+    monkeypatch.setattr(bootstrap, "DEPS_DIR", tmp_path / "deps")
+    monkeypatch.setattr(bootstrap, "CONFIGURE_PUSH_URL", False)
+    return tmp_path
+
+
+def test_bootstrap_parallel_groups_logs_in_name_order(
+    workspace: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    assert bootstrap.main(["--jobs", "3"]) == 0
+
+    out = capsys.readouterr().out
+    starts = [out.index(f"=== {name} @ main ===") for name in ("repo-a", "repo-b", "repo-c")]
+    oks = [out.index(f"=== OK {name} ===") for name in ("repo-a", "repo-b", "repo-c")]
+    assert starts == sorted(starts)
+    # Each repo's block is contiguous: it finishes before the next one starts.
+    assert oks[0] < starts[1] and oks[1] < starts[2]
+
+    lock = (workspace / "manifest" / "refs.lock").read_text(encoding="utf-8").splitlines()
+    assert [line.split()[0] for line in lock[2:]] == ["repo-a", "repo-b", "repo-c"]
+
+
+def test_bootstrap_parallel_reports_failures_and_skips_lock(
+    workspace: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    manifest = workspace / "manifest" / "repos.toml"
+    missing = (workspace / "upstream" / "missing.git").as_uri()
+    manifest.write_text(
+        manifest.read_text(encoding="utf-8") + f'\n[[repo]]\nname = "missing"\nurl  = "{missing}"\n',
+        encoding="utf-8",
+    )
+
+    assert bootstrap.main(["--jobs", "4"]) == 4
+
+    out = capsys.readouterr().out
+    assert "BOOTSTRAP SUMMARY: PARTIAL FAILURE" in out
+    assert "missing: FAILED" in out
+    assert "=== OK repo-c ===" in out
+    assert not (workspace / "manifest" / "refs.lock").exists()
+
+
+def test_bootstrap_mirror_cache_seeds_clones_and_reports_size(
+    workspace: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    mirrors = workspace / "mirrors"
+    assert bootstrap.main(["--mirror-cache", "--mirror-dir", str(mirrors)]) == 0
+
+    assert sorted(p.name for p in mirrors.iterdir()) == ["repo-a.git", "repo-b.git", "repo-c.git"]
+    clone = workspace / "deps" / "repo-a"
+    assert (clone / "README.md").read_text(encoding="utf-8") == "repo-a\n"
+    # Dissociated by default: the clone must survive mirror eviction.
+    assert not (clone / ".git" / "objects" / "info" / "alternates").exists()
+    origin = run(["git", "remote", "get-url", "origin"], cwd=clone)
+    assert origin == (workspace / "upstream" / "repo-a.git").as_uri()
+
+    # Second run takes the update path and refreshes the existing mirrors.
+    assert bootstrap.main(["--mirror-cache", "--mirror-dir", str(mirrors), "--jobs", "2"]) == 0
+    capsys.readouterr()
+
+    assert bootstrap.main(["--mirror-status", "--mirror-dir", str(mirrors)]) == 0
+    out = capsys.readouterr().out
+    assert "repo-b" in out
+    assert "(3 mirrors)" in out
+
+    assert bootstrap.main(["--mirror-max-mb", "0", "--mirror-dir", str(mirrors)]) == 0
+    assert "Evicted mirror repo-a" in capsys.readouterr().out
+    assert list(mirrors.iterdir()) == []
+
+
+def add_upstream_commit(workspace: Path, name: str, content: str) -> str:
+    src = workspace / "src" / name
+    (src / "README.md").write_text(content, encoding="utf-8")
+    run(["git", "commit", "-am", f"update {name}"], cwd=src)
+    run(["git", "push", str(workspace / "upstream" / f"{name}.git"), "main"], cwd=src)
+    return run(["git", "rev-parse", "HEAD"], cwd=src)
+
+
+def test_bootstrap_locked_materializes_pinned_shas(
+    workspace: Path, capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    assert bootstrap.main([]) == 0
+    lock_path = workspace / "manifest" / "refs.lock"
+    pinned = bootstrap.read_refs_lock(lock_path)
+
+    # Upstream moves on; locked mode must ignore the new tip.
+    add_upstream_commit(workspace, "repo-a", "moved\n")
+    capsys.readouterr()
+
+    assert bootstrap.main(["--locked"]) == 0
+    out = capsys.readouterr().out
+    assert out.count("already at locked SHA; skipping fetch.") == 3
+    assert "Locked mode: left" in out
+    assert bootstrap.read_refs_lock(lock_path) == pinned
+
+    # Fresh workspace: the pinned commit is no longer a branch tip, and protocol v0 servers
+    # refuse want-by-SHA for non-tips, so the branch-history fallback kicks in.
+    shutil.rmtree(workspace / "deps")
+    for key, value in {
+        "GIT_CONFIG_COUNT": "1",
+        "GIT_CONFIG_KEY_0": "protocol.version",
+        "GIT_CONFIG_VALUE_0": "0",
+    }.items():
+        monkeypatch.setitem(bootstrap._GIT_ENV, key, value)
+    assert bootstrap.main(["--locked", "--jobs", "3"]) == 0
+    out = capsys.readouterr().out
+    assert "Server refused fetch by SHA for repo-a" in out
+    for name, sha in pinned.items():
+        assert run(["git", "rev-parse", "HEAD"], cwd=workspace / "deps" / name) == sha
+    assert (workspace / "deps" / "repo-a" / "README.md").read_text(encoding="utf-8") == "repo-a\n"
+
+
+def test_bootstrap_locked_requires_lock_entry(workspace: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    lock_path = workspace / "manifest" / "refs.lock"
+    lock_path.write_text("# header\nrepo-a " + "0" * 40 + "\n", encoding="utf-8")
+
+    assert bootstrap.main(["--locked"]) == 4
+    out = capsys.readouterr().out
+    assert "repo-b: ERROR RuntimeError: repo-b has no entry in" in out
+    assert "repo-a: ERROR RuntimeError: Locked SHA" in out
+
+
+def test_bootstrap_fast_path_skips_repos_at_remote_tip(
+    workspace: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    assert bootstrap.main([]) == 0
+    assert "Repos: 3 cloned, 0 updated, 0 unchanged" in capsys.readouterr().out
+    lock_path = workspace / "manifest" / "refs.lock"
+    lock_mtime = lock_path.stat().st_mtime_ns
+
+    assert bootstrap.main(["--jobs", "2"]) == 0
+    out = capsys.readouterr().out
+    assert "Fast path: resolved 3/3 remote heads via ls-remote" in out
+    assert out.count("skipping fetch/reset/clean") == 3
+    assert "git fetch" not in out
+    assert "Refs lockfile already current" in out
+    assert "Repos: 0 cloned, 0 updated, 3 unchanged" in out
+    assert lock_path.stat().st_mtime_ns == lock_mtime
+
+    new_sha = add_upstream_commit(workspace, "repo-b", "moved\n")
+    assert bootstrap.main([]) == 0
+    out = capsys.readouterr().out
+    assert "Repos: 0 cloned, 1 updated, 2 unchanged" in out
+    assert bootstrap.read_refs_lock(lock_path)["repo-b"] == new_sha
+
+    # A refs.lock that disagrees with the tip (e.g. pulled from elsewhere) disables the fast path.
+    lock_path.write_text(lock_path.read_text(encoding="utf-8").replace(new_sha, "0" * 40), encoding="utf-8")
+    assert bootstrap.main([]) == 0
+    out = capsys.readouterr().out
+    assert "Repos: 0 cloned, 1 updated, 2 unchanged" in out
+    assert bootstrap.read_refs_lock(lock_path)["repo-b"] == new_sha
+
+
+def test_write_refs_lock_records_repo_state_and_skips_no_op_writes(
+    workspace: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    assert bootstrap.main([]) == 0
+    lock_path = workspace / "manifest" / "refs.lock"
+    clone = workspace / "deps" / "repo-a"
+    entries = bootstrap.read_refs_lock_entries(lock_path)
+    assert entries["repo-a"] == bootstrap.RefsLockEntry(
+        name="repo-a",
+        head_sha=run(["git", "rev-parse", "HEAD"], cwd=clone),
+        ref="main",
+        tree_sha=run(["git", "rev-parse", "HEAD^{tree}"], cwd=clone),
+        dirty=False,
+    )
+
+    specs = bootstrap.load_manifest()
+    lock_mtime = lock_path.stat().st_mtime_ns
+    assert bootstrap.write_refs_lock(specs) is False
+    assert lock_path.stat().st_mtime_ns == lock_mtime
+
+    (clone / "scratch.txt").write_text("wip\n", encoding="utf-8")
+    assert bootstrap.write_refs_lock(specs) is True
+    assert bootstrap.read_refs_lock_entries(lock_path)["repo-a"].dirty is True
+    assert sorted(p.name for p in lock_path.parent.iterdir()) == ["refs.lock", "repos.toml"]
+
+
+def test_read_refs_lock_accepts_legacy_two_column_format(tmp_path: Path) -> None:
+    lock_path = tmp_path / "refs.lock"
+    lock_path.write_text("# Format: <repo> <head_sha>\nrepo-a " + "a" * 40 + "\n", encoding="utf-8")
+
+    assert bootstrap.read_refs_lock(lock_path) == {"repo-a": "a" * 40}
+    assert bootstrap.read_refs_lock_entries(lock_path)["repo-a"].tree_sha is None
+
+
+def test_bootstrap_sparse_profile_limits_checkout(workspace: Path) -> None:
+    src = workspace / "src" / "repo-a"
+    (src / "src").mkdir()
+    (src / "src" / "module.py").write_text("x = 1\n", encoding="utf-8")
+    (src / "data").mkdir()
+    (src / "data" / "big.bin").write_text("payload\n", encoding="utf-8")
+    (src / "pyproject.toml").write_text("[project]\n", encoding="utf-8")
+    run(["git", "add", "."], cwd=src)
+    run(["git", "commit", "-m", "layout"], cwd=src)
+    run(["git", "push", str(workspace / "upstream" / "repo-a.git"), "main"], cwd=src)
+
+    manifest = workspace / "manifest" / "repos.toml"
+    original = manifest.read_text(encoding="utf-8")
+    manifest.write_text(
+        original.replace('name = "repo-a"', 'name = "repo-a"\nsparse = ["src", "pyproject.toml"]'),
+        encoding="utf-8",
+    )
+    assert bootstrap.load_manifest()[1].sparse == ("src", "pyproject.toml")
+
+    assert bootstrap.main([]) == 0
+    clone = workspace / "deps" / "repo-a"
+    assert (clone / "src" / "module.py").exists()
+    assert (clone / "pyproject.toml").exists()
+    assert not (clone / "data").exists()
+
+    # Dropping the profile restores the full tree on update.
+    manifest.write_text(original, encoding="utf-8")
+    assert bootstrap.main([]) == 0
+    assert (clone / "data" / "big.bin").exists()
+
+
+def test_sparse_cone_dirs_keeps_nested_files_via_parent_dir(workspace: Path) -> None:
+    src = workspace / "src" / "repo-a"
+    (src / "src" / "pkg").mkdir(parents=True)
+    (src / "src" / "pkg" / "mod.py").write_text("x = 1\n", encoding="utf-8")
+    (src / "data").mkdir()
+    (src / "data" / "big.bin").write_text("payload\n", encoding="utf-8")
+    run(["git", "add", "."], cwd=src)
+    run(["git", "commit", "-m", "layout"], cwd=src)
+    run(["git", "push", str(workspace / "upstream" / "repo-a.git"), "main"], cwd=src)
+
+    manifest = workspace / "manifest" / "repos.toml"
+    manifest.write_text(
+        manifest.read_text(encoding="utf-8").replace(
+            'name = "repo-a"', 'name = "repo-a"\nsparse = ["src/pkg/mod.py", "README.md"]'
+        ),
+        encoding="utf-8",
+    )
+    spec = bootstrap.load_manifest()[1]
+    assert bootstrap.sparse_cone_dirs(spec, src, "HEAD") == ["src/pkg"]
+
+    assert bootstrap.main([]) == 0
+    clone = workspace / "deps" / "repo-a"
+    assert (clone / "src" / "pkg" / "mod.py").exists()
+    assert (clone / "README.md").exists()
+    assert not (clone / "data").exists()
+
+
+def test_sparse_profile_waits_for_reset_and_resolves_at_fetched_tip(workspace: Path) -> None:
+    assert bootstrap.main([]) == 0
+    clone = workspace / "deps" / "repo-a"
+    (clone / "README.md").write_text("local work\n", encoding="utf-8")
+
+    src = workspace / "src" / "repo-a"
+    (src / "pkg" / "sub").mkdir(parents=True)
+    (src / "pkg" / "sub" / "new.py").write_text("x = 1\n", encoding="utf-8")
+    (src / "data").mkdir()
+    (src / "data" / "big.bin").write_text("payload\n", encoding="utf-8")
+    run(["git", "add", "."], cwd=src)
+    run(["git", "commit", "-m", "layout"], cwd=src)
+    run(["git", "push", str(workspace / "upstream" / "repo-a.git"), "main"], cwd=src)
+    manifest = workspace / "manifest" / "repos.toml"
+    manifest.write_text(
+        manifest.read_text(encoding="utf-8").replace('name = "repo-a"', 'name = "repo-a"\nsparse = ["pkg/sub/new.py"]'),
+        encoding="utf-8",
+    )
+
+    # Local work: neither reset nor the sparse profile may touch the worktree.
+    assert bootstrap.main([]) == 0
+    assert (clone / "README.md").read_text(encoding="utf-8") == "local work\n"
+    assert run(["git", "config", "--bool", "--default", "false", "core.sparseCheckout"], cwd=clone) == "false"
+
+    # Once clean, the profile is resolved against origin/main, where pkg/sub/new.py is a file.
+    run(["git", "checkout", "README.md"], cwd=clone)
+    assert bootstrap.main([]) == 0
+    assert run(["git", "sparse-checkout", "list"], cwd=clone) == "pkg/sub"
+    assert (clone / "pkg" / "sub" / "new.py").exists()
+    assert not (clone / "data").exists()
+
+
+def test_load_manifest_rejects_non_list_sparse(workspace: Path) -> None:
+    manifest = workspace / "manifest" / "repos.toml"
+    manifest.write_text('[[repo]]\nname = "x"\nurl = "file:///x"\nsparse = "src"\n', encoding="utf-8")
+
+    with pytest.raises(ValueError, match="sparse must be a list"):
+        bootstrap.load_manifest()
+
+
+def test_bootstrap_trace_records_git_spans(workspace: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    trace_path = workspace / "trace.jsonl"
+    assert bootstrap.main(["--jobs", "2", "--trace", str(trace_path)]) == 0
+
+    out = capsys.readouterr().out
+    assert "=== BOOTSTRAP TIMING BY PHASE ===" in out
+    assert "Receiving objects" not in out.split("TIMING BY PHASE")[1]
+
+    spans = [json.loads(line) for line in trace_path.read_text(encoding="utf-8").splitlines()]
+    clones = [span for span in spans if span["phase"] == "clone"]
+    assert sorted(span["repo"] for span in clones) == ["repo-a", "repo-b", "repo-c"]
+    assert all(span["exit_code"] == 0 and span["duration_s"] >= 0 for span in clones)
+    assert {span["phase"] for span in spans} >= {"ls-remote", "clone", "lock"}
+
+    chrome_path = workspace / "trace.json"
+    assert bootstrap.main(["--trace", str(chrome_path)]) == 0
+    events = json.loads(chrome_path.read_text(encoding="utf-8"))["traceEvents"]
+    assert events and all(event["ph"] == "X" for event in events)
+    assert {event["cat"] for event in events} >= {"ls-remote", "status"}
+
+
+def test_parse_bytes_received_reads_git_progress() -> None:
+    output = "Receiving objects:  50% (1/2)\rReceiving objects: 100% (2/2), 1.50 KiB | 1.00 MiB/s, done.\n"
+
+    assert bootstrap.parse_bytes_received(output) == 1536
+    assert bootstrap.parse_bytes_received("Already up to date.\n") is None
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+
+
+def run(cmd: list[str], cwd: Path) -> None:
+    subprocess.run(cmd, cwd=cwd, check=True, capture_output=True)
+
+
+def test_object_lookups_never_lazy_fetch_in_partial_clone(tmp_path: Path) -> None:
+    from tools.git_objects import has_object, is_partial_clone
+
+    src = tmp_path / "src"
+    run(["git", "init", "-b", "main", "src"], cwd=tmp_path)
+    run(["git", "config", "user.name", "Test User"], cwd=src)
+    run(["git", "config", "user.email", "test@example.com"], cwd=src)
+    (src / "file.txt").write_text("one\n", encoding="utf-8")
+    run(["git", "add", "file.txt"], cwd=src)
+    run(["git", "commit", "-m", "initial"], cwd=src)
+    run(["git", "config", "uploadpack.allowFilter", "true"], cwd=src)
+    clone = tmp_path / "partial"
+    run(["git", "clone", "--filter=blob:none", src.as_uri(), str(clone)], cwd=tmp_path)
+    marker = tmp_path / "fetched"
+    spy = tmp_path / "upload-pack-spy"
+    spy.write_text(f'#!/bin/sh\ntouch "{marker}"\nexec git-upload-pack "$@"\n', encoding="utf-8")
+    spy.chmod(0o755)
+    run(["git", "config", "remote.origin.uploadpack", str(spy)], cwd=clone)
+
+    assert is_partial_clone(clone)
+    assert not is_partial_clone(src)
+    assert has_object(clone, "HEAD^{commit}")
+    assert not has_object(clone, "1234567890" * 4)
+    assert not has_object(clone, f"{'1234567890' * 4}^{{commit}}")
+    assert not marker.exists()
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import hashlib
+import io
 import json
 import os
 import subprocess
 import sys
 from pathlib import Path
 
+import pytest
+
 
 ROOT = Path(__file__).resolve().parents[1]
 SCRIPT = ROOT / "tools" / "mkpatch.py"
@@ -51,6 +55,10 @@ def test_mkpatch_generates_patch_and_report(tmp_path: Path) -> None:
     assert plan_file.exists()
 
     report = report_file.read_text(encoding="utf-8")
+    patch_bytes = patch_file.read_bytes()
+    assert b"+after" in patch_bytes
+    digest = hashlib.sha256(patch_bytes).hexdigest()
+    assert f"| demo-repo | {len(patch_bytes)} | 1 | `{digest}` |" in report
     assert "## Affected repos" in report
     assert "## Base SHAs" in report
     assert "## Summary" in report
@@ -168,3 +176,208 @@ def test_mkpatch_prune_old_prints_deleted_summary(tmp_path: Path) -> None:
 
     remaining = sorted(path.name for path in patches_dir.glob("bundle-*") if path.is_dir())
     assert remaining == ["bundle-20240101-000002", "bundle-20240101-000003", "bundle-new"]
+
+
+def test_parse_porcelain_v2_matches_short_status() -> None:
+    from tools.mkpatch import parse_porcelain_v2
+
+    output = "\n".join(
+        [
+            "# branch.oid 8d7e1efd3c046bb3710524581772acaa6f699d18",
+            "# branch.head main",
+            "1 .M N... 100644 100644 100644 aaaa aaaa tracked.txt",
+            "1 A. N... 000000 100644 100644 0000 bbbb docs/new file.md",
+            "2 R. N... 100644 100644 100644 cccc cccc R100 renamed.txt\told.txt",
+            "? untracked.txt",
+        ]
+    )
+
+    head, summary = parse_porcelain_v2(output)
+
+    assert head == "8d7e1efd3c046bb3710524581772acaa6f699d18"
+    assert summary == [
+        " M tracked.txt",
+        "A  docs/new file.md",
+        "R  old.txt -> renamed.txt",
+        "?? untracked.txt",
+    ]
+
+
+def test_list_dirty_repos_scans_concurrently_and_skips_clean(tmp_path: Path) -> None:
+    from tools.mkpatch import list_dirty_repos
+
+    deps_dir = tmp_path / "deps"
+    deps_dir.mkdir()
+    for name in ("clean-repo", "dirty-a", "dirty-b"):
+        repo_dir = deps_dir / name
+        run(["git", "init", name], cwd=deps_dir)
+        run(["git", "config", "user.name", "Test User"], cwd=repo_dir)
+        run(["git", "config", "user.email", "test@example.com"], cwd=repo_dir)
+        (repo_dir / "file.txt").write_text("one\n", encoding="utf-8")
+        run(["git", "add", "file.txt"], cwd=repo_dir)
+        run(["git", "commit", "-m", "initial"], cwd=repo_dir)
+        if name != "clean-repo":
+            (repo_dir / "file.txt").write_text("two\n", encoding="utf-8")
+
+    repos = list_dirty_repos(deps_dir, jobs=3)
+
+    assert [repo.name for repo in repos] == ["dirty-a", "dirty-b"]
+    head = subprocess.run(
+        ["git", "rev-parse", "HEAD"], cwd=deps_dir / "dirty-a", check=True, text=True, capture_output=True
+    ).stdout.strip()
+    assert repos[0].base_sha == head
+    assert repos[0].summary == " M file.txt"
+
+
+def test_bundle_patch_round_trips_untracked_and_binary_files(tmp_path: Path) -> None:
+    from tools.mkpatch import list_dirty_repos, write_bundle
+    from tools.repo_ops import apply_patch
+
+    deps_dir = tmp_path / "deps"
+    deps_dir.mkdir()
+    repo_dir = deps_dir / "bin-repo"
+    run(["git", "init", repo_dir.name], cwd=deps_dir)
+    run(["git", "config", "user.name", "Test User"], cwd=repo_dir)
+    run(["git", "config", "user.email", "test@example.com"], cwd=repo_dir)
+    (repo_dir / "tracked.txt").write_text("before\n", encoding="utf-8")
+    (repo_dir / "blob.bin").write_bytes(bytes(range(256)))
+    run(["git", "add", "."], cwd=repo_dir)
+    run(["git", "commit", "-m", "initial"], cwd=repo_dir)
+    run(["git", "clone", "-q", str(repo_dir), str(tmp_path / "target")], cwd=tmp_path)
+
+    (repo_dir / "tracked.txt").write_text("after\n", encoding="utf-8")
+    (repo_dir / "blob.bin").write_bytes(bytes(reversed(range(256))))
+    (repo_dir / "new-dir").mkdir()
+    (repo_dir / "new-dir" / "fresh.txt").write_text("brand new\n", encoding="utf-8")
+    (repo_dir / "new-dir" / "fresh.bin").write_bytes(b"\x00\xff" * 64)
+
+    repos = list_dirty_repos(deps_dir)
+    bundle_dir = write_bundle(repos, tmp_path / "patches", "bundle-bin")
+
+    patch_bytes = (bundle_dir / "bin-repo.patch").read_bytes()
+    assert b"Binary files" not in patch_bytes
+    assert b"GIT binary patch" in patch_bytes
+    staged = subprocess.run(
+        ["git", "ls-files"], cwd=repo_dir, check=True, text=True, capture_output=True
+    ).stdout.split()
+    assert staged == ["blob.bin", "tracked.txt"]
+
+    target = tmp_path / "target"
+    apply_patch(target, bundle_dir / "bin-repo.patch")
+    for rel in ("tracked.txt", "blob.bin", "new-dir/fresh.txt", "new-dir/fresh.bin"):
+        assert (target / rel).read_bytes() == (repo_dir / rel).read_bytes()
+
+
+def test_xz_bundles_share_content_addressed_objects(tmp_path: Path) -> None:
+    from tools.mkpatch import list_dirty_repos, prune_old_bundles, prune_unreferenced_objects, write_bundle
+    from tools.repo_ops import apply_patch, load_plan
+
+    deps_dir = tmp_path / "deps"
+    deps_dir.mkdir()
+    repo_dir = deps_dir / "xz-repo"
+    run(["git", "init", repo_dir.name], cwd=deps_dir)
+    run(["git", "config", "user.name", "Test User"], cwd=repo_dir)
+    run(["git", "config", "user.email", "test@example.com"], cwd=repo_dir)
+    (repo_dir / "data.txt").write_text("row\n" * 1000, encoding="utf-8")
+    run(["git", "add", "."], cwd=repo_dir)
+    run(["git", "commit", "-m", "initial"], cwd=repo_dir)
+    run(["git", "clone", "-q", str(repo_dir), str(tmp_path / "target")], cwd=tmp_path)
+    (repo_dir / "data.txt").write_text("changed\n" * 1000, encoding="utf-8")
+
+    patches_dir = tmp_path / "patches"
+    repos = list_dirty_repos(deps_dir)
+    first = write_bundle(repos, patches_dir, "bundle-20240101-000000", "xz")
+    second = write_bundle(repos, patches_dir, "bundle-20240101-000001", "xz")
+
+    objects = sorted((patches_dir / "objects").iterdir())
+    assert len(objects) == 1
+    assert not list(first.glob("*.patch")) and not list(second.glob("*.patch"))
+    change = load_plan(second / "change_plan.json").changes[0]
+    assert change.patch_path == Path("patches/objects") / objects[0].name
+    assert objects[0].name == f"{change.patch_sha256}.patch.xz"
+    assert objects[0].stat().st_size < 1000
+
+    apply_patch(tmp_path / "target", tmp_path / change.patch_path, change.patch_sha256)
+    assert (tmp_path / "target" / "data.txt").read_bytes() == (repo_dir / "data.txt").read_bytes()
+
+    prune_old_bundles(patches_dir, keep=1)
+    assert prune_unreferenced_objects(patches_dir) == []
+    prune_old_bundles(patches_dir, keep=0)
+    assert prune_unreferenced_objects(patches_dir) == objects
+
+
+def test_stream_patch_reaps_git_when_writing_fails(tmp_path: Path, monkeypatch) -> None:
+    from tools import mkpatch
+
+    deps_dir = tmp_path / "deps"
+    deps_dir.mkdir()
+    repo_dir = deps_dir / "repo"
+    run(["git", "init", "repo"], cwd=deps_dir)
+    run(["git", "config", "user.name", "Test User"], cwd=repo_dir)
+    run(["git", "config", "user.email", "test@example.com"], cwd=repo_dir)
+    (repo_dir / "file.txt").write_text("one\n", encoding="utf-8")
+    run(["git", "add", "file.txt"], cwd=repo_dir)
+    run(["git", "commit", "-m", "initial"], cwd=repo_dir)
+    (repo_dir / "file.txt").write_text("two\n" * 100_000, encoding="utf-8")
+    [repo] = mkpatch.list_dirty_repos(deps_dir)
+
+    procs: list[subprocess.Popen] = []
+    real_popen = subprocess.Popen
+    monkeypatch.setattr(
+        mkpatch.subprocess, "Popen", lambda *a, **kw: procs.append(real_popen(*a, **kw)) or procs[-1]
+    )
+
+    class FullDisk(io.RawIOBase):
+        def writable(self) -> bool:
+            return True
+
+        def write(self, data) -> int:
+            raise OSError(28, "No space left on device")
+
+    patch_path = tmp_path / "repo.patch"
+    real_open = Path.open
+    monkeypatch.setattr(
+        Path, "open", lambda self, *a, **kw: FullDisk() if self == patch_path else real_open(self, *a, **kw)
+    )
+
+    with pytest.raises(OSError, match="No space left"):
+        mkpatch.stream_patch(repo, patch_path)
+    assert procs and procs[0].returncode is not None
+
+
+def test_incremental_stacks_on_newest_bundle_with_the_repo(tmp_path: Path) -> None:
+    deps_dir = tmp_path / "deps"
+    deps_dir.mkdir()
+    for name in ("repo-a", "repo-b"):
+        repo_dir = deps_dir / name
+        run(["git", "init", name], cwd=deps_dir)
+        run(["git", "config", "user.name", "Test User"], cwd=repo_dir)
+        run(["git", "config", "user.email", "test@example.com"], cwd=repo_dir)
+        (repo_dir / "tracked.txt").write_text("before\n", encoding="utf-8")
+        run(["git", "add", "tracked.txt"], cwd=repo_dir)
+        run(["git", "commit", "-m", "initial"], cwd=repo_dir)
+        (repo_dir / "tracked.txt").write_text("first pass\n", encoding="utf-8")
+
+    def mkpatch(bundle: str, *extra: str) -> subprocess.CompletedProcess[str]:
+        cmd = [sys.executable, str(SCRIPT), "--root", str(tmp_path), "--bundle", bundle, "--incremental", *extra]
+        return subprocess.run(cmd, cwd=tmp_path, text=True, capture_output=True, check=False)
+
+    assert mkpatch("bundle-20240101-000000").returncode == 0
+    (deps_dir / "repo-a" / "notes.txt").write_text("follow-up\n", encoding="utf-8")
+    assert mkpatch("bundle-20240101-000001").returncode == 0
+    (deps_dir / "repo-b" / "notes.txt").write_text("follow-up\n", encoding="utf-8")
+
+    # repo-b's previous change is two bundles back; pruning to one bundle would break its stack.
+    refused = mkpatch("bundle-20240101-000002", "--prune-old", "--keep", "1")
+    assert refused.returncode == 2
+    assert "would delete bundle-20240101-000000" in refused.stderr
+    assert (tmp_path / "patches" / "bundle-20240101-000000").is_dir()
+
+    result = mkpatch("bundle-20240101-000002")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Unchanged since bundle-20240101-000001: repo-a" in result.stdout
+    plan_path = tmp_path / "patches" / "bundle-20240101-000002" / "change_plan.json"
+    plan = json.loads(plan_path.read_text(encoding="utf-8"))
+    assert [change["repo"] for change in plan["changes"]] == ["repo-b"]
+    assert plan["changes"][0]["parent_bundle"] == "bundle-20240101-000000"
+    assert plan["changes"][0]["branch"] == "codex/bundle-20240101-000000/repo-b"
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import os
 import subprocess
 import sys
 from pathlib import Path
@@ -254,3 +255,419 @@ def test_repo_ops_reports_resolved_plan_path_when_missing(tmp_path: Path) -> Non
     assert "Plan file not found." in result.stderr
     assert "Provided: patches/bundle-test/demo.patch/change_plan.json" in result.stderr
     assert "Resolved:" in result.stderr
+
+
+def make_remote(tmp_path: Path, repo: str) -> tuple[str, str]:
+    """Create a bare remote under tmp/remote/example-org and return (base_sha, patch text)."""
+    work = tmp_path / "seed" / repo
+    work.mkdir(parents=True)
+    run(["git", "init", "-b", "main"], cwd=work)
+    run(["git", "config", "user.name", "Test User"], cwd=work)
+    run(["git", "config", "user.email", "test@example.com"], cwd=work)
+    (work / "README.md").write_text(f"{repo}\n", encoding="utf-8")
+    run(["git", "add", "README.md"], cwd=work)
+    run(["git", "commit", "-m", "initial"], cwd=work)
+    base_sha = run(["git", "rev-parse", "HEAD"], cwd=work).stdout.strip()
+
+    (work / "README.md").write_text(f"{repo} updated\n", encoding="utf-8")
+    patch_text = run(["git", "diff"], cwd=work).stdout
+    run(["git", "checkout", "README.md"], cwd=work)
+
+    bare = tmp_path / "remote" / "example-org" / f"{repo}.git"
+    bare.parent.mkdir(parents=True, exist_ok=True)
+    run(["git", "clone", "--bare", str(work), str(bare)], cwd=tmp_path)
+    return base_sha, patch_text
+
+
+def write_publish_plan(tmp_path: Path, patches: dict[str, tuple[str, str]]) -> Path:
+    bundle_dir = tmp_path / "patches" / "bundle-test"
+    bundle_dir.mkdir(parents=True)
+    changes = []
+    for repo, (base_sha, patch_text) in patches.items():
+        (bundle_dir / f"{repo}.patch").write_text(patch_text, encoding="utf-8")
+        changes.append(
+            {
+                "repo": repo,
+                "branch": f"codex/bundle-test/{repo}",
+                "commit_message": f"Apply bundle-test updates for {repo}",
+                "patch_path": f"patches/bundle-test/{repo}.patch",
+                "base_sha": base_sha,
+            }
+        )
+    plan_path = bundle_dir / "change_plan.json"
+    plan_path.write_text(
+        json.dumps({"schema_version": 1, "bundle": "bundle-test", "changes": changes}),
+        encoding="utf-8",
+    )
+    return plan_path
+
+
+def publish_env(tmp_path: Path, **extra: str) -> dict[str, str]:
+    """Environment with a stub `gh` that prints a fake PR URL, plus a git identity."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir(exist_ok=True)
+    gh = bin_dir / "gh"
+    gh.write_text(
+        '#!/bin/sh\necho "https://example.test/$(basename "$PWD")/pull/1"\n',
+        encoding="utf-8",
+    )
+    gh.chmod(0o755)
+    return {
+        **os.environ,
+        "PATH": f"{bin_dir}{os.pathsep}{os.environ['PATH']}",
+        "GH_TOKEN": "test-token",
+        "GIT_AUTHOR_NAME": "Test User",
+        "GIT_AUTHOR_EMAIL": "test@example.com",
+        "GIT_COMMITTER_NAME": "Test User",
+        "GIT_COMMITTER_EMAIL": "test@example.com",
+        **extra,
+    }
+
+
+def run_publish(
+    tmp_path: Path, plan_path: Path, *extra: str, env: dict[str, str] | None = None
+) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [
+            sys.executable,
+            str(SCRIPT),
+            "--workspace-root",
+            str(tmp_path),
+            "--plan",
+            str(plan_path),
+            "--org",
+            "example-org",
+            "--work-dir",
+            str(tmp_path / "work"),
+            "--remote-template",
+            f"file://{tmp_path}/remote/{{org}}/{{repo}}.git",
+            *extra,
+        ],
+        cwd=tmp_path,
+        text=True,
+        capture_output=True,
+        env=env or publish_env(tmp_path),
+        check=False,
+    )
+
+
+def remote_branches(tmp_path: Path, repo: str) -> str:
+    bare = tmp_path / "remote" / "example-org" / f"{repo}.git"
+    return run(["git", "branch", "--list"], cwd=bare).stdout
+
+
+def test_repo_ops_parallel_publish_reports_pr_table(tmp_path: Path) -> None:
+    patches = {repo: make_remote(tmp_path, repo) for repo in ("repo-a", "repo-b", "repo-c")}
+    plan_path = write_publish_plan(tmp_path, patches)
+
+    result = run_publish(tmp_path, plan_path, "--jobs", "3")
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    for repo in patches:
+        assert f"| {repo} | codex/bundle-test/{repo} | published | https://example.test/{repo}/pull/1 |" in result.stdout
+        assert f"codex/bundle-test/{repo}" in remote_branches(tmp_path, repo)
+    # Per-change logs stay grouped and in plan order.
+    assert result.stdout.index("--- repo-a ---") < result.stdout.index("--- repo-b ---")
+    assert (tmp_path / "work" / "01-repo-b.log").read_text(encoding="utf-8").startswith("Cloning")
+
+
+def test_repo_ops_prepare_failure_publishes_nothing(tmp_path: Path) -> None:
+    patches = {repo: make_remote(tmp_path, repo) for repo in ("repo-a", "repo-b")}
+    patches["repo-b"] = (patches["repo-b"][0], patches["repo-b"][1].replace("repo-b\n", "unrelated\n"))
+    plan_path = write_publish_plan(tmp_path, patches)
+
+    result = run_publish(tmp_path, plan_path, "--jobs", "2")
+
+    assert result.returncode == 1
+    assert "| repo-a | codex/bundle-test/repo-a | not-published |" in result.stdout
+    assert "| repo-b | codex/bundle-test/repo-b | failed |" in result.stdout
+    assert "nothing was pushed" in result.stdout
+    assert "codex/bundle-test" not in remote_branches(tmp_path, "repo-a")
+
+
+def test_repo_ops_minimal_clone_fetches_only_base_commit(tmp_path: Path) -> None:
+    patches = {"repo-a": make_remote(tmp_path, "repo-a")}
+    seed = tmp_path / "seed" / "repo-a"
+    for idx in range(3):
+        (seed / f"later-{idx}.txt").write_text("later\n", encoding="utf-8")
+        run(["git", "add", "."], cwd=seed)
+        run(["git", "commit", "-m", f"later {idx}"], cwd=seed)
+    run(["git", "push", str(tmp_path / "remote" / "example-org" / "repo-a.git"), "main"], cwd=seed)
+    plan_path = write_publish_plan(tmp_path, patches)
+
+    result = run_publish(tmp_path, plan_path, "--clone-mode", "minimal")
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "| repo-a | codex/bundle-test/repo-a | published |" in result.stdout
+    work_repo = tmp_path / "work" / "00-repo-a" / "repo-a"
+    assert (work_repo / ".git" / "shallow").exists()
+    assert run(["git", "rev-list", "--count", "--all"], cwd=work_repo).stdout.strip() == "3"
+    published = run(["git", "log", "-1", "--format=%P", "codex/bundle-test/repo-a"], cwd=work_repo)
+    assert published.stdout.strip() == patches["repo-a"][0]
+
+
+def test_repo_ops_minimal_clone_falls_back_when_sha_fetch_refused(tmp_path: Path) -> None:
+    patches = {"repo-a": make_remote(tmp_path, "repo-a")}
+    seed = tmp_path / "seed" / "repo-a"
+    (seed / "later.txt").write_text("later\n", encoding="utf-8")
+    run(["git", "add", "."], cwd=seed)
+    run(["git", "commit", "-m", "later"], cwd=seed)
+    run(["git", "push", str(tmp_path / "remote" / "example-org" / "repo-a.git"), "main"], cwd=seed)
+    plan_path = write_publish_plan(tmp_path, patches)
+
+    # Protocol v0 servers refuse want-by-SHA for commits that are not ref tips.
+    env = publish_env(
+        tmp_path, GIT_CONFIG_COUNT="1", GIT_CONFIG_KEY_0="protocol.version", GIT_CONFIG_VALUE_0="0"
+    )
+    result = run_publish(tmp_path, plan_path, "--clone-mode", "minimal", env=env)
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "fetched full branch history instead" in result.stdout
+    assert "| repo-a | codex/bundle-test/repo-a | published |" in result.stdout
+
+
+def test_repo_ops_validate_falls_back_when_sha_fetch_refused(tmp_path: Path) -> None:
+    patches = {"repo-a": make_remote(tmp_path, "repo-a")}
+    seed = tmp_path / "seed" / "repo-a"
+    (seed / "later.txt").write_text("later\n", encoding="utf-8")
+    run(["git", "add", "."], cwd=seed)
+    run(["git", "commit", "-m", "later"], cwd=seed)
+    run(["git", "push", str(tmp_path / "remote" / "example-org" / "repo-a.git"), "main"], cwd=seed)
+    plan_path = write_publish_plan(tmp_path, patches)
+
+    env = publish_env(
+        tmp_path, GIT_CONFIG_COUNT="1", GIT_CONFIG_KEY_0="protocol.version", GIT_CONFIG_VALUE_0="0"
+    )
+    result = run_publish(tmp_path, plan_path, "--dry-run", "--validate", "--no-local-sources", env=env)
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "| repo-a | yes | 0 |" in result.stdout
+
+
+def test_repo_ops_borrows_objects_from_local_deps_clone(tmp_path: Path) -> None:
+    patches = {"repo-a": make_remote(tmp_path, "repo-a")}
+    bare = tmp_path / "remote" / "example-org" / "repo-a.git"
+    deps = tmp_path / "deps"
+    deps.mkdir()
+    run(["git", "clone", "--depth", "1", bare.as_uri(), str(deps / "repo-a")], cwd=deps)
+    plan_path = write_publish_plan(tmp_path, patches)
+
+    dry = run_publish(tmp_path, plan_path, "--dry-run")
+    assert f"DRY RUN: would borrow objects from {deps / 'repo-a'}" in dry.stdout
+
+    result = run_publish(tmp_path, plan_path)
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert f"Using local objects from {deps / 'repo-a'}" in result.stdout
+    assert "Cloning" not in result.stdout
+    assert "| repo-a | codex/bundle-test/repo-a | published |" in result.stdout
+    work_repo = tmp_path / "work" / "00-repo-a" / "repo-a"
+    assert (work_repo / ".git" / "objects" / "info" / "alternates").exists()
+    pushed = run(["git", "log", "-1", "--format=%P", "codex/bundle-test/repo-a"], cwd=bare)
+    assert pushed.stdout.strip() == patches["repo-a"][0]
+
+
+def test_repo_ops_borrows_objects_from_partial_deps_clone(tmp_path: Path) -> None:
+    from tools.git_objects import has_object
+
+    patches = {"repo-a": make_remote(tmp_path, "repo-a")}
+    base_sha = patches["repo-a"][0]
+    bare = tmp_path / "remote" / "example-org" / "repo-a.git"
+    seed = tmp_path / "seed" / "repo-a"
+    (seed / "README.md").write_text("repo-a moved on\n", encoding="utf-8")
+    run(["git", "commit", "-am", "later"], cwd=seed)
+    run(["git", "push", str(bare), "main"], cwd=seed)
+    run(["git", "config", "uploadpack.allowFilter", "true"], cwd=bare)
+    # Like bootstrap: a blob:none clone of the tip, so base_sha's README blob is not local.
+    deps = tmp_path / "deps"
+    deps.mkdir()
+    run(["git", "clone", "--filter=blob:none", bare.as_uri(), str(deps / "repo-a")], cwd=deps)
+    base_blob = run(["git", "rev-parse", f"{base_sha}:README.md"], cwd=bare).stdout.strip()
+    assert not has_object(deps / "repo-a", base_blob)
+    plan_path = write_publish_plan(tmp_path, patches)
+
+    dry = run_publish(tmp_path, plan_path, "--dry-run")
+    assert f"DRY RUN: would borrow objects from {deps / 'repo-a'} (missing blobs from" in dry.stdout
+
+    validate = run_publish(tmp_path, plan_path, "--dry-run", "--validate")
+    assert validate.returncode == 0, validate.stdout + validate.stderr
+    assert f"VALIDATE: base tree from {deps / 'repo-a'}" in validate.stdout
+
+    result = run_publish(tmp_path, plan_path)
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert f"Using local objects from {deps / 'repo-a'}" in result.stdout
+    assert "| repo-a | codex/bundle-test/repo-a | published |" in result.stdout
+    pushed = run(["git", "show", "codex/bundle-test/repo-a:README.md"], cwd=bare)
+    assert pushed.stdout == "repo-a updated\n"
+    # The missing blob was fetched into the work repo; the deps clone is left as it was.
+    assert has_object(tmp_path / "work" / "00-repo-a" / "repo-a", base_blob)
+    assert not has_object(deps / "repo-a", base_blob)
+
+
+def test_repo_ops_validate_reports_applicability_per_patch(tmp_path: Path) -> None:
+    patches = {repo: make_remote(tmp_path, repo) for repo in ("repo-a", "repo-b")}
+    patches["repo-b"] = (patches["repo-b"][0], patches["repo-b"][1].replace("-repo-b\n", "-unrelated\n"))
+    deps = tmp_path / "deps"
+    deps.mkdir()
+    bare_a = tmp_path / "remote" / "example-org" / "repo-a.git"
+    run(["git", "clone", "--depth", "1", bare_a.as_uri(), str(deps / "repo-a")], cwd=deps)
+    plan_path = write_publish_plan(tmp_path, patches)
+
+    env = {key: value for key, value in publish_env(tmp_path).items() if key != "GH_TOKEN"}
+    result = run_publish(tmp_path, plan_path, "--dry-run", "--validate", "--jobs", "2", env=env)
+
+    assert result.returncode == 1, result.stdout + result.stderr
+    # repo-a comes from the local deps clone, repo-b from a depth-1 fetch of base_sha.
+    assert f"VALIDATE: base tree from {deps / 'repo-a'}" in result.stdout
+    assert "VALIDATE: base tree from file://" in result.stdout
+    assert "README.md |    2 +-" in result.stdout
+    assert "conflicting hunk at README.md:1" in result.stdout
+    assert "| repo-a | yes | 0 |" in result.stdout
+    assert "| repo-b | no | 1 |" in result.stdout
+    assert not (tmp_path / "work").exists() or not any((tmp_path / "work").iterdir())
+
+
+def test_repo_ops_validate_reports_malformed_patch(tmp_path: Path) -> None:
+    patches = {repo: make_remote(tmp_path, repo) for repo in ("repo-a", "repo-b")}
+    patches["repo-a"] = (patches["repo-a"][0], "this is not a patch\n")
+    plan_path = write_publish_plan(tmp_path, patches)
+
+    env = {key: value for key, value in publish_env(tmp_path).items() if key != "GH_TOKEN"}
+    result = run_publish(tmp_path, plan_path, "--dry-run", "--validate", "--jobs", "2", env=env)
+
+    assert result.returncode == 1, result.stdout + result.stderr
+    assert "Traceback" not in result.stderr
+    assert "malformed patch" in result.stdout
+    assert "| repo-a | no |" in result.stdout
+    assert "| repo-b | yes | 0 |" in result.stdout
+
+
+def test_repo_ops_publishes_compressed_patch_and_rejects_hash_mismatch(tmp_path: Path) -> None:
+    import hashlib
+    import lzma
+
+    patches = {repo: make_remote(tmp_path, repo) for repo in ("repo-a", "repo-b")}
+    plan_path = write_publish_plan(tmp_path, patches)
+    plan = json.loads(plan_path.read_text(encoding="utf-8"))
+    objects = tmp_path / "patches" / "objects"
+    objects.mkdir()
+    for change in plan["changes"]:
+        patch_bytes = patches[change["repo"]][1].encode("utf-8")
+        digest = hashlib.sha256(patch_bytes).hexdigest()
+        (objects / f"{digest}.patch.xz").write_bytes(lzma.compress(patch_bytes))
+        change["patch_path"] = f"patches/objects/{digest}.patch.xz"
+        change["patch_sha256"] = digest
+    plan["changes"][1]["patch_sha256"] = "0" * 64
+    plan_path.write_text(json.dumps(plan), encoding="utf-8")
+
+    env = {key: value for key, value in publish_env(tmp_path).items() if key != "GH_TOKEN"}
+    checked = run_publish(tmp_path, plan_path, "--dry-run", "--validate", env=env)
+    assert "| repo-a | yes | 0 |" in checked.stdout
+    assert "does not match patch_sha256 " + "0" * 64 in checked.stdout
+
+    result = run_publish(tmp_path, plan_path)
+
+    assert result.returncode == 1
+    assert "| repo-a | codex/bundle-test/repo-a | not-published |" in result.stdout
+    assert "| repo-b | codex/bundle-test/repo-b | failed |" in result.stdout
+    assert "is corrupt" in (tmp_path / "work" / "01-repo-b.log").read_text(encoding="utf-8")
+
+
+def test_repo_ops_publishes_incremental_bundle_stack(tmp_path: Path) -> None:
+    mkpatch = [sys.executable, str(ROOT / "tools" / "mkpatch.py"), "--root", str(tmp_path)]
+    base_shas = {repo: make_remote(tmp_path, repo)[0] for repo in ("repo-a", "repo-b")}
+    deps = tmp_path / "deps"
+    deps.mkdir()
+    for repo in base_shas:
+        bare = tmp_path / "remote" / "example-org" / f"{repo}.git"
+        run(["git", "clone", bare.as_uri(), str(deps / repo)], cwd=deps)
+        (deps / repo / "README.md").write_text(f"{repo} first pass\n", encoding="utf-8")
+    run([*mkpatch, "--bundle", "bundle-20240101-000000"], cwd=tmp_path)
+
+    (deps / "repo-a" / "notes.txt").write_text("follow-up\n", encoding="utf-8")
+    result = run([*mkpatch, "--bundle", "bundle-20240101-000001", "--incremental"], cwd=tmp_path)
+    assert "Unchanged since bundle-20240101-000000: repo-b" in result.stdout
+
+    plan_path = tmp_path / "patches" / "bundle-20240101-000001" / "change_plan.json"
+    plan = json.loads(plan_path.read_text(encoding="utf-8"))
+    assert [change["repo"] for change in plan["changes"]] == ["repo-a"]
+    assert plan["changes"][0]["parent_bundle"] == "bundle-20240101-000000"
+    assert plan["changes"][0]["branch"] == "codex/bundle-20240101-000000/repo-a"
+    delta = (tmp_path / plan["changes"][0]["patch_path"]).read_text(encoding="utf-8")
+    assert "notes.txt" in delta and "README.md" not in delta
+
+    published = run_publish(tmp_path, plan_path)
+
+    assert published.returncode == 0, published.stdout + published.stderr
+    assert "Applying stacked parent patch" in published.stdout
+    bare_a = tmp_path / "remote" / "example-org" / "repo-a.git"
+    branch = "codex/bundle-20240101-000000/repo-a"
+    assert run(["git", "show", f"{branch}:README.md"], cwd=bare_a).stdout == "repo-a first pass\n"
+    assert run(["git", "show", f"{branch}:notes.txt"], cwd=bare_a).stdout == "follow-up\n"
+    assert run(["git", "log", "-1", "--format=%P", branch], cwd=bare_a).stdout.strip() == base_shas["repo-a"]
+
+
+def stateful_gh_env(tmp_path: Path) -> dict[str, str]:
+    """publish_env whose `gh` refuses a second `pr create` for a branch, like the real CLI."""
+    env = publish_env(tmp_path)
+    gh = tmp_path / "bin" / "gh"
+    gh.write_text(
+        """#!/bin/sh
+state="$(dirname "$0")/opened-prs"
+touch "$state"
+head=""
+prev=""
+for arg in "$@"; do
+  [ "$prev" = "--head" ] && head="$arg"
+  prev="$arg"
+done
+url="https://example.test/pull/$head"
+case "$2" in
+  create)
+    if grep -qx "$head" "$state"; then
+      echo "a pull request for branch \\"$head\\" into branch \\"main\\" already exists:" >&2
+      echo "$url" >&2
+      exit 1
+    fi
+    echo "$head" >> "$state"
+    echo "$url"
+    ;;
+  list)
+    if grep -qx "$head" "$state"; then echo "$url"; fi
+    ;;
+esac
+""",
+        encoding="utf-8",
+    )
+    return env
+
+
+def test_repo_ops_stacked_bundle_updates_existing_pr(tmp_path: Path) -> None:
+    mkpatch = [sys.executable, str(ROOT / "tools" / "mkpatch.py"), "--root", str(tmp_path)]
+    make_remote(tmp_path, "repo-a")
+    deps = tmp_path / "deps"
+    deps.mkdir()
+    bare = tmp_path / "remote" / "example-org" / "repo-a.git"
+    run(["git", "clone", bare.as_uri(), str(deps / "repo-a")], cwd=deps)
+    (deps / "repo-a" / "README.md").write_text("first pass\n", encoding="utf-8")
+    run([*mkpatch, "--bundle", "bundle-20240101-000000"], cwd=tmp_path)
+    (deps / "repo-a" / "notes.txt").write_text("follow-up\n", encoding="utf-8")
+    run([*mkpatch, "--bundle", "bundle-20240101-000001", "--incremental"], cwd=tmp_path)
+    env = stateful_gh_env(tmp_path)
+    branch = "codex/bundle-20240101-000000/repo-a"
+
+    parent = run_publish(
+        tmp_path, tmp_path / "patches" / "bundle-20240101-000000" / "change_plan.json", env=env
+    )
+    assert parent.returncode == 0, parent.stdout + parent.stderr
+    assert f"Opened PR: https://example.test/pull/{branch}" in parent.stdout
+
+    stacked = run_publish(
+        tmp_path, tmp_path / "patches" / "bundle-20240101-000001" / "change_plan.json", env=env
+    )
+
+    assert stacked.returncode == 0, stacked.stdout + stacked.stderr
+    assert f"Updated existing PR: https://example.test/pull/{branch}" in stacked.stdout
+    assert "already exists" not in stacked.stdout + stacked.stderr
+    assert run(["git", "show", f"{branch}:notes.txt"], cwd=bare).stdout == "follow-up\n"
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from tools import search_docs
+
+
+def write_doc(root: Path, rel: str, text: str) -> Path:
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_update_index_is_incremental_and_search_ranks_titles_first(tmp_path: Path) -> None:
+    write_doc(tmp_path, "docs/adr/ECO-0001-units.md", "**Title:** Units contract\n\nAll lengths are in metres.\n")
+    write_doc(tmp_path, "docs/context/deps/cpa-sim.md", "# cpa-sim\n\nFollows the units contract from ECO-0001.\n")
+    snapshot = write_doc(tmp_path, "docs/context/snapshots/x/README.md", "# Upstream\n\nPhase screens.\n")
+    write_doc(tmp_path, "docs/other/ignored.md", "# Units\n")
+    conn = search_docs.open_index(tmp_path / "index.sqlite3")
+
+    assert search_docs.update_index(conn, tmp_path) == search_docs.IndexStats(3, 0, 0, 0)
+    assert search_docs.update_index(conn, tmp_path) == search_docs.IndexStats(0, 0, 0, 3)
+
+    hits = search_docs.search(conn, "units contract")
+    assert [hit.path for hit in hits] == ["docs/adr/ECO-0001-units.md", "docs/context/deps/cpa-sim.md"]
+    assert hits[0].title == "Units contract"
+    assert "[units] [contract]" in hits[1].snippet
+
+    os.utime(snapshot, ns=(1, 1))  # touched but identical: hashed, not re-indexed
+    write_doc(tmp_path, "docs/context/deps/cpa-sim.md", "# cpa-sim\n\nNo longer relevant.\n")
+    (tmp_path / "docs/adr/ECO-0001-units.md").unlink()
+    assert search_docs.update_index(conn, tmp_path) == search_docs.IndexStats(0, 1, 1, 1)
+    assert search_docs.search(conn, "units") == []
+    assert [hit.path for hit in search_docs.search(conn, "phase screen")] == ["docs/context/snapshots/x/README.md"]
+
+
+def test_search_falls_back_to_plain_words_on_fts_syntax_errors(tmp_path: Path) -> None:
+    write_doc(tmp_path, "docs/adr/0001-schema.md", "# Result schema\n\nThe schema (v2) is frozen.\n")
+    conn = search_docs.open_index(tmp_path / "index.sqlite3")
+    search_docs.update_index(conn, tmp_path)
+
+    assert [hit.path for hit in search_docs.search(conn, "schema (v2")] == ["docs/adr/0001-schema.md"]
@@ -1,9 +1,21 @@
 from __future__ import annotations
 
+import hashlib
+import io
+import json
+import tarfile
+import threading
+import time
+import urllib.parse
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from textwrap import dedent
 
-from tools.sync_context import SourceSpec, parse_sources_file
+import pytest
+
+from tools import sync_context
+from tools.sync_context import SourceSpec, parse_sources_file, sync_sources
 
 
 def test_parse_sources_file_reads_expected_schema(tmp_path: Path) -> None:
@@ -33,3 +45,325 @@ def test_parse_sources_file_reads_expected_schema(tmp_path: Path) -> None:
         SourceSpec(repo="org/repo-a", ref="main", paths=["README.md", "docs/spec.md"]),
         SourceSpec(repo="org/repo-b", ref="v1.2.3", paths=["docs/contract.md"]),
     ]
+
+
+class StubGitHub:
+    """Local stand-in for the GitHub commits/trees/tarball API and raw.githubusercontent.com."""
+
+    def __init__(self, delay_s: float = 0.0) -> None:
+        self.refs: dict[tuple[str, str], str] = {}
+        self.files: dict[tuple[str, str, str], bytes] = {}
+        self.requests: list[str] = []
+        self.statuses: list[int] = []
+        self.delay_s = delay_s
+        self.commits_status: int | None = None  # e.g. 403 to simulate rate limiting
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 - http.server API
+                with stub._lock:
+                    stub.requests.append(self.path)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    time.sleep(stub.delay_s)
+                    status, body = stub.respond(urllib.parse.unquote(self.path))
+                    etag = f'"{hashlib.sha256(body).hexdigest()}"'
+                    if status == 200 and self.headers.get("If-None-Match") == etag:
+                        status, body = 304, b""
+                    with stub._lock:
+                        stub.statuses.append(status)
+                    self.send_response(status)
+                    if status in (200, 304):
+                        self.send_header("ETag", etag)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def respond(self, path: str) -> tuple[int, bytes]:
+        parts = path.lstrip("/").split("/")
+        if parts[0] == "repos" and parts[3] == "commits":
+            if self.commits_status is not None:
+                return self.commits_status, b'{"message": "API rate limit exceeded"}'
+            sha = self.refs.get((f"{parts[1]}/{parts[2]}", "/".join(parts[4:])))
+            return (200, json.dumps({"sha": sha}).encode()) if sha else (404, b"{}")
+        if parts[0] == "repos" and parts[3:5] == ["git", "trees"]:
+            repo, sha = f"{parts[1]}/{parts[2]}", parts[5].split("?", 1)[0]
+            sha = self.refs.get((repo, sha), sha)
+            tree = [
+                {"path": file_path, "type": "blob"}
+                for (file_repo, file_sha, file_path) in sorted(self.files)
+                if (file_repo, file_sha) == (repo, sha)
+            ]
+            return 200, json.dumps({"sha": sha, "tree": tree, "truncated": False}).encode()
+        if parts[0] == "repos" and parts[3] == "tarball":
+            return 200, self.tarball(f"{parts[1]}/{parts[2]}", parts[4])
+        if parts[0] == "raw":
+            repo, ref, file_path = f"{parts[1]}/{parts[2]}", parts[3], "/".join(parts[4:])
+            ref = self.refs.get((repo, ref), ref)
+            body = self.files.get((repo, ref, file_path))
+            return (200, body) if body is not None else (404, b"not found")
+        return 404, b"not found"
+
+    def tarball(self, repo: str, sha: str) -> bytes:
+        buffer = io.BytesIO()
+        prefix = f"{repo.replace('/', '-')}-{sha[:7]}"
+        with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+            for (file_repo, file_sha, file_path), body in sorted(self.files.items()):
+                if (file_repo, file_sha) == (repo, sha):
+                    info = tarfile.TarInfo(f"{prefix}/{file_path}")
+                    info.size = len(body)
+                    archive.addfile(info, io.BytesIO(body))
+        return buffer.getvalue()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def github(monkeypatch: pytest.MonkeyPatch) -> Iterator[StubGitHub]:
+    stub = StubGitHub()
+    monkeypatch.setattr(sync_context, "API_BASE", stub.base)
+    monkeypatch.setattr(sync_context, "RAW_BASE", f"{stub.base}/raw")
+    yield stub
+    stub.close()
+
+
+def test_sync_sources_fetches_concurrently_with_deterministic_index(
+    github: StubGitHub, tmp_path: Path
+) -> None:
+    github.delay_s = 0.05
+    sources = []
+    for repo in ("org/repo-b", "org/repo-a"):
+        sha = hashlib.sha1(repo.encode()).hexdigest()
+        github.refs[(repo, "main")] = sha
+        paths = [f"docs/file-{idx}.md" for idx in range(4)]
+        for file_path in paths:
+            github.files[(repo, sha, file_path)] = f"# {repo} {file_path}\n".encode()
+        sources.append(SourceSpec(repo=repo, ref="main", paths=paths))
+
+    index_path = sync_sources(sources, snapshots_root=tmp_path / "snapshots", jobs=6).index_path
+
+    assert github.max_in_flight > 1
+    index = index_path.read_text(encoding="utf-8")
+    # Sections and file lists follow sources.yml order, not completion order.
+    assert index.index("### org/repo-b@main") < index.index("### org/repo-a@main")
+    assert f"- Commit SHA: {github.refs[('org/repo-a', 'main')]}" in index
+    listed = [line for line in index.splitlines() if line.startswith("  - `org/repo-b/")]
+    assert listed == [f"  - `org/repo-b/docs/file-{idx}.md`" for idx in range(4)]
+    snapshot = tmp_path / "snapshots" / "org" / "repo-a" / "docs" / "file-3.md"
+    assert snapshot.read_text(encoding="utf-8") == "# org/repo-a docs/file-3.md\n"
+
+
+def test_http_cache_revalidates_with_etag_and_evicts_lru(github: StubGitHub, tmp_path: Path) -> None:
+    sha = "a" * 40
+    github.refs[("org/repo", "main")] = sha
+    github.files[("org/repo", sha, "README.md")] = b"# cached\n"
+    sources = [SourceSpec(repo="org/repo", ref="main", paths=["README.md"])]
+    cache = sync_context.HttpCache(tmp_path / "cache", max_bytes=1 << 20)
+
+    sync_sources(sources, snapshots_root=tmp_path / "snapshots", cache=cache)
+    assert github.statuses == [200, 200]
+
+    # A fresh snapshot dir forces a full sync: the ref lookup revalidates (304) and the
+    # SHA-pinned raw URL is immutable, so it is served from the cache without a request.
+    github.statuses.clear()
+    sync_sources(sources, snapshots_root=tmp_path / "fresh", cache=cache)
+    assert github.statuses == [304]
+    assert (cache.hits, cache.misses) == (2, 2)
+    snapshot = tmp_path / "fresh" / "org" / "repo" / "README.md"
+    assert snapshot.read_text(encoding="utf-8") == "# cached\n"
+
+    new_sha = "b" * 40
+    github.refs[("org/repo", "main")] = new_sha
+    github.files[("org/repo", new_sha, "README.md")] = b"# changed upstream\n"
+    github.statuses.clear()
+    sync_sources(sources, snapshots_root=tmp_path / "fresh", cache=cache)
+    assert github.statuses == [200, 200]
+    assert snapshot.read_text(encoding="utf-8") == "# changed upstream\n"
+
+    # Only the most recently used entry fits under a tiny cap.
+    readme_url = f"{github.base}/raw/org/repo/{new_sha}/README.md"
+    readme_key = hashlib.sha256(readme_url.encode()).hexdigest()
+    (tmp_path / "cache" / f"{readme_key}.json").touch()
+    cache.max_bytes = sum(path.stat().st_size for path in (tmp_path / "cache").glob(f"{readme_key}.*"))
+    assert len(cache.evict()) == 2
+    assert cache.validators(readme_url)
+
+
+def test_sync_skips_sources_pinned_at_same_sha_and_avoids_rewrites(github: StubGitHub, tmp_path: Path) -> None:
+    first_sha, second_sha = "1" * 40, "2" * 40
+    github.refs[("org/repo", "main")] = first_sha
+    github.files[("org/repo", first_sha, "README.md")] = b"# v1\n"
+    sources = [SourceSpec(repo="org/repo", ref="main", paths=["README.md"])]
+    root = tmp_path / "snapshots"
+
+    report = sync_sources(sources, snapshots_root=root)
+    assert report.written_files == ["org/repo/README.md"]
+    # Raw files come from the immutable commit URL, not the branch URL.
+    assert f"/raw/org/repo/{first_sha}/README.md" in github.requests
+    state = json.loads((root / "index.json").read_text(encoding="utf-8"))
+    assert state["sources"][0]["sha"] == first_sha
+    index_before = report.index_path.read_bytes()
+    mtimes = {path: path.stat().st_mtime_ns for path in root.rglob("*") if path.is_file()}
+
+    github.requests.clear()
+    report = sync_sources(sources, snapshots_root=root)
+    assert report.unchanged_sources == ["org/repo@main"]
+    assert report.written_files == []
+    assert [path for path in github.requests if path.startswith("/raw/")] == []
+    assert report.index_path.read_bytes() == index_before
+    assert {path: path.stat().st_mtime_ns for path in root.rglob("*") if path.is_file()} == mtimes
+
+    # The ref moved but the file is byte-identical: only the recorded SHA changes.
+    github.refs[("org/repo", "main")] = second_sha
+    github.files[("org/repo", second_sha, "README.md")] = b"# v1\n"
+    report = sync_sources(sources, snapshots_root=root)
+    assert report.unchanged_sources == [] and report.written_files == []
+    assert f"- Commit SHA: {second_sha}" in report.index_path.read_text(encoding="utf-8")
+    assert (root / "org" / "repo" / "README.md").stat().st_mtime_ns == mtimes[root / "org" / "repo" / "README.md"]
+
+
+def test_archive_mode_extracts_matching_paths_from_one_tarball(github: StubGitHub, tmp_path: Path) -> None:
+    sha = "c" * 40
+    github.refs[("org/docs", "main")] = sha
+    for file_path in ("README.md", "docs/adr/0001.md", "docs/adr/nested/0002.md", "docs/adr/img.png", "src/x.py"):
+        github.files[("org/docs", sha, file_path)] = f"{file_path}\n".encode()
+    sources = [SourceSpec(repo="org/docs", ref="main", paths=["README.md", "docs/adr/**/*.md"], mode="archive")]
+
+    report = sync_sources(sources, snapshots_root=tmp_path / "snapshots")
+
+    assert github.requests == ["/repos/org/docs/commits/main", f"/repos/org/docs/tarball/{sha}"]
+    assert report.written_files == [
+        "org/docs/README.md",
+        "org/docs/docs/adr/0001.md",
+        "org/docs/docs/adr/nested/0002.md",
+    ]
+    assert not (tmp_path / "snapshots" / "org" / "docs" / "src").exists()
+    assert "  - `org/docs/docs/adr/nested/0002.md`" in report.index_path.read_text(encoding="utf-8")
+
+    github.requests.clear()
+    assert sync_sources(sources, snapshots_root=tmp_path / "snapshots").unchanged_sources == ["org/docs@main"]
+    assert github.requests == ["/repos/org/docs/commits/main"]
+
+
+def test_parse_sources_file_reads_mode_and_patterns(tmp_path: Path) -> None:
+    sources_file = tmp_path / "sources.yml"
+    sources_file.write_text(
+        "sources:\n  - repo: org/a\n    ref: main\n    mode: archive\n    paths:\n      - docs/*.md\n",
+        encoding="utf-8",
+    )
+    assert parse_sources_file(sources_file) == [
+        SourceSpec(repo="org/a", ref="main", paths=["docs/*.md"], mode="archive")
+    ]
+
+    sources_file.write_text(
+        "sources:\n  - repo: org/a\n    ref: main\n    paths:\n      - docs/adr/\n      - docs/*.md\n",
+        encoding="utf-8",
+    )
+    assert parse_sources_file(sources_file) == [
+        SourceSpec(repo="org/a", ref="main", paths=["docs/adr/", "docs/*.md"])
+    ]
+
+
+def test_raw_mode_resolves_globs_from_one_cached_tree_listing_and_prunes(
+    github: StubGitHub, tmp_path: Path
+) -> None:
+    first_sha, second_sha = "d" * 40, "e" * 40
+    github.refs[("org/docs", "main")] = first_sha
+    for file_path in ("README.md", "docs/adr/0001.md", "docs/adr/0002.md", "docs/guide.md", "docs/guide.txt"):
+        github.files[("org/docs", first_sha, file_path)] = f"{file_path}\n".encode()
+    sources = [SourceSpec(repo="org/docs", ref="main", paths=["README.md", "docs/adr/", "docs/*.md"])]
+    cache = sync_context.HttpCache(tmp_path / "cache", max_bytes=1 << 20)
+    root = tmp_path / "snapshots"
+
+    report = sync_sources(sources, snapshots_root=root, cache=cache)
+
+    tree_requests = [path for path in github.requests if "/git/trees/" in path]
+    assert tree_requests == [f"/repos/org/docs/git/trees/{first_sha}?recursive=1"]
+    assert [path.removeprefix("org/docs/") for path in report.written_files] == [
+        "README.md",
+        "docs/adr/0001.md",
+        "docs/adr/0002.md",
+        "docs/guide.md",
+    ]
+
+    # Upstream deletes an ADR: it is pruned locally, along with now-empty directories.
+    github.refs[("org/docs", "main")] = second_sha
+    for (repo, sha, file_path), body in list(github.files.items()):
+        if sha == first_sha and file_path not in ("docs/adr/0002.md",):
+            github.files[(repo, second_sha, file_path)] = body
+    report = sync_sources(sources, snapshots_root=root, cache=cache)
+    assert report.pruned_files == ["org/docs/docs/adr/0002.md"]
+    assert report.written_files == []
+    assert not (root / "org" / "docs" / "docs" / "adr" / "0002.md").exists()
+
+    # Re-syncing a SHA whose tree was already listed reuses the cached listing.
+    github.requests.clear()
+    sync_sources(sources, snapshots_root=tmp_path / "elsewhere", cache=cache)
+    assert [path for path in github.requests if "/git/trees/" in path or "/raw/" in path] == []
+
+
+def test_branch_tree_listing_is_revalidated_when_sha_lookup_fails(github: StubGitHub, tmp_path: Path) -> None:
+    first_sha, second_sha = "1" * 40, "2" * 40
+    github.commits_status = 403
+    github.refs[("org/docs", "main")] = first_sha
+    github.files[("org/docs", first_sha, "docs/a.md")] = b"a\n"
+    sources = [SourceSpec(repo="org/docs", ref="main", paths=["docs/"])]
+    cache = sync_context.HttpCache(tmp_path / "cache", max_bytes=1 << 20)
+    root = tmp_path / "snapshots"
+    sync_sources(sources, snapshots_root=root, cache=cache)
+    assert (root / "org" / "docs" / "docs" / "a.md").exists()
+
+    github.refs[("org/docs", "main")] = second_sha
+    for file_path in ("docs/a.md", "docs/b.md"):
+        github.files[("org/docs", second_sha, file_path)] = b"b\n"
+    github.requests.clear()
+    sync_sources(sources, snapshots_root=root, cache=cache)
+
+    assert "/repos/org/docs/git/trees/main?recursive=1" in github.requests
+    assert (root / "org" / "docs" / "docs" / "b.md").read_text(encoding="utf-8") == "b\n"
+
+
+def test_raw_mode_writes_binary_files_selected_by_directory(github: StubGitHub, tmp_path: Path) -> None:
+    sha = "b" * 40
+    png = b"\x89PNG\r\n\x1a\n\xff\xfe\x00binary"
+    github.refs[("org/docs", "main")] = sha
+    github.files[("org/docs", sha, "docs/adr/0001.md")] = b"# ADR\n"
+    github.files[("org/docs", sha, "docs/adr/diagram.png")] = png
+    root = tmp_path / "snapshots"
+
+    sync_sources([SourceSpec(repo="org/docs", ref="main", paths=["docs/adr/"])], root)
+
+    assert (root / "org" / "docs" / "docs" / "adr" / "diagram.png").read_bytes() == png
+    assert (root / "org" / "docs" / "docs" / "adr" / "0001.md").read_bytes() == b"# ADR\n"
+
+
+def test_sync_prunes_files_of_removed_sources(github: StubGitHub, tmp_path: Path) -> None:
+    sha = "f" * 40
+    for repo in ("org/keep", "org/drop"):
+        github.refs[(repo, "main")] = sha
+        github.files[(repo, sha, "docs/a.md")] = b"a\n"
+    root = tmp_path / "snapshots"
+    sync_sources([SourceSpec(repo=repo, ref="main", paths=["docs/a.md"]) for repo in ("org/keep", "org/drop")], root)
+
+    report = sync_sources([SourceSpec(repo="org/keep", ref="main", paths=["docs/a.md"])], root)
+
+    assert report.pruned_files == ["org/drop/docs/a.md"]
+    assert (root / "org" / "keep" / "docs" / "a.md").exists()
+    assert not (root / "org" / "drop" / "docs").exists()
@@ -1,20 +1,11 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-from bootstrap import REFS_LOCK, head_sha, load_manifest, log, repo_dir
+from bootstrap import load_manifest, write_refs_lock
 
 
 def main() -> int:
-    specs = sorted(load_manifest(), key=lambda spec: spec.name)
-
-    lines = ["# Generated by tools/update_refs.py", "# Format: <repo> <head_sha>"]
-    for spec in specs:
-        sha = head_sha(repo_dir(spec))
-        lines.append(f"{spec.name} {sha}")
-
-    REFS_LOCK.parent.mkdir(parents=True, exist_ok=True)
-    REFS_LOCK.write_text("\n".join(lines) + "\n", encoding="utf-8")
-    log(f"Wrote refs lockfile: {REFS_LOCK}")
+    write_refs_lock(load_manifest())
     return 0
 
 